@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+"""
+Public catalog endpoints under one WSGI worker vs one ASGI worker.
+
+    wsgi  Gunicorn, 1 gthread worker with --threads threads, DRF views
+          (ASYNC_CATALOG_VIEWS=False), persistent connections
+    asgi  uvicorn, 1 worker, async views (ASYNC_CATALOG_VIEWS=True),
+          CONN_MAX_AGE=0 and, on PostgreSQL, a pool of --threads connections
+
+Both servers run against the same freshly seeded database with the catalog
+snapshot disabled, so every request reaches the ORM. The load generator keeps
+``concurrency`` requests in flight and reports throughput and latency.
+
+    python benchmarks/bench_async_views.py [--concurrency 8 32 64] [--seconds 5]
+
+Uses a throwaway SQLite file unless DATABASE_URL points at PostgreSQL (a test
+database is created and dropped). Needs ``gunicorn``, ``uvicorn`` and ``httpx``.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VEHICLES = 200
+POSTGRES_SCHEMES = ('postgres://', 'postgresql://', 'pgsql://')
+AVAILABILITY_WINDOW = (date.today() + timedelta(days=10), date.today() + timedelta(days=13))
+
+
+def setup_django():
+    sys.path.append(BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rental_backend.settings')
+    import django
+    django.setup()
+
+
+def prepare():
+    """Child process: create and seed the database; prints its settings name."""
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+    from vehicles.models import Vehicle, VehicleBrand, VehicleCategory
+
+    if connection.vendor == 'postgresql':
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    else:
+        call_command('migrate', verbosity=0)
+    brand = VehicleBrand.objects.create(name='Bench Brand')
+    category = VehicleCategory.objects.create(name='Bench Category')
+    Vehicle.objects.bulk_create([
+        Vehicle(
+            name=f'Bench {index}', brand=brand, category=category, model_year=2018 + index % 6,
+            fuel_type=('petrol', 'diesel', 'electric')[index % 3], transmission='automatic',
+            daily_rate=40 + index % 60, location=('Austin', 'Dallas')[index % 2],
+            registration_number=f'BENCH{index:04d}',
+        )
+        for index in range(VEHICLES)
+    ])
+    print(connection.settings_dict['NAME'])
+
+
+def destroy(name):
+    setup_django()
+    from django.db import connection
+
+    connection.settings_dict['NAME'] = name
+    connection.creation.destroy_test_db(name, verbosity=0)
+
+
+def endpoints(vehicle_ids):
+    start, end = AVAILABILITY_WINDOW
+    return [
+        '/api/vehicles/?fuel_type=diesel&ordering=daily_rate',
+        '/api/vehicles/?page=3',
+        f'/api/vehicles/{vehicle_ids[0]}/',
+        '/api/vehicles/search/?location=Austin&max_price=60',
+    ] + [
+        f'/api/vehicles/{vehicle_id}/availability/?start_date={start}&end_date={end}'
+        for vehicle_id in vehicle_ids[:4]
+    ]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, env, threads):
+    port = free_port()
+    if mode == 'wsgi':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'rental_backend.wsgi:application',
+            '--bind', f'127.0.0.1:{port}', '--workers', '1',
+            '--worker-class', 'gthread', '--threads', str(threads), '--log-level', 'warning',
+        ]
+        env = dict(env, ASYNC_CATALOG_VIEWS='False')
+    else:
+        command = [
+            sys.executable, '-m', 'uvicorn', 'rental_backend.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', '1',
+            '--log-level', 'warning', '--no-access-log',
+        ]
+        # Each ASGI request runs its sync DB work on a fresh thread, so
+        # per-thread persistent connections would pile up; share a pool instead.
+        env = dict(env, ASYNC_CATALOG_VIEWS='True', CONN_MAX_AGE='0')
+        if env['DATABASE_URL'].startswith(POSTGRES_SCHEMES):
+            env['DB_POOL_SIZE'] = str(threads)
+    process = subprocess.Popen(command, env=env, cwd=BACKEND_DIR)
+    return process, f'http://127.0.0.1:{port}'
+
+
+async def wait_ready(base_url, process):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            if process.poll() is not None:
+                raise SystemExit(f'server exited with {process.returncode}')
+            try:
+                response = await client.get('/api/vehicles/')
+                if response.status_code == 200:
+                    return [row['id'] for row in response.json()['results']]
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise SystemExit(f'{base_url} did not start')
+
+
+async def load(base_url, paths, concurrency, seconds):
+    import httpx
+
+    latencies = []
+    failures = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def user(offset):
+            nonlocal failures
+            index = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(paths[index % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+                index += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(offset) for offset in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'failures': failures,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def run(env, args):
+    print(f"{'server':<6} {'in flight':>9} {'requests':>9} {'failed':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>9}")
+    for mode in ('wsgi', 'asgi'):
+        process, base_url = start_server(mode, env, args.threads)
+        try:
+            vehicle_ids = asyncio.run(wait_ready(base_url, process))
+            paths = endpoints(vehicle_ids)
+            for concurrency in args.concurrency:
+                result = asyncio.run(load(base_url, paths, concurrency, args.seconds))
+                print(f"{mode:<6} {concurrency:>9} {result['requests']:>9} {result['failures']:>7} "
+                      f"{result['rps']:>8.1f} {result['p50_ms']:>8.2f} {result['p99_ms']:>9.2f}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare WSGI and ASGI serving of the public catalog.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32, 64])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=4, help='Gunicorn threads for the WSGI worker')
+    parser.add_argument('--prepare', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--destroy', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prepare:
+        return prepare()
+    if args.destroy:
+        return destroy(args.destroy)
+
+    directory = tempfile.mkdtemp(prefix='bench-async-')
+    env = dict(os.environ, DEBUG='False', CATALOG_SNAPSHOT_ENABLED='False', CONN_MAX_AGE='60')
+    env.pop('REPORTING_DATABASE_URL', None)
+    postgres = env.get('DATABASE_URL', '').startswith(POSTGRES_SCHEMES)
+    if not postgres:
+        env['DATABASE_URL'] = f'sqlite:///{os.path.join(directory, "bench.sqlite3")}'
+    test_name = None
+    try:
+        test_name = subprocess.run(
+            [sys.executable, __file__, '--prepare'], env=env, cwd=BACKEND_DIR,
+            check=True, capture_output=True, text=True,
+        ).stdout.strip().splitlines()[-1]
+        if postgres:
+            env['DATABASE_URL'] = env['DATABASE_URL'].split('?')[0].rsplit('/', 1)[0] + '/' + test_name
+        print(f"{'PostgreSQL' if postgres else 'SQLite'}, {VEHICLES} vehicles, {args.seconds:g}s per level")
+        run(env, args)
+    finally:
+        if postgres and test_name:
+            subprocess.run([sys.executable, __file__, '--destroy', test_name], env=os.environ, cwd=BACKEND_DIR, check=False)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
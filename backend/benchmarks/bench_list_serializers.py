@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Microbenchmark: BookingListSerializer vs the flat .values() fast path.
+
+Seeds a throwaway test database, renders the same booking list both ways at
+20, 100 and 1000 rows, checks the JSON bytes are identical and prints timings.
+
+    python benchmarks/bench_list_serializers.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rental_backend.settings')
+
+import django
+from django.conf import settings
+
+django.setup()
+# Keep the benchmark data out of the shared catalog snapshot
+settings.CATALOG_SNAPSHOT_ENABLED = False
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+SIZES = (20, 100, 1000)
+
+
+def seed(rows):
+    from django.contrib.auth import get_user_model
+    from vehicles.models import Vehicle, VehicleBrand, VehicleCategory
+    from bookings.models import Booking, Payment
+
+    User = get_user_model()
+    brand = VehicleBrand.objects.create(name='Bench Brand', logo='brand_logos/bench logo.png')
+    category = VehicleCategory.objects.create(name='Bench Category', description='Benchmark', icon='car')
+    vehicles = [
+        Vehicle.objects.create(
+            name=f'Bench {index}', brand=brand, category=category,
+            model_year=2023, fuel_type='petrol', transmission='manual', seating_capacity=5,
+            daily_rate=Decimal('49.90') + index, location='Bench City',
+            latitude=Decimal('12.971599') if index % 2 else None,
+            longitude=Decimal('77.594566') if index % 2 else None,
+            registration_number=f'BENCH{index:04d}', features=['AC', 'GPS'],
+            main_image=f'vehicles/bench_{index}.jpg' if index % 3 else None,
+        )
+        for index in range(10)
+    ]
+    user = User.objects.create_user(
+        username='bench', email='bench@example.com', password='bench-password',
+        first_name='Bench', last_name='User',
+    )
+    start = date(2024, 1, 1)
+    for index in range(rows):
+        vehicle = vehicles[index % len(vehicles)]
+        booking = Booking.objects.create(
+            user=user, vehicle=vehicle,
+            start_date=start + timedelta(days=index), end_date=start + timedelta(days=index + 2),
+            daily_rate=vehicle.daily_rate, total_days=0, subtotal=0, total_amount=0,
+        )
+        if index % 2:
+            Payment.objects.create(
+                booking=booking, amount=booking.total_amount, payment_method='upi',
+                transaction_id=f'TXN{index}', payment_status='completed',
+                payment_date=booking.created_at,
+            )
+
+
+def reset():
+    from django.contrib.auth import get_user_model
+    from vehicles.models import VehicleBrand, VehicleCategory
+
+    # Cascades to vehicles, bookings and payments
+    get_user_model().objects.all().delete()
+    VehicleBrand.objects.all().delete()
+    VehicleCategory.objects.all().delete()
+
+
+def serializer_path(request):
+    from bookings.models import Booking
+    from bookings.serializers import BookingListSerializer
+
+    queryset = Booking.objects.select_related('user', 'vehicle__brand', 'vehicle__category').prefetch_related('payment')
+    return JSONRenderer().render(BookingListSerializer(queryset, many=True, context={'request': request}).data)
+
+
+def fast_path(request):
+    from bookings.models import Booking
+    from bookings.fast_serializers import booking_list_values, serialize_booking_rows
+
+    return JSONRenderer().render(serialize_booking_rows(booking_list_values(Booking.objects.all()), request))
+
+
+def timed(func, request, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(request)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        request = APIRequestFactory().get('/api/bookings/my-bookings/')
+        print(f"{'rows':>6} {'serializer ms':>14} {'fast path ms':>13} {'speedup':>8}")
+        for rows in SIZES:
+            reset()
+            seed(rows)
+
+            expected = serializer_path(request)
+            actual = fast_path(request)
+            if expected != actual:
+                raise SystemExit(f'Output differs at {rows} rows')
+
+            slow = timed(serializer_path, request, args.repeat)
+            fast = timed(fast_path, request, args.repeat)
+            print(f'{rows:>6} {slow:>14.2f} {fast:>13.2f} {slow / fast:>7.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
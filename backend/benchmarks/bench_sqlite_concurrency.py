@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Concurrent booking creation on SQLite: stock settings vs SQLITE_PRODUCTION_MODE.
+
+Each mode gets a fresh database file. Several worker processes (like Gunicorn
+workers) then POST bookings to /api/bookings/ at the same time; the script
+reports throughput, latency and failed requests ("database is locked").
+
+    python benchmarks/bench_sqlite_concurrency.py [--workers 4] [--bookings 200]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'default': {'SQLITE_PRODUCTION_MODE': 'False'},
+    'production': {'SQLITE_PRODUCTION_MODE': 'True'},
+}
+
+VEHICLES = 20
+
+
+def setup_django():
+    sys.path.append(BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rental_backend.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.test.utils import setup_test_environment
+
+    # Keep catalog rebuilds out of the measurement
+    settings.CATALOG_SNAPSHOT_ENABLED = False
+    setup_test_environment()
+
+
+def prepare():
+    """Child process: migrate the fresh database and add a customer and vehicles."""
+    setup_django()
+    from django.core.management import call_command
+    from users.models import User
+    from vehicles.models import Vehicle, VehicleBrand, VehicleCategory
+
+    call_command('migrate', verbosity=0)
+    User.objects.create_user(username='bench', email='bench@example.com', password='bench-password')
+    brand = VehicleBrand.objects.create(name='Bench Brand')
+    category = VehicleCategory.objects.create(name='Bench Category')
+    for index in range(VEHICLES):
+        Vehicle.objects.create(
+            name=f'Bench {index}', brand=brand, category=category, model_year=2022,
+            fuel_type='petrol', transmission='manual', daily_rate=50,
+            location='Bench City', registration_number=f'BENCH{index:04d}',
+        )
+
+
+def work(worker, bookings, start_at):
+    """Child process: create ``bookings`` bookings, starting at ``start_at``."""
+    setup_django()
+    from rest_framework.test import APIClient
+    from users.models import User
+    from vehicles.models import Vehicle
+
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(User.objects.get(username='bench'))
+    vehicle_ids = list(Vehicle.objects.values_list('id', flat=True))
+    first_day = date.today() + timedelta(days=1)
+
+    latencies = []
+    failures = 0
+    time.sleep(max(0, start_at - time.time()))
+    for index in range(bookings):
+        start = first_day + timedelta(days=(worker * bookings + index) % 300)
+        payload = {
+            'vehicle': vehicle_ids[(worker + index) % len(vehicle_ids)],
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=2)).isoformat(),
+        }
+        started = time.perf_counter()
+        response = client.post('/api/bookings/', payload, format='json')
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 201:
+            failures += 1
+    print(json.dumps({'latencies': latencies, 'failures': failures, 'finished_at': time.time()}))
+
+
+def run(mode, workers, bookings):
+    directory = tempfile.mkdtemp(prefix='bench-sqlite-')
+    env = dict(
+        os.environ, DEBUG='False', **MODES[mode],
+        DATABASE_URL=f'sqlite:///{os.path.join(directory, "bench.sqlite3")}',
+    )
+    env.pop('REPORTING_DATABASE_URL', None)
+    try:
+        return _measure(mode, env, workers, bookings)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _measure(mode, env, workers, bookings):
+    subprocess.run([sys.executable, __file__, '--prepare'], env=env, cwd=BACKEND_DIR, check=True)
+
+    start_at = time.time() + 3
+    processes = [
+        subprocess.Popen(
+            [sys.executable, __file__, '--worker', str(worker), '--bookings', str(bookings),
+             '--start-at', str(start_at)],
+            env=env, cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True,
+        )
+        for worker in range(workers)
+    ]
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode:
+            raise SystemExit(f'{mode}: worker exited with {process.returncode}')
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    elapsed = max(result['finished_at'] for result in results) - start_at
+    failures = sum(result['failures'] for result in results)
+    return {
+        'created': len(latencies) - failures,
+        'failures': failures,
+        'per_second': (len(latencies) - failures) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent booking creation on SQLite.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--bookings', type=int, default=200, help='Bookings per worker')
+    parser.add_argument('--prepare', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prepare:
+        return prepare()
+    if args.worker is not None:
+        return work(args.worker, args.bookings, args.start_at)
+
+    print(f'{args.workers} worker processes x {args.bookings} bookings')
+    print(f"{'mode':<11} {'created':>8} {'failed':>7} {'per sec':>8} {'p50 ms':>8} {'p99 ms':>9}")
+    for mode in MODES:
+        result = run(mode, args.workers, args.bookings)
+        print(f"{mode:<11} {result['created']:>8} {result['failures']:>7} {result['per_second']:>8.1f} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking, BookingStatusHistory, Payment
+from .models import Booking, BookingStatusHistory, ChangeEvent, CustomerStats, Payment, TaxRule, VehicleStats
 
 
 class BookingStatusHistoryInline(admin.TabularInline):
@@ -52,3 +52,44 @@ class PaymentAdmin(admin.ModelAdmin):
     list_filter = ['payment_method', 'payment_status', 'payment_date', 'created_at']
     search_fields = ['booking__user__email', 'transaction_id']
     ordering = ['-created_at']
+
+
+@admin.register(VehicleStats)
+class VehicleStatsAdmin(admin.ModelAdmin):
+    list_display = ['vehicle', 'booking_count', 'paid_revenue', 'booked_days', 'cancellation_count', 'last_booked_date']
+    search_fields = ['vehicle__name', 'vehicle__registration_number']
+    ordering = ['-paid_revenue']
+    # Maintained from bookings; see bookings/stats.py
+    readonly_fields = ['vehicle', 'booking_count', 'paid_revenue', 'booked_days', 'cancellation_count', 'last_booked_date', 'updated_at']
+
+
+@admin.register(CustomerStats)
+class CustomerStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'booking_count', 'completed_count', 'cancelled_count', 'total_spent', 'last_booking_at',
+                    'segment']
+    list_filter = ['segment']
+    search_fields = ['user__email', 'user__username']
+    ordering = ['-total_spent']
+    # Maintained from bookings; see bookings/stats.py
+    readonly_fields = [
+        'user', 'booking_count', 'pending_count', 'confirmed_count', 'active_count', 'completed_count',
+        'cancelled_count', 'paid_booking_count', 'total_spent', 'first_booking_at', 'last_booking_at', 'updated_at',
+        'recency_score', 'frequency_score', 'monetary_score', 'segment',
+    ]
+
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(admin.ModelAdmin):
+    list_display = ['seq', 'model', 'object_id', 'action', 'created_at']
+    list_filter = ['model', 'action']
+    search_fields = ['object_id']
+    ordering = ['-seq']
+    # Append-only; see bookings/changes.py
+    readonly_fields = ['seq', 'model', 'object_id', 'action', 'data', 'created_at']
+
+
+@admin.register(TaxRule)
+class TaxRuleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'rate', 'category', 'location', 'is_active', 'updated_at']
+    list_filter = ['is_active', 'category']
+    search_fields = ['name', 'location']
@@ -0,0 +1,127 @@
+"""
+Change feed for bookings, payments and booking status history.
+
+Every save or delete of those models appends a ``ChangeEvent`` in the same
+transaction (``bookings.signals``), carrying the row's field values after
+the write. Consumers keep the ``seq`` of the last event they applied and ask
+for the next batch with ``/api/bookings/changes/?since=<seq>``, so a sync
+costs O(changes) rather than a scan of the tables.
+
+Sequence numbers are allocated when an event is inserted, not when its
+transaction commits, so a later ``seq`` can become visible before an earlier
+one. ``read`` therefore stops at a gap in the sequence until the event after
+it is ``CHANGE_FEED_SETTLE_SECONDS`` old; an older gap is a rolled-back
+transaction or a compacted event. The setting must exceed the longest
+transaction that writes these models.
+
+``compact`` (the ``compact_changes`` command) keeps only the newest event per
+object among events older than a cut-off, as in log compaction, so a
+consumer that falls behind still ends with every object's latest state.
+Delete events (tombstones) are dropped after a longer cut-off; consumers
+away for longer must resync from ``since=0``. Writes that skip model signals
+(``bulk_create``, ``QuerySet.update``, raw SQL) are not in the feed unless
+they call ``record_many``, as the lifecycle sweeper does.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.backends.utils import format_number
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from .models import ChangeEvent
+
+EVENT_FIELDS = ('seq', 'model', 'object_id', 'action', 'data', 'created_at')
+
+
+def _column_value(field, instance):
+    value = field.value_from_object(instance)
+    if isinstance(field, models.DecimalField) and value is not None:
+        # As stored: computed amounts carry more places in memory than the column
+        return format_number(value, field.max_digits, field.decimal_places)
+    return value
+
+
+def snapshot(instance):
+    """The instance's column values, keyed by attname (``vehicle_id``, not ``vehicle``)."""
+    return {field.attname: _column_value(field, instance) for field in instance._meta.concrete_fields}
+
+
+def record(instance, action, using=DEFAULT_DB_ALIAS):
+    ChangeEvent.objects.using(using).create(
+        model=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+        data=None if action == 'deleted' else snapshot(instance),
+    )
+
+
+def record_many(instances, action, using=DEFAULT_DB_ALIAS):
+    """``record`` for rows written in bulk, with one insert."""
+    ChangeEvent.objects.using(using).bulk_create([
+        ChangeEvent(
+            model=instance._meta.model_name,
+            object_id=instance.pk,
+            action=action,
+            data=None if action == 'deleted' else snapshot(instance),
+        )
+        for instance in instances
+    ])
+
+
+def read(since, limit, using=DEFAULT_DB_ALIAS):
+    """
+    Up to ``limit`` events after ``since``, oldest first, and whether more
+    are already available. Stops short at a gap that may still be filled.
+    """
+    events = list(
+        ChangeEvent.objects.using(using).filter(seq__gt=since).order_by('seq').values(*EVENT_FIELDS)[:limit + 1]
+    )
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    settled = timezone.now() - timedelta(seconds=getattr(settings, 'CHANGE_FEED_SETTLE_SECONDS', 5))
+    expected = since + 1
+    for position, event in enumerate(events):
+        if event['seq'] != expected and event['created_at'] > settled:
+            # An earlier seq may belong to a transaction that has not committed
+            return events[:position], False
+        expected = event['seq'] + 1
+    return events, has_more
+
+
+def _delete_in_batches(queryset, first_seq, last_seq, batch_size):
+    # Seq ranges keep each delete, and the locks it holds, short
+    deleted = 0
+    for start in range(first_seq - 1, last_seq, batch_size):
+        deleted += queryset.filter(seq__gt=start, seq__lte=start + batch_size).delete()[0]
+    return deleted
+
+
+def compact(before, tombstones_before, batch_size=10000, using=DEFAULT_DB_ALIAS):
+    """
+    Drop events created before ``before`` that a newer event for the same
+    object supersedes, and delete events (tombstones) created before
+    ``tombstones_before``. Returns how many of each were dropped. The newest
+    event is always kept, so sequence numbers are never reused.
+    """
+    events = ChangeEvent.objects.using(using)
+    bounds = events.aggregate(first=Min('seq'), newest=Max('seq'))
+    first, newest = bounds['first'], bounds['newest']
+    if newest is None:
+        return 0, 0
+
+    last_old = events.filter(created_at__lt=before).aggregate(seq=Max('seq'))['seq'] or 0
+    newer = ChangeEvent.objects.using(using).filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'), seq__gt=OuterRef('seq'),
+    )
+    superseded = _delete_in_batches(events.filter(Exists(newer)), first, last_old, batch_size)
+
+    # What is left before this cut-off is the final event of each object; only
+    # deletes are dropped, since the other events carry the object's current state.
+    last_tombstone = events.filter(created_at__lt=tombstones_before).aggregate(seq=Max('seq'))['seq'] or 0
+    tombstones = _delete_in_batches(
+        events.filter(action='deleted').exclude(seq=newest), first, last_tombstone, batch_size,
+    )
+    return superseded, tombstones
@@ -0,0 +1,128 @@
+"""
+Fast path for booking list endpoints.
+
+``BookingListSerializer`` nests ``VehicleListSerializer`` (which nests the brand
+and category serializers), calls ``build_absolute_uri`` per row and adds a
+method field for the user, so most of the time on ``my-bookings`` and the admin
+grid goes into serializer machinery. This module builds the same rows from a
+single ``.values()`` query instead, formatting scalars with the very DRF field
+instances the serializers would use, so the rendered JSON is byte-identical.
+"""
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+BOOKING_LIST_FIELDS = (
+    'id', 'start_date', 'end_date', 'total_days', 'total_amount', 'status', 'payment_status', 'created_at',
+    'user__id', 'user__username', 'user__email', 'user__first_name', 'user__last_name',
+    'vehicle__id', 'vehicle__name', 'vehicle__model_year', 'vehicle__fuel_type', 'vehicle__transmission',
+    'vehicle__seating_capacity', 'vehicle__daily_rate', 'vehicle__location', 'vehicle__latitude',
+    'vehicle__longitude', 'vehicle__status', 'vehicle__main_image', 'vehicle__features',
+    'vehicle__brand__id', 'vehicle__brand__name', 'vehicle__brand__logo',
+    'vehicle__category__id', 'vehicle__category__name', 'vehicle__category__description',
+    'vehicle__category__icon',
+    'payment__id', 'payment__amount', 'payment__payment_method', 'payment__transaction_id',
+    'payment__payment_gateway', 'payment__payment_status', 'payment__payment_date',
+    'payment__failure_reason', 'payment__created_at',
+)
+
+# The same field instances ModelSerializer builds for these columns.
+_money = serializers.DecimalField(max_digits=10, decimal_places=2).to_representation
+_coordinate = serializers.DecimalField(max_digits=9, decimal_places=6).to_representation
+_date = serializers.DateField().to_representation
+_datetime = serializers.DateTimeField().to_representation
+
+
+def booking_list_values(queryset):
+    """The booking list as a ``.values()`` queryset (one query, no instances)."""
+    return queryset.values(*BOOKING_LIST_FIELDS)
+
+
+def media_url_prefix(request):
+    """Absolute URL prefix for stored files, computed once per request."""
+    if request is None:
+        return None
+    return request.build_absolute_uri(default_storage.url(''))
+
+
+def _media_url(name, prefix):
+    if not name or prefix is None:
+        return None
+    return prefix + filepath_to_uri(name)
+
+
+def _logo_url(name, prefix):
+    # DRF's ImageField falls back to the relative storage URL without a request.
+    if not name:
+        return None
+    if prefix is None:
+        return default_storage.url(name)
+    return prefix + filepath_to_uri(name)
+
+
+def serialize_booking_rows(rows, request):
+    """Rows from ``booking_list_values`` in ``BookingListSerializer`` format."""
+    prefix = media_url_prefix(request)
+    data = []
+    for row in rows:
+        payment = None
+        if row['payment__id'] is not None:
+            payment = {
+                'id': row['payment__id'],
+                'amount': _money(row['payment__amount']),
+                'payment_method': row['payment__payment_method'],
+                'transaction_id': row['payment__transaction_id'],
+                'payment_gateway': row['payment__payment_gateway'],
+                'payment_status': row['payment__payment_status'],
+                'payment_date': _datetime(row['payment__payment_date']) if row['payment__payment_date'] else None,
+                'failure_reason': row['payment__failure_reason'],
+                'created_at': _datetime(row['payment__created_at']),
+            }
+
+        latitude = row['vehicle__latitude']
+        longitude = row['vehicle__longitude']
+        data.append({
+            'id': row['id'],
+            'user': {
+                'id': row['user__id'],
+                'username': row['user__username'],
+                'email': row['user__email'],
+                'first_name': row['user__first_name'],
+                'last_name': row['user__last_name'],
+            },
+            'vehicle': {
+                'id': row['vehicle__id'],
+                'name': row['vehicle__name'],
+                'brand': {
+                    'id': row['vehicle__brand__id'],
+                    'name': row['vehicle__brand__name'],
+                    'logo': _logo_url(row['vehicle__brand__logo'], prefix),
+                },
+                'category': {
+                    'id': row['vehicle__category__id'],
+                    'name': row['vehicle__category__name'],
+                    'description': row['vehicle__category__description'],
+                    'icon': row['vehicle__category__icon'],
+                },
+                'model_year': row['vehicle__model_year'],
+                'fuel_type': row['vehicle__fuel_type'],
+                'transmission': row['vehicle__transmission'],
+                'seating_capacity': row['vehicle__seating_capacity'],
+                'daily_rate': _money(row['vehicle__daily_rate']),
+                'location': row['vehicle__location'],
+                'latitude': _coordinate(latitude) if latitude is not None else None,
+                'longitude': _coordinate(longitude) if longitude is not None else None,
+                'status': row['vehicle__status'],
+                'main_image_url': _media_url(row['vehicle__main_image'], prefix),
+                'features': row['vehicle__features'],
+            },
+            'start_date': _date(row['start_date']),
+            'end_date': _date(row['end_date']),
+            'total_days': row['total_days'],
+            'total_amount': _money(row['total_amount']),
+            'status': row['status'],
+            'payment_status': row['payment_status'],
+            'payment': payment,
+            'created_at': _datetime(row['created_at']),
+        })
+    return data
@@ -5,66 +5,107 @@ from rest_framework.permissions import IsAdminUser
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta
+from functools import partial
 from .models import Booking, Payment
+from .stats import leaderboard
 from vehicles.models import Vehicle, VehicleCategory, VehicleBrand
+from rental_backend.db_routers import use_replica
+from rental_backend.parallel import run_sections
 
 
 # ==================== FINANCIAL REPORTING & ANALYTICS ====================
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def financial_overview(request):
     """Get comprehensive financial overview for admin dashboard."""
     # Date range filters
     days = int(request.GET.get('days', 30))
     start_date = datetime.now() - timedelta(days=days)
     
-    # Revenue analytics
-    total_revenue = Booking.objects.filter(payment_status='paid').aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
-    
-    period_revenue = Booking.objects.filter(
-        payment_status='paid',
-        created_at__gte=start_date
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # Tax revenue
-    total_tax = Booking.objects.filter(payment_status='paid').aggregate(
-        total=Sum('tax_amount')
-    )['total'] or 0
-    
-    period_tax = Booking.objects.filter(
-        payment_status='paid',
-        created_at__gte=start_date
-    ).aggregate(total=Sum('tax_amount'))['total'] or 0
-    
-    # Average metrics
-    avg_booking_value = Booking.objects.filter(
-        payment_status='paid'
-    ).aggregate(avg=Avg('total_amount'))['avg'] or 0
+    # Independent sections, evaluated concurrently
+    sections, meta = run_sections({
+        'revenue': partial(_overview_revenue, start_date),
+        'payment_breakdown': _overview_payment_breakdown,
+        'revenue_by_category': _overview_revenue_by_category,
+        'revenue_by_brand': _overview_revenue_by_brand,
+        'monthly_trends': _overview_monthly_trends,
+    })
+    revenue = sections['revenue']
     
-    avg_daily_revenue = period_revenue / days if days > 0 else 0
+    avg_daily_revenue = revenue['period_revenue'] / days if days > 0 else 0
     
-    # Payment status breakdown
-    payment_breakdown = Booking.objects.values('payment_status').annotate(
+    return Response({
+        'overview': {
+            'total_revenue': float(revenue['total_revenue']),
+            'period_revenue': float(revenue['period_revenue']),
+            'total_tax': float(revenue['total_tax']),
+            'period_tax': float(revenue['period_tax']),
+            'avg_booking_value': float(revenue['avg_booking_value']),
+            'avg_daily_revenue': float(avg_daily_revenue),
+        },
+        'payment_breakdown': sections['payment_breakdown'],
+        'revenue_by_category': sections['revenue_by_category'],
+        'revenue_by_brand': sections['revenue_by_brand'],
+        'monthly_trends': sections['monthly_trends'],
+        'meta': meta
+    })
+
+
+def _overview_revenue(start_date):
+    paid = Booking.objects.filter(payment_status='paid')
+    period_paid = paid.filter(created_at__gte=start_date)
+    return {
+        # Revenue analytics
+        'total_revenue': paid.aggregate(total=Sum('total_amount'))['total'] or 0,
+        'period_revenue': period_paid.aggregate(total=Sum('total_amount'))['total'] or 0,
+        # Tax revenue
+        'total_tax': paid.aggregate(total=Sum('tax_amount'))['total'] or 0,
+        'period_tax': period_paid.aggregate(total=Sum('tax_amount'))['total'] or 0,
+        # Average metrics
+        'avg_booking_value': paid.aggregate(avg=Avg('total_amount'))['avg'] or 0,
+    }
+
+
+def _overview_payment_breakdown():
+    return list(Booking.objects.values('payment_status').annotate(
         count=Count('id'),
         total_amount=Sum('total_amount')
-    ).order_by('-total_amount')
-    
-    # Revenue by vehicle category
+    ).order_by('-total_amount'))
+
+
+def _overview_revenue_by_category():
     revenue_by_category = VehicleCategory.objects.annotate(
         total_revenue=Sum('vehicles__bookings__total_amount'),
         booking_count=Count('vehicles__bookings')
     ).filter(total_revenue__isnull=False).order_by('-total_revenue')
-    
-    # Revenue by vehicle brand
+    return [
+        {
+            'category': cat.name,
+            'total_revenue': float(cat.total_revenue or 0),
+            'booking_count': cat.booking_count
+        }
+        for cat in revenue_by_category
+    ]
+
+
+def _overview_revenue_by_brand():
     revenue_by_brand = VehicleBrand.objects.annotate(
         total_revenue=Sum('vehicles__bookings__total_amount'),
         booking_count=Count('vehicles__bookings')
     ).filter(total_revenue__isnull=False).order_by('-total_revenue')
-    
-    # Monthly revenue trends
+    return [
+        {
+            'brand': brand.name,
+            'total_revenue': float(brand.total_revenue or 0),
+            'booking_count': brand.booking_count
+        }
+        for brand in revenue_by_brand
+    ]
+
+
+def _overview_monthly_trends():
     monthly_trends = []
     for i in range(12):  # Last 12 months
         month_start = datetime.now().replace(day=1) - timedelta(days=30*i)
@@ -82,39 +123,12 @@ def financial_overview(request):
         })
     
     monthly_trends.reverse()
-    
-    return Response({
-        'overview': {
-            'total_revenue': float(total_revenue),
-            'period_revenue': float(period_revenue),
-            'total_tax': float(total_tax),
-            'period_tax': float(period_tax),
-            'avg_booking_value': float(avg_booking_value),
-            'avg_daily_revenue': float(avg_daily_revenue),
-        },
-        'payment_breakdown': list(payment_breakdown),
-        'revenue_by_category': [
-            {
-                'category': cat.name,
-                'total_revenue': float(cat.total_revenue or 0),
-                'booking_count': cat.booking_count
-            }
-            for cat in revenue_by_category
-        ],
-        'revenue_by_brand': [
-            {
-                'brand': brand.name,
-                'total_revenue': float(brand.total_revenue or 0),
-                'booking_count': brand.booking_count
-            }
-            for brand in revenue_by_brand
-        ],
-        'monthly_trends': monthly_trends
-    })
+    return monthly_trends
 
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def revenue_analytics(request):
     """Get detailed revenue analytics with various breakdowns."""
     # Date range filters
@@ -181,14 +195,8 @@ def revenue_analytics(request):
             })
         trends.reverse()
     
-    # Top performing vehicles
-    top_vehicles = Vehicle.objects.annotate(
-        total_revenue=Sum('bookings__total_amount'),
-        booking_count=Count('bookings')
-    ).filter(
-        total_revenue__isnull=False,
-        bookings__payment_status='paid'
-    ).order_by('-total_revenue')[:10]
+    # Top performing vehicles, all time, from the stats table
+    top_vehicles = leaderboard('paid_revenue', 10)
     
     # Revenue by time of day
     hourly_revenue = []
@@ -219,13 +227,13 @@ def revenue_analytics(request):
         'trends': trends,
         'top_vehicles': [
             {
-                'id': vehicle.id,
-                'name': vehicle.name,
-                'brand': vehicle.brand.name,
-                'total_revenue': float(vehicle.total_revenue or 0),
-                'booking_count': vehicle.booking_count
+                'id': stats.vehicle.id,
+                'name': stats.vehicle.name,
+                'brand': stats.vehicle.brand.name,
+                'total_revenue': float(stats.paid_revenue),
+                'booking_count': stats.booking_count
             }
-            for vehicle in top_vehicles
+            for stats in top_vehicles
         ],
         'hourly_revenue': hourly_revenue,
         'daily_revenue': daily_revenue
@@ -234,6 +242,7 @@ def revenue_analytics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def profit_loss_statement(request):
     """Generate profit and loss statement."""
     # Date range filters
@@ -291,6 +300,7 @@ def profit_loss_statement(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def financial_export(request):
     """Export financial data to CSV format."""
     import csv
@@ -0,0 +1,84 @@
+"""
+Date-driven booking status transitions.
+
+Booking statuses otherwise only change through the API. ``sweep`` moves the
+bookings whose dates have come due:
+
+    confirmed -> active     start date reached, end date not yet passed
+    confirmed -> completed  end date passed before anyone started it
+    active    -> completed  end date passed
+
+Each transition is a handful of set-based statements per batch of due rows:
+lock the batch (skipping rows another sweeper holds), one ``UPDATE``, one
+``bulk_create`` of ``BookingStatusHistory`` rows, one insert of change-feed
+events and one refresh of the customers' stats rows. A batch commits on its
+own, so a run over millions of rows never holds locks for long. Rows are
+selected by status and date, so running it again finds nothing to do, and
+two overlapping runs never move the same booking twice.
+
+Vehicle stats do not depend on these statuses. The touched vehicles' status
+is reconciled afterwards (``bookings.vehicle_status``).
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from users import profiles
+from . import changes, live, vehicle_status
+from .models import Booking, BookingStatusHistory
+from .stats import refresh_customer_stats
+
+# (old status, new status, due condition on today's date, history reason)
+TRANSITIONS = (
+    ('confirmed', 'active', lambda today: {'start_date__lte': today, 'end_date__gte': today},
+     'Start date reached'),
+    ('confirmed', 'completed', lambda today: {'end_date__lt': today}, 'End date passed'),
+    ('active', 'completed', lambda today: {'end_date__lt': today}, 'End date passed'),
+)
+
+
+def _sweep_batch(old, new, due, reason, batch_size, using):
+    """Move one batch; returns the ``(user_id, vehicle_id)`` pairs moved."""
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        rows = list(
+            Booking.objects.using(using).select_for_update(skip_locked=True)
+            .filter(status=old, **due).order_by('id').values_list('id', 'user_id', 'vehicle_id')[:batch_size]
+        )
+        if not rows:
+            return []
+        ids = [booking_id for booking_id, _, _ in rows]
+        Booking.objects.using(using).filter(id__in=ids).update(status=new, updated_at=now)
+        history = BookingStatusHistory.objects.using(using).bulk_create([
+            BookingStatusHistory(booking_id=booking_id, old_status=old, new_status=new,
+                                 reason=f'Automatic: {reason.lower()}')
+            for booking_id in ids
+        ])
+        changes.record_many(Booking.objects.using(using).filter(id__in=ids), 'updated', using=using)
+        changes.record_many(history, 'created', using=using)
+
+        user_ids = {user_id for _, user_id, _ in rows}
+        refresh_customer_stats(user_ids, using=using)
+        transaction.on_commit(lambda: profiles.evict(user_ids), using=using)
+    return [(user_id, vehicle_id) for _, user_id, vehicle_id in rows]
+
+
+def sweep(today=None, batch_size=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Apply every due transition. Returns ``{'old->new': count}`` and the number
+    of vehicles whose status changed, under ``'vehicles'``.
+    """
+    today = today or timezone.localdate()
+    moved = {}
+    vehicle_ids = set()
+    for old, new, due, reason in TRANSITIONS:
+        count = 0
+        while batch := _sweep_batch(old, new, due(today), reason, batch_size, using):
+            count += len(batch)
+            vehicle_ids.update(vehicle_id for _, vehicle_id in batch)
+        moved[f'{old}->{new}'] = count
+
+    if vehicle_ids:
+        # Updates skip the live dashboard's signals
+        live.request_resync(using=using)
+    moved['vehicles'] = vehicle_status.reconcile(vehicle_ids, today, using=using) if vehicle_ids else 0
+    return moved
@@ -0,0 +1,173 @@
+"""
+Live KPI deltas for admin dashboards.
+
+``snapshot()`` reads the dashboard KPIs once:
+
+    bookings  total and per status, paid bookings and paid revenue (summed
+              from CustomerStats)
+    payments  count per payment status
+    vehicles  count per vehicle status
+
+After that, every committed save or delete of a Booking, Payment or Vehicle
+publishes the change it made to those numbers, computed from the row's
+values before and after the write rather than by re-querying
+(``bookings.signals``). Deltas go through an in-process ``Broadcaster``:
+each subscriber (an open ``/api/bookings/admin/live/`` stream) gets them on
+its own asyncio queue, so no message broker is needed. The flip side is that
+a stream only sees writes made by its own worker process.
+
+Writes that skip signals (``QuerySet.update``, ``bulk_create``) call
+``request_resync()``: subscribers then read a fresh snapshot. So does a
+subscriber that falls more than ``QUEUE_SIZE`` messages behind. Nothing is
+computed while there are no subscribers.
+"""
+import asyncio
+import threading
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import CustomerStats, Payment
+from .stats import customer_contribution
+
+QUEUE_SIZE = 1000
+RESYNC = {'resync': True}
+
+# KPI name for each customer_contribution counter
+BOOKING_KPIS = {
+    'booking_count': 'total',
+    'pending_count': 'pending',
+    'confirmed_count': 'confirmed',
+    'active_count': 'active',
+    'completed_count': 'completed',
+    'cancelled_count': 'cancelled',
+    'paid_booking_count': 'paid',
+    'total_spent': 'revenue',
+}
+
+
+class Subscription:
+    """One subscriber's queue, filled from any thread and read in its event loop."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def _offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind for deltas to be useful: start over from a snapshot
+            self.clear()
+            self.queue.put_nowait(RESYNC)
+
+    def offer(self, message):
+        self.loop.call_soon_threadsafe(self._offer, message)
+
+    def pending(self):
+        return not self.queue.empty()
+
+    def clear(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def get(self, timeout):
+        """The next message, or None after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    """Fans published messages out to every subscription in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def publish(self, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.offer(message)
+            except RuntimeError:
+                # Its event loop has closed without unsubscribing
+                self.unsubscribe(subscription)
+
+
+broadcaster = Broadcaster()
+
+
+# ==================== KPIs ====================
+
+def _counts(queryset, field):
+    return {row[field]: row['count'] for row in queryset.order_by().values(field).annotate(count=Count('pk'))}
+
+
+def snapshot():
+    from vehicles.models import Vehicle
+
+    totals = CustomerStats.objects.aggregate(**{name: Sum(name) for name in BOOKING_KPIS})
+    bookings = {kpi: totals[name] or 0 for name, kpi in BOOKING_KPIS.items()}
+    bookings['revenue'] = float(bookings['revenue'])
+    return {
+        'bookings': bookings,
+        'payments': _counts(Payment.objects.all(), 'payment_status'),
+        'vehicles': _counts(Vehicle.objects.all(), 'status'),
+    }
+
+
+def _without_zeros(delta):
+    delta = {group: {kpi: value for kpi, value in kpis.items() if value} for group, kpis in delta.items()}
+    return {group: kpis for group, kpis in delta.items() if kpis}
+
+
+def booking_delta(before, after):
+    """KPI change from a booking's tracked values (None for created/deleted)."""
+    change = Counter()
+    if after is not None:
+        change.update(customer_contribution(after))
+    if before is not None:
+        change.subtract(customer_contribution(before))
+    bookings = {BOOKING_KPIS[name]: value for name, value in change.items()}
+    if 'revenue' in bookings:
+        bookings['revenue'] = float(bookings['revenue'])
+    return _without_zeros({'bookings': bookings})
+
+
+def status_delta(group, before, after):
+    """KPI change for a row counted per status, e.g. a vehicle going from available to rented."""
+    change = Counter()
+    if after is not None:
+        change[after] += 1
+    if before is not None:
+        change[before] -= 1
+    return _without_zeros({group: dict(change)})
+
+
+def publish_on_commit(delta, using=None):
+    """Send ``delta`` to subscribers once the current transaction commits."""
+    if delta:
+        transaction.on_commit(lambda: broadcaster.publish({'delta': delta}), using=using)
+
+
+def request_resync(using=None):
+    """Have subscribers re-read the snapshot after a write that skipped signals."""
+    if broadcaster.has_subscribers():
+        transaction.on_commit(lambda: broadcaster.publish(RESYNC), using=using)
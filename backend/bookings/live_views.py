@@ -0,0 +1,100 @@
+"""
+Server-sent events stream of dashboard KPIs, for serving under ASGI.
+
+The stream opens with a ``snapshot`` event holding every KPI
+(``bookings.live.snapshot``) and then sends a ``delta`` event, to be added
+to the client's copy, after each committed booking, payment or vehicle
+change. A new ``snapshot`` replaces the client's copy whenever the server
+asks for a resync. Comment lines keep idle connections open.
+
+Deltas are queued from before the snapshot is read, so none is missed. A
+delta that arrives while the snapshot is read may already be counted in it,
+so the snapshot is read again until none arrives during the read, and the
+deltas queued before each read are dropped. After ``SNAPSHOT_ATTEMPTS``
+reads the deltas are kept, and under a constant stream of writes, or for a
+change committed just as the read finishes, a change can be counted twice
+until the next resync.
+
+Each stream ends after ``LIVE_DASHBOARD_MAX_SECONDS``, and ``EventSource``
+reconnects on its own and starts from a fresh snapshot. That also bounds how
+long a stream can outlive a client that went away, since Django 4.2 only
+notices the disconnect on the next write. Under a WSGI server a stream holds
+a worker thread for that whole time.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import live
+
+RECONNECT_MS = 3000
+SNAPSHOT_ATTEMPTS = 3
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+async def _snapshot(subscription):
+    """A snapshot read while no delta arrived, so none still queued is counted in it."""
+    for _ in range(SNAPSHOT_ATTEMPTS):
+        # Queued before the read started: already in the snapshot
+        subscription.clear()
+        snapshot = await sync_to_async(live.snapshot)()
+        if not subscription.pending():
+            break
+    return snapshot
+
+
+def _authenticate(request):
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    return drf_request.user
+
+
+async def _stream():
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'LIVE_DASHBOARD_MAX_SECONDS', 300)
+    keepalive = getattr(settings, 'LIVE_DASHBOARD_KEEPALIVE_SECONDS', 15)
+    subscription = live.broadcaster.subscribe()
+    try:
+        yield f'retry: {RECONNECT_MS}\n\n'
+        # Subscribed first, so changes committed while this runs are queued
+        yield _event('snapshot', await _snapshot(subscription))
+        while (remaining := deadline - loop.time()) > 0:
+            message = await subscription.get(min(keepalive, remaining))
+            if message is None:
+                yield ': keepalive\n\n'
+            elif 'delta' in message:
+                yield _event('delta', message['delta'])
+            else:
+                yield _event('snapshot', await _snapshot(subscription))
+    finally:
+        live.broadcaster.unsubscribe(subscription)
+
+
+async def live_dashboard(request):
+    """Admin KPI stream: ``text/event-stream`` of ``snapshot`` and ``delta`` events."""
+    try:
+        user = await sync_to_async(_authenticate)(request)
+    except exceptions.APIException as exc:
+        # An invalid, expired or revoked token
+        return JsonResponse({'detail': str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+    if not user.is_staff:
+        return JsonResponse({'detail': 'You do not have permission to perform this action.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+    response = StreamingHttpResponse(_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
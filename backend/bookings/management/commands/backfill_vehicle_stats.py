@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from bookings.stats import refresh_in_parallel, refresh_vehicle_stats
+from vehicles.models import Vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild VehicleStats from the bookings table. Vehicles are split into '
+        'id chunks that worker threads aggregate and upsert in parallel.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Threads, each with its own connection (default 4)')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Vehicles per grouped query and upsert (default 500)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        started = time.perf_counter()
+        written = refresh_in_parallel(
+            refresh_vehicle_stats,
+            Vehicle.objects.using(using).order_by('id').values_list('id', flat=True),
+            workers=options['workers'], chunk_size=options['chunk_size'], using=using,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed stats for {written} vehicles in {time.perf_counter() - started:.1f}s'
+        ))
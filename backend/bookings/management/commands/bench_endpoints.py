@@ -0,0 +1,388 @@
+import json
+import logging
+import math
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment
+from django.urls import URLPattern, reverse
+from rest_framework.test import APIClient
+
+from rental_backend import parallel, sql_instrumentation
+
+# (URL module, prefix the project mounts it under)
+URL_MODULES = (
+    ('vehicles.urls', '/api/vehicles/'),
+    ('bookings.urls', '/api/bookings/'),
+    ('users.admin_urls', '/api/auth/'),
+)
+
+# Query strings for endpoints that need parameters to do real work
+QUERY_STRINGS = {
+    'vehicle-search': 'q=sedan&max_price=150',
+    'vehicle-nearby': 'lat=12.97&lng=77.59&radius_km=25',
+    'vehicle-facets': 'fuel_type=petrol',
+    'vehicle-availability': 'start_date={start}&end_date={end}',
+    'admin-bookings': 'status=confirmed',
+    'custom-report-builder': 'type=summary',
+    'admin-customer-profiles': 'ids={customers}',
+    'booking-quotes': 'start_date={start}&end_date={end}&vehicles={vehicles}',
+}
+
+# Admin-only endpoints whose path has no /admin/ segment
+ADMIN_ONLY = {'booking-changes'}
+
+# Write endpoints with a representative request. They run inside a transaction
+# that is rolled back, so every iteration sees the same data.
+WRITE_REQUESTS = {
+    'booking-create': lambda ctx: {
+        'vehicle': ctx['vehicle'].id,
+        'start_date': (date.today() + timedelta(days=400)).isoformat(),
+        'end_date': (date.today() + timedelta(days=403)).isoformat(),
+    },
+    'booking-cancel': lambda ctx: {},
+    'create-payment': lambda ctx: {'amount': str(ctx['booking'].total_amount), 'payment_method': 'credit_card'},
+}
+
+# Endpoints that are not one request and response
+UNTIMED = {'admin-live-dashboard': 'server-sent event stream'}
+
+FUEL_TYPES = ['petrol', 'diesel', 'electric', 'hybrid', 'cng']
+BOOKING_STATUSES = ['pending', 'confirmed', 'active', 'completed', 'cancelled']
+BOOKING_STATUS_WEIGHTS = [5, 15, 5, 60, 15]
+PAYMENT_STATUSES = ['pending', 'paid', 'failed', 'refunded']
+PAYMENT_STATUS_WEIGHTS = [15, 75, 5, 5]
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and record p50/p95/p99 latency and query '
+        'counts for every vehicle, booking and customer-admin endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicles', type=int, default=1000)
+        parser.add_argument('--bookings', type=int, default=50000)
+        parser.add_argument('--customers', type=int, help='Default: one per 25 bookings.')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', nargs='+', metavar='URL_NAME', help='Benchmark these URL names only.')
+        parser.add_argument('--output', help='Write results as JSON to this file.')
+        parser.add_argument('--baseline', help='Fail when results regress past this JSON file.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed p95 slowdown over the baseline, as a fraction (default 0.25).',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=2.0,
+            help='Ignore p95 slowdowns smaller than this (default 2ms).',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the seeded database for the next run; it is reused when the sizes match.',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        setup_test_environment()
+        # Statuses are in the results; keep 4xx/5xx tracebacks out of the output
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        test_settings = connection.settings_dict['TEST']
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # The default in-memory test database cannot be kept between runs.
+            test_settings['NAME'] = str(Path(settings.BASE_DIR) / 'bench_endpoints.sqlite3')
+        # Keep the bench's catalog snapshot away from the development one.
+        settings.CATALOG_SNAPSHOT_PATH = str(Path(tempfile.gettempdir()) / 'bench_endpoints.snapshot')
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'], serialize=False,
+        )
+        try:
+            sizes = self.seed(options)
+            results = self.run_endpoints(options)
+        finally:
+            # Dashboard worker threads hold their own connections to the test database
+            parallel.shutdown()
+            if not options['keepdb']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                **sizes,
+            },
+            'endpoints': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline is not None:
+            self.compare(report, baseline, options['tolerance'], options['min_delta_ms'])
+
+    # ==================== SEEDING ====================
+
+    def seed(self, options):
+        from bookings.models import Booking
+        from users.models import User
+        from vehicles.models import Vehicle
+
+        vehicles = options['vehicles']
+        bookings = options['bookings']
+        customers = options['customers'] or max(10, bookings // 25)
+        sizes = {'vehicles': vehicles, 'bookings': bookings, 'customers': customers}
+
+        if (Vehicle.objects.count(), Booking.objects.count(),
+                User.objects.filter(role='customer').count()) == (vehicles, bookings, customers):
+            self.stdout.write('Reusing the seeded database')
+            return sizes
+        if Vehicle.objects.exists():
+            raise CommandError('The kept database was seeded with other sizes; rerun without --keepdb.')
+
+        started = time.perf_counter()
+        rng = random.Random(42)
+        synchronous = None
+        if connection.vendor == 'sqlite':
+            # Throwaway database: skip the fsyncs while loading it
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous')
+                synchronous = cursor.fetchone()[0]
+                cursor.execute('PRAGMA synchronous = OFF')
+        with transaction.atomic():
+            self.seed_catalog(rng, vehicles)
+            self.seed_customers(customers)
+            self.seed_bookings(rng, bookings)
+        if synchronous is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+
+        from bookings import pricing
+        from bookings.segments import segment_customers
+        from bookings.stats import refresh_customer_stats, refresh_vehicle_stats
+        from bookings.vehicle_status import reconcile
+        from users import cohorts
+        from vehicles import search
+        # bulk_create skips the signals that maintain these
+        refresh_vehicle_stats(Vehicle.objects.values_list('id', flat=True))
+        refresh_customer_stats(User.objects.values_list('id', flat=True))
+        segment_customers()
+        reconcile()
+        cohorts.invalidate()
+        pricing.invalidate()
+        if search.search_backend() is not None:
+            search.rebuild_index()
+        self.stdout.write(
+            f'Seeded {vehicles} vehicles, {customers} customers and {bookings} bookings '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+        return sizes
+
+    def seed_catalog(self, rng, count):
+        from vehicles.geo import encode_geohash
+        from vehicles.models import Vehicle, VehicleBrand, VehicleCategory
+
+        brands = VehicleBrand.objects.bulk_create([VehicleBrand(name=f'Brand {i}') for i in range(40)])
+        categories = VehicleCategory.objects.bulk_create(
+            [VehicleCategory(name=name) for name in ('Sedan', 'SUV', 'Hatchback', 'Bike', 'Van', 'Luxury')]
+        )
+        cities = [('Bengaluru', 12.97, 77.59), ('Mumbai', 19.08, 72.88), ('Delhi', 28.61, 77.21),
+                  ('Chennai', 13.08, 80.27), ('Pune', 18.52, 73.86)]
+        vehicles = []
+        for i in range(count):
+            city, lat, lng = rng.choice(cities)
+            latitude = Decimal(f'{lat + rng.uniform(-0.2, 0.2):.6f}')
+            longitude = Decimal(f'{lng + rng.uniform(-0.2, 0.2):.6f}')
+            category = rng.choice(categories)
+            vehicles.append(Vehicle(
+                name=f'{category.name} {i}', brand=rng.choice(brands), category=category,
+                model_year=rng.randint(2012, 2024), fuel_type=rng.choice(FUEL_TYPES),
+                transmission=rng.choice(['manual', 'automatic']), seating_capacity=rng.randint(2, 8),
+                daily_rate=Decimal(rng.randint(20, 300)), location=city,
+                latitude=latitude, longitude=longitude,
+                # bulk_create skips Vehicle.save(), which normally fills this in
+                geohash=encode_geohash(float(latitude), float(longitude)),
+                status=rng.choices(['available', 'rented', 'maintenance'], [80, 15, 5])[0],
+                registration_number=f'BENCH{i:07d}',
+            ))
+        Vehicle.objects.bulk_create(vehicles, batch_size=BATCH_SIZE)
+
+    def seed_customers(self, count):
+        from users.models import User
+
+        password = make_password('bench-password')
+        User.objects.bulk_create([
+            User(username='bench-admin', email='bench-admin@example.com', password=password,
+                 role='admin', is_staff=True),
+        ] + [
+            User(username=f'customer{i}', email=f'customer{i}@example.com', password=password)
+            for i in range(count)
+        ], batch_size=BATCH_SIZE)
+
+    def seed_bookings(self, rng, count):
+        from bookings.models import Booking
+        from users.models import User
+        from vehicles.models import Vehicle
+
+        vehicles = list(Vehicle.objects.values_list('id', 'daily_rate'))
+        customers = list(User.objects.filter(role='customer').values_list('id', flat=True))
+        today = date.today()
+        for offset in range(0, count, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, count - offset)):
+                vehicle_id, daily_rate = rng.choice(vehicles)
+                start_date = today + timedelta(days=rng.randint(-730, 90))
+                total_days = rng.randint(1, 14)
+                subtotal = daily_rate * total_days
+                tax_amount = subtotal * Decimal('0.10')
+                batch.append(Booking(
+                    user_id=rng.choice(customers), vehicle_id=vehicle_id,
+                    start_date=start_date, end_date=start_date + timedelta(days=total_days - 1),
+                    daily_rate=daily_rate, total_days=total_days, subtotal=subtotal,
+                    tax_amount=tax_amount, total_amount=subtotal + tax_amount,
+                    status=rng.choices(BOOKING_STATUSES, BOOKING_STATUS_WEIGHTS)[0],
+                    payment_status=rng.choices(PAYMENT_STATUSES, PAYMENT_STATUS_WEIGHTS)[0],
+                ))
+            Booking.objects.bulk_create(batch)
+
+    # ==================== MEASUREMENT ====================
+
+    def run_endpoints(self, options):
+        from bookings.models import Booking
+        from users.models import User
+        from vehicles.models import Vehicle, VehicleBrand, VehicleCategory
+
+        admin = User.objects.get(username='bench-admin')
+        customer = User.objects.filter(role='customer').order_by('id').first()
+        customer_ids = ','.join(
+            str(pk) for pk in User.objects.filter(role='customer').order_by('id').values_list('id', flat=True)[:20]
+        )
+        vehicle_ids = ','.join(str(pk) for pk in Vehicle.objects.order_by('id').values_list('id', flat=True)[:200])
+        # A booking the customer can still cancel and pay for
+        booking = Booking.objects.filter(user=customer).order_by('-start_date').first()
+        Booking.objects.filter(pk=booking.pk).update(
+            status='confirmed', payment_status='pending',
+            start_date=date.today() + timedelta(days=30), end_date=date.today() + timedelta(days=33),
+        )
+        booking.refresh_from_db()
+        context = {
+            'vehicle': Vehicle.objects.order_by('id').first(),
+            'booking': booking,
+            'customer': customer,
+        }
+        path_objects = {
+            'admin-vehicle-category-detail': VehicleCategory.objects.order_by('id').first(),
+            'admin-vehicle-brand-detail': VehicleBrand.objects.order_by('id').first(),
+        }
+
+        results = {}
+        for module, prefix in URL_MODULES:
+            for pattern in __import__(module, fromlist=['urlpatterns']).urlpatterns:
+                if not isinstance(pattern, URLPattern) or not pattern.name:
+                    continue
+                name = pattern.name
+                if options['only'] and name not in options['only']:
+                    continue
+                kwargs = {}
+                for param in pattern.pattern.converters:
+                    target = path_objects.get(name)
+                    if target is None:
+                        target = {'vehicles.urls': context['vehicle'], 'bookings.urls': booking,
+                                  'users.admin_urls': customer}[module]
+                    kwargs[param] = target.pk
+                path = reverse(name, kwargs=kwargs)
+                query = QUERY_STRINGS.get(name, '').format(
+                    start=date.today() + timedelta(days=10), end=date.today() + timedelta(days=13),
+                    customers=customer_ids, vehicles=vehicle_ids,
+                )
+                user = admin if '/admin/' in path or name in ADMIN_ONLY else customer
+                if name in UNTIMED:
+                    results[name] = {'path': path, 'skipped': UNTIMED[name]}
+                else:
+                    results[name] = self.measure(name, f'{path}?{query}' if query else path, user, context, options)
+                self.report_line(name, results[name])
+        return results
+
+    def measure(self, name, url, user, context, options):
+        # Endpoints that raise are recorded with their 500 status
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(user)
+        write = WRITE_REQUESTS.get(name)
+
+        def request():
+            if write is None:
+                return client.get(url)
+            with transaction.atomic():
+                response = client.post(url, write(context), format='json')
+                transaction.set_rollback(True)
+            return response
+
+        response = request()
+        if write is None and response.status_code == 405:
+            return {'path': url, 'skipped': 'write-only endpoint without a benchmark request'}
+        for _ in range(options['warmup']):
+            request()
+
+        latencies = []
+        queries = []
+        for _ in range(options['iterations']):
+            with sql_instrumentation.recording() as recorder:
+                started = time.perf_counter()
+                response = request()
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(recorder.count)
+        latencies.sort()
+        return {
+            'path': url,
+            'method': 'GET' if write is None else 'POST',
+            'status': response.status_code,
+            'p50_ms': round(_percentile(latencies, 50), 3),
+            'p95_ms': round(_percentile(latencies, 95), 3),
+            'p99_ms': round(_percentile(latencies, 99), 3),
+            'queries': max(queries),
+        }
+
+    def report_line(self, name, result):
+        if 'skipped' in result:
+            self.stdout.write(f'{name:<36} skipped ({result["skipped"]})')
+            return
+        self.stdout.write(
+            f"{name:<36} {result['status']:>4} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+            f"p99 {result['p99_ms']:>9.2f}ms  {result['queries']:>5} queries"
+        )
+
+    def compare(self, report, baseline, tolerance, min_delta_ms):
+        regressions = []
+        for name, previous in baseline.get('endpoints', {}).items():
+            current = report['endpoints'].get(name)
+            if current is None or 'skipped' in current or 'skipped' in previous:
+                continue
+            if current['status'] != previous['status']:
+                regressions.append(f"{name}: status {current['status']}, baseline {previous['status']}")
+            allowed = previous['p95_ms'] * (1 + tolerance)
+            if current['p95_ms'] > allowed and current['p95_ms'] - previous['p95_ms'] > min_delta_ms:
+                regressions.append(f"{name}: p95 {current['p95_ms']:.2f}ms, baseline {previous['p95_ms']:.2f}ms")
+            if current['queries'] > previous['queries']:
+                regressions.append(f"{name}: {current['queries']} queries, baseline {previous['queries']}")
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of sorted ``values``."""
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
@@ -0,0 +1,394 @@
+"""
+Generate a synthetic fleet for load testing.
+
+Everything is drawn from one seeded NumPy generator, so the same ``--seed``
+and sizes produce the same rows. Columns are generated as arrays a chunk at a
+time and written with ``bulk_create``; only the model instances are built in
+Python. Bookings follow a yearly season with a summer peak and busier
+weekends, exponential lead times, a long-tailed popularity for vehicles and
+customers, and a status mix that depends on whether the rental is past,
+running or upcoming. Paid, failed and refunded bookings get a ``Payment``.
+
+Bookings for the same vehicle may overlap: the data exercises queries at
+volume, it does not model availability.
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bookings import pricing
+from bookings.models import Booking, Payment
+from bookings.segments import segment_customers
+from bookings.stats import refresh_customer_stats, refresh_in_parallel, refresh_vehicle_stats
+from bookings.vehicle_status import reconcile
+from users import cohorts
+from users.models import User
+from vehicles import catalog, search
+from vehicles.geo import encode_geohash
+from vehicles.models import Vehicle, VehicleBrand, VehicleCategory
+
+CATEGORIES = [
+    # name, icon, base daily rate
+    ('Sedan', 'car', 45), ('SUV', 'truck', 70), ('Hatchback', 'car', 32), ('Luxury', 'crown', 140),
+    ('Electric', 'battery', 80), ('Van', 'truck', 65), ('Convertible', 'car', 110), ('Bike', 'bike', 18),
+]
+BRANDS = [
+    'Toyota', 'Honda', 'BMW', 'Mercedes-Benz', 'Audi', 'Ford', 'Nissan', 'Hyundai', 'Tesla',
+    'Volkswagen', 'Kia', 'Mazda', 'Skoda', 'Renault', 'Volvo', 'Jeep', 'Tata', 'Mahindra',
+]
+CITIES = [
+    ('Downtown Office', 12.9716, 77.5946), ('Airport Terminal', 13.1986, 77.7066),
+    ('City Center', 19.0760, 72.8777), ('Business District', 28.6139, 77.2090),
+    ('Eco Station', 13.0827, 80.2707), ('Family Center', 18.5204, 73.8567),
+    ('Luxury Hub', 17.3850, 78.4867), ('Premium Plaza', 22.5726, 88.3639),
+]
+FEATURES = ['Air Conditioning', 'Bluetooth', 'Backup Camera', 'Cruise Control', 'Navigation',
+            'Sunroof', 'Heated Seats', 'Apple CarPlay', 'Lane Assist', 'USB Ports']
+
+FUEL_TYPES = (['petrol', 'diesel', 'electric', 'hybrid', 'cng'], [0.50, 0.22, 0.12, 0.12, 0.04])
+TRANSMISSIONS = (['automatic', 'manual'], [0.65, 0.35])
+VEHICLE_STATUSES = (['available', 'rented', 'maintenance', 'unavailable'], [0.78, 0.14, 0.05, 0.03])
+PAYMENT_METHODS = (['credit_card', 'debit_card', 'upi', 'net_banking', 'wallet', 'cash'],
+                   [0.40, 0.20, 0.20, 0.08, 0.07, 0.05])
+
+# Status mixes by where the rental sits relative to today
+PAST_STATUSES = (['completed', 'cancelled'], [0.86, 0.14])
+CURRENT_STATUSES = (['active', 'cancelled'], [0.92, 0.08])
+UPCOMING_STATUSES = (['confirmed', 'pending', 'cancelled'], [0.70, 0.18, 0.12])
+# Payment status mixes by booking status
+PAYMENT_MIXES = {
+    'completed': (['paid', 'refunded'], [0.97, 0.03]),
+    'active': (['paid'], [1.0]),
+    'confirmed': (['paid', 'pending'], [0.85, 0.15]),
+    'pending': (['pending', 'failed'], [0.85, 0.15]),
+    'cancelled': (['refunded', 'pending', 'failed'], [0.55, 0.35, 0.10]),
+}
+
+MEAN_LEAD_DAYS = 12
+MAX_LEAD_DAYS = 180
+MEAN_RENTAL_DAYS = 4
+MAX_RENTAL_DAYS = 30
+TAX_RATE = 0.10
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` write the ``auto_now``/``auto_now_add`` values it is given."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _choice(rng, options, size):
+    values, weights = options
+    return np.asarray(values)[rng.choice(len(values), size=size, p=weights)]
+
+
+def _popularity(rng, count, exponent):
+    """Zipf-like weights in random order: a few rows get most of the bookings."""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def _money(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic fleet (categories, brands, vehicles, '
+        'customers, bookings and payments) for load testing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=len(CATEGORIES))
+        parser.add_argument('--brands', type=int, default=len(BRANDS))
+        parser.add_argument('--vehicles', type=int, default=1000)
+        parser.add_argument('--customers', type=int, default=20000)
+        parser.add_argument('--bookings', type=int, default=200000)
+        parser.add_argument('--history-days', type=int, default=730,
+                            help='How far back rentals start (default 730)')
+        parser.add_argument('--future-days', type=int, default=120,
+                            help='How far ahead rentals start (default 120)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--tag', help='Prefix for generated registration numbers and '
+                                          'customer emails (default gen<seed>)')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if min(options['categories'], options['brands'], options['vehicles'], options['customers']) < 1:
+            raise CommandError('--categories, --brands, --vehicles and --customers must be at least 1.')
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # Generated rows are linked through the ids bulk_create returns
+            raise CommandError('This database does not return ids from bulk inserts.')
+        self.rng = np.random.default_rng(options['seed'])
+        self.tag = (options['tag'] or f"gen{options['seed']}").upper()
+        self.batch_size = options['batch_size']
+        if Vehicle.objects.filter(registration_number__startswith=f'{self.tag}-').exists():
+            raise CommandError(f'Data tagged {self.tag} already exists; pass another --seed or --tag.')
+
+        started = time.perf_counter()
+        categories = self.generate_categories(options['categories'])
+        brands = self.generate_brands(options['brands'])
+        vehicles = self.generate_vehicles(options['vehicles'], categories, brands)
+        self.log(f'{len(vehicles)} vehicles', started)
+        customers = self.generate_customers(options['customers'], options['history_days'])
+        self.log(f'{len(customers)} customers', started)
+        bookings, payments = self.generate_bookings(
+            options['bookings'], vehicles, customers, options['history_days'], options['future_days'], started,
+        )
+        self.backdate_customers(customers)
+
+        # bulk_create skips the signals that keep these in step
+        refresh_in_parallel(refresh_vehicle_stats, [vehicle.id for vehicle in vehicles])
+        refresh_in_parallel(refresh_customer_stats, [customer.id for customer in customers], chunk_size=2000)
+        segment_customers()
+        reconcile()
+        if search.search_backend() is not None:
+            search.rebuild_index()
+        catalog.invalidate()
+        cohorts.invalidate()
+        pricing.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(vehicles)} vehicles, {len(customers)} customers, {bookings} bookings '
+            f'and {payments} payments in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def log(self, what, started):
+        self.stdout.write(f'  {what} ({time.perf_counter() - started:.1f}s)')
+
+    # ==================== CATALOG ====================
+
+    def _get_or_create_named(self, model, names, build):
+        existing = {obj.name: obj for obj in model.objects.filter(name__in=names)}
+        model.objects.bulk_create([build(name) for name in names if name not in existing])
+        existing.update({obj.name: obj for obj in model.objects.filter(name__in=names)})
+        return [existing[name] for name in names]
+
+    def generate_categories(self, count):
+        specs = [CATEGORIES[i] if i < len(CATEGORIES) else (f'Category {i + 1}', 'car', 30 + 10 * (i % 10))
+                 for i in range(count)]
+        icons = {name: icon for name, icon, _ in specs}
+        categories = self._get_or_create_named(
+            VehicleCategory, [name for name, _, _ in specs],
+            lambda name: VehicleCategory(name=name, icon=icons[name]),
+        )
+        return list(zip(categories, [rate for _, _, rate in specs]))
+
+    def generate_brands(self, count):
+        names = [BRANDS[i] if i < len(BRANDS) else f'Brand {i + 1}' for i in range(count)]
+        return self._get_or_create_named(VehicleBrand, names, lambda name: VehicleBrand(name=name))
+
+    def generate_vehicles(self, count, categories, brands):
+        rng = self.rng
+        category_index = rng.integers(len(categories), size=count)
+        brand_index = rng.integers(len(brands), size=count)
+        base_rates = np.array([rate for _, rate in categories])[category_index]
+        daily = np.round(base_rates * rng.lognormal(0, 0.25, size=count), 0).clip(10, 1000)
+        city_index = rng.integers(len(CITIES), size=count)
+        cities = np.array([(lat, lng) for _, lat, lng in CITIES])[city_index]
+        coordinates = np.round(cities + rng.normal(0, 0.06, size=(count, 2)), 6)
+        model_years = rng.integers(2015, 2025, size=count)
+        seats = rng.choice([2, 4, 5, 5, 5, 7, 8], size=count)
+        fuel_types = _choice(rng, FUEL_TYPES, count)
+        transmissions = _choice(rng, TRANSMISSIONS, count)
+        statuses = _choice(rng, VEHICLE_STATUSES, count)
+        feature_counts = rng.integers(2, 6, size=count)
+
+        vehicles = []
+        for i in range(count):
+            category, _ = categories[category_index[i]]
+            latitude, longitude = coordinates[i]
+            features = rng.choice(FEATURES, size=feature_counts[i], replace=False).tolist()
+            vehicles.append(Vehicle(
+                name=f'{category.name} {i + 1}', brand=brands[brand_index[i]], category=category,
+                model_year=int(model_years[i]), fuel_type=fuel_types[i], transmission=transmissions[i],
+                seating_capacity=int(seats[i]), daily_rate=Decimal(int(daily[i])),
+                weekly_rate=Decimal(int(daily[i] * 6)), monthly_rate=Decimal(int(daily[i] * 22)),
+                location=CITIES[city_index[i]][0],
+                latitude=Decimal(f'{latitude:.6f}'), longitude=Decimal(f'{longitude:.6f}'),
+                # bulk_create skips Vehicle.save(), which normally fills this in
+                geohash=encode_geohash(float(latitude), float(longitude)),
+                status=statuses[i], features=features,
+                registration_number=f'{self.tag}-{i + 1:08d}',
+            ))
+        return Vehicle.objects.bulk_create(vehicles, batch_size=self.batch_size)
+
+    # ==================== CUSTOMERS ====================
+
+    def generate_customers(self, count, history_days):
+        rng = self.rng
+        # One hash for everyone: hashing per user would dominate the run
+        password = make_password('password123')
+        now = timezone.now()
+        # Sign-ups grow over time: more recent dates are likelier
+        joined_days = (history_days * (1 - np.sqrt(rng.random(size=count)))).astype(int) + 30
+        joined_seconds = rng.integers(0, 86400, size=count)
+        tag = self.tag.lower()
+
+        created = []
+        with explicit_timestamps(User):
+            for offset in range(0, count, self.batch_size):
+                batch = []
+                for i in range(offset, min(offset + self.batch_size, count)):
+                    joined = now - timedelta(days=int(joined_days[i]), seconds=int(joined_seconds[i]))
+                    batch.append(User(
+                        username=f'{tag}-customer{i + 1}', email=f'{tag}-customer{i + 1}@example.com',
+                        password=password, first_name='Customer', last_name=str(i + 1),
+                        role='customer', date_joined=joined, created_at=joined, updated_at=joined,
+                    ))
+                created.extend(User.objects.bulk_create(batch))
+        return created
+
+    def backdate_customers(self, customers):
+        """Move sign-ups that came after a customer's first booking to shortly before it."""
+        midnight = timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min))
+        margins = self.rng.integers(3600, 30 * 86400, size=len(customers))
+        changed = []
+        for customer, first, margin in zip(customers, self.first_booking.tolist(), margins.tolist()):
+            if first == np.iinfo(np.int64).max:
+                continue
+            signup = midnight + timedelta(seconds=first - margin)
+            if customer.date_joined > signup:
+                customer.date_joined = customer.created_at = customer.updated_at = signup
+                changed.append(customer)
+        with explicit_timestamps(User):
+            User.objects.bulk_update(changed, ['date_joined', 'created_at', 'updated_at'],
+                                     batch_size=self.batch_size)
+
+    # ==================== BOOKINGS ====================
+
+    def _start_day_weights(self, today, history_days, future_days):
+        days = np.arange(-history_days, future_days + 1)
+        dates = np.datetime64(today) + days
+        day_of_year = (dates - dates.astype('datetime64[Y]')).astype(int)
+        # Peak around early July, trough around early January
+        season = 1 + 0.35 * np.cos(2 * np.pi * (day_of_year - 185) / 365.25)
+        weekday = (dates.astype('datetime64[D]').view('int64') - 4) % 7  # 0 = Monday
+        weekend = np.where(weekday >= 4, 1.3, 1.0)
+        # The business grows, and the future is only partly booked yet
+        growth = np.linspace(0.7, 1.0 + 0.3 * future_days / max(history_days, 1), len(days))
+        booked = np.where(days > 0, np.exp(-days / MEAN_LEAD_DAYS / 2), 1.0)
+        weights = season * weekend * growth * booked
+        return days, weights / weights.sum()
+
+    def generate_bookings(self, count, vehicles, customers, history_days, future_days, started):
+        rng = self.rng
+        today = timezone.localdate()
+        now = timezone.now()
+        days, day_weights = self._start_day_weights(today, history_days, future_days)
+        vehicle_weights = _popularity(rng, len(vehicles), 0.5)
+        customer_weights = _popularity(rng, len(customers), 0.6)
+        vehicle_ids = np.array([vehicle.id for vehicle in vehicles])
+        rate_cents = np.array([int(vehicle.daily_rate * 100) for vehicle in vehicles])
+        customer_ids = np.array([customer.id for customer in customers])
+        locations = [vehicle.location for vehicle in vehicles]
+
+        # Earliest booking per customer, in seconds relative to today's midnight
+        self.first_booking = np.full(len(customers), np.iinfo(np.int64).max)
+        payments = 0
+        with explicit_timestamps(Booking, Payment):
+            for offset in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - offset)
+                with transaction.atomic():
+                    payments += self._generate_booking_batch(
+                        size, today, now, days, day_weights, vehicle_weights, customer_weights,
+                        vehicle_ids, rate_cents, customer_ids, locations,
+                    )
+                done = offset + size
+                if done % (self.batch_size * 10) == 0 or done == count:
+                    self.log(f'{done} bookings', started)
+        return count, payments
+
+    def _generate_booking_batch(self, size, today, now, days, day_weights, vehicle_weights,
+                                customer_weights, vehicle_ids, rate_cents, customer_ids, locations):
+        rng = self.rng
+        vehicle_index = rng.choice(len(vehicle_ids), size=size, p=vehicle_weights)
+        customer_index = rng.choice(len(customer_ids), size=size, p=customer_weights)
+        start_offsets = rng.choice(days, size=size, p=day_weights)
+        total_days = np.minimum(rng.geometric(1 / MEAN_RENTAL_DAYS, size=size), MAX_RENTAL_DAYS)
+        end_offsets = start_offsets + total_days - 1
+        lead_days = np.minimum(rng.exponential(MEAN_LEAD_DAYS, size=size).astype(int), MAX_LEAD_DAYS)
+        # Seconds before the pickup day that the booking was made; never in the future
+        lead_seconds = lead_days * 86400 + rng.integers(0, 86400, size=size)
+        created_seconds = np.minimum(start_offsets * 86400 - lead_seconds, -rng.integers(60, 3600, size=size))
+        np.minimum.at(self.first_booking, customer_index, created_seconds)
+
+        statuses = np.empty(size, dtype=object)
+        past = end_offsets < 0
+        upcoming = start_offsets > 0
+        current = ~past & ~upcoming
+        for mask, mix in ((past, PAST_STATUSES), (current, CURRENT_STATUSES), (upcoming, UPCOMING_STATUSES)):
+            statuses[mask] = _choice(rng, mix, int(mask.sum()))
+        payment_statuses = np.empty(size, dtype=object)
+        for status, mix in PAYMENT_MIXES.items():
+            mask = statuses == status
+            payment_statuses[mask] = _choice(rng, mix, int(mask.sum()))
+        confirm_delay = rng.integers(60, 6 * 3600, size=size)
+        cancel_fraction = rng.random(size=size)
+        methods = _choice(rng, PAYMENT_METHODS, size)
+        pickup_hours = rng.integers(8, 19, size=size)
+
+        rates = rate_cents[vehicle_index]
+        subtotals = rates * total_days
+        taxes = np.round(subtotals * TAX_RATE).astype(np.int64)
+
+        midnight = timezone.make_aware(datetime.combine(today, dt_time.min))
+        bookings = []
+        for i in range(size):
+            start_date = today + timedelta(days=int(start_offsets[i]))
+            created_at = midnight + timedelta(seconds=int(created_seconds[i]))
+            status = statuses[i]
+            confirmed_at = cancelled_at = None
+            if status != 'pending':
+                confirmed_at = created_at + timedelta(seconds=int(confirm_delay[i]))
+            if status == 'cancelled':
+                # Somewhere between booking and pickup, and not after now
+                window = (min(midnight + timedelta(days=int(start_offsets[i])), now) - created_at)
+                cancelled_at = created_at + window * float(cancel_fraction[i])
+            location = locations[vehicle_index[i]]
+            bookings.append(Booking(
+                user_id=int(customer_ids[customer_index[i]]), vehicle_id=int(vehicle_ids[vehicle_index[i]]),
+                start_date=start_date, end_date=start_date + timedelta(days=int(total_days[i]) - 1),
+                pickup_time=dt_time(int(pickup_hours[i])), return_time=dt_time(int(pickup_hours[i])),
+                daily_rate=_money(rates[i]), total_days=int(total_days[i]),
+                subtotal=_money(subtotals[i]), tax_amount=_money(taxes[i]),
+                total_amount=_money(subtotals[i] + taxes[i]),
+                status=status, payment_status=payment_statuses[i],
+                pickup_location=location, return_location=location,
+                created_at=created_at, updated_at=cancelled_at or confirmed_at or created_at,
+                confirmed_at=confirmed_at, cancelled_at=cancelled_at,
+            ))
+        Booking.objects.bulk_create(bookings)
+
+        payments = [
+            Payment(
+                booking_id=booking.id, amount=booking.total_amount, payment_method=methods[i],
+                transaction_id=f'{self.tag}-TXN{booking.id}', payment_gateway='synthetic',
+                payment_status=booking.payment_status,
+                payment_date=booking.confirmed_at if booking.payment_status != 'failed' else None,
+                failure_reason='Card declined' if booking.payment_status == 'failed' else '',
+                created_at=booking.confirmed_at or booking.created_at,
+                updated_at=booking.updated_at,
+            )
+            for i, booking in enumerate(bookings) if booking.payment_status != 'pending'
+        ]
+        Payment.objects.bulk_create(payments)
+        return len(payments)
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from bookings.vehicle_status import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Set every vehicle to rented or available from the bookings that hold '
+        'it today, with one UPDATE. Vehicles in maintenance or marked '
+        'unavailable are left alone.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        changed = reconcile(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Changed the status of {changed} vehicles in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rental_backend.db_routers import REPLICA_ALIAS, replica_configured
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database to the reporting alias with the SQLite '
+        'backup API. Not needed when the reporting alias is a streaming replica.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running and refresh every N seconds.',
+        )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('REPORTING_DATABASE_URL is not set.')
+        # vendor also covers the SQLite production mode backend
+        if connections['default'].vendor != 'sqlite' or connections[REPLICA_ALIAS].vendor != 'sqlite':
+            raise CommandError('refresh_reporting_db copies SQLite to SQLite only.')
+        source = connections.databases['default']
+        target = connections.databases[REPLICA_ALIAS]
+
+        while True:
+            elapsed = self.refresh(str(source['NAME']), str(target['NAME']))
+            self.stdout.write(self.style.SUCCESS(f'Reporting copy refreshed in {elapsed:.2f}s'))
+            if options['interval'] <= 0:
+                return
+            time.sleep(options['interval'])
+
+    def refresh(self, source_path, target_path):
+        started = time.time()
+        directory = os.path.dirname(os.path.abspath(target_path))
+        fd, temp_path = tempfile.mkstemp(prefix='.reporting-', suffix='.sqlite3', dir=directory)
+        os.close(fd)
+        try:
+            source = sqlite3.connect(source_path)
+            copy = sqlite3.connect(temp_path)
+            try:
+                # One step: a consistent snapshot of the primary as of `started`
+                source.backup(copy)
+            finally:
+                copy.close()
+                source.close()
+            # The mtime tells the router which writes the copy is guaranteed to hold
+            os.utime(temp_path, (started, started))
+            os.replace(temp_path, target_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        connections[REPLICA_ALIAS].close()
+        return time.time() - started
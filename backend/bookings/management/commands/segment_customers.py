@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from bookings.segments import segment_customers
+
+
+class Command(BaseCommand):
+    help = (
+        'Score every customer on recency, frequency and monetary value from '
+        'CustomerStats and store their RFM segment. Run after '
+        'backfill_customer_stats, and then periodically (e.g. nightly).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Threads writing changed rows, each with its own connection (default 4)')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows per upsert (default 5000)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = segment_customers(
+            workers=options['workers'], chunk_size=options['chunk_size'], using=options['database'],
+        )
+        for name, count in result['segments'].items():
+            self.stdout.write(f'  {name:<20} {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Segmented {result['customers']} customers ({result['written']} changed) "
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
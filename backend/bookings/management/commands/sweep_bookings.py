@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from bookings.lifecycle import sweep
+
+
+class Command(BaseCommand):
+    help = (
+        'Move due bookings along: confirmed bookings whose start date has come '
+        'become active, and bookings whose end date has passed become '
+        'completed. Safe to run from cron every minute, or with --interval.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Bookings moved per transaction (default 5000)')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running, sweeping every N seconds')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            moved = sweep(batch_size=max(1, options['batch_size']), using=options['database'])
+            summary = ', '.join(f'{count} {name}' for name, count in moved.items())
+            self.stdout.write(self.style.SUCCESS(f'Swept bookings: {summary} in {time.perf_counter() - started:.1f}s'))
+            if options['interval'] <= 0:
+                return
+            time.sleep(max(0, options['interval'] - (time.perf_counter() - started)))
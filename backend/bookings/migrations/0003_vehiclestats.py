@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_vehicle_coordinates'),
+        ('bookings', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleStats',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='vehicles.vehicle')),
+                ('booking_count', models.PositiveIntegerField(db_index=True, default=0)),
+                ('paid_revenue', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=14)),
+                ('booked_days', models.PositiveIntegerField(default=0)),
+                ('cancellation_count', models.PositiveIntegerField(default=0)),
+                ('last_booked_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'vehicle stats',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('bookings', '0003_vehiclestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='customer_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('booking_count', models.PositiveIntegerField(db_index=True, default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('confirmed_count', models.PositiveIntegerField(default=0)),
+                ('active_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('paid_booking_count', models.PositiveIntegerField(default=0)),
+                ('total_spent', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=14)),
+                ('first_booking_at', models.DateTimeField(blank=True, null=True)),
+                ('last_booking_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'customer stats',
+            },
+        ),
+    ]
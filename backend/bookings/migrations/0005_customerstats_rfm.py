@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_customerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customerstats',
+            name='frequency_score',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customerstats',
+            name='monetary_score',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customerstats',
+            name='recency_score',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customerstats',
+            name='segment',
+            field=models.CharField(blank=True, db_index=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:42
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_vehicle_coordinates'),
+        ('bookings', '0007_booking_status_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('rate', models.DecimalField(decimal_places=4, help_text='Fraction of the subtotal, e.g. 0.1800 for 18%', max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)])),
+                ('location', models.CharField(blank=True, help_text='Vehicle location; leave empty for any', max_length=200)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, help_text='Leave empty to apply to every category', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tax_rules', to='vehicles.vehiclecategory')),
+            ],
+            options={
+                'ordering': ['category', 'location'],
+            },
+        ),
+    ]
@@ -1,12 +1,25 @@
-from django.db import models
-from django.core.validators import MinValueValidator
+from django.db import models, router, transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
 from users.models import User
-from vehicles.models import Vehicle
+from vehicles.models import Vehicle, VehicleCategory
 
 
-class Booking(models.Model):
+class AtomicSaveMixin:
+    """
+    Run ``save()`` and its post_save receivers in one transaction, so the
+    stats rows and change events (bookings.signals) commit with the write.
+    """
+    
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class Booking(AtomicSaveMixin, models.Model):
     """Vehicle booking model."""
     
     STATUS_CHOICES = [
@@ -59,18 +72,28 @@ class Booking(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Due-booking lookups of the lifecycle sweeper
+            models.Index(fields=['status', 'start_date']),
+            models.Index(fields=['status', 'end_date']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.vehicle.name} ({self.start_date} to {self.end_date})"
     
     def save(self, *args, **kwargs):
-        # Calculate total days and amount
+        from .pricing import quote_booking
+        
+        # Price new bookings and bookings whose length changed; other saves
+        # keep the quoted amounts when rates or tax rules change later
         if self.start_date and self.end_date and self.daily_rate:
-            self.total_days = (self.end_date - self.start_date).days + 1
-            self.subtotal = self.daily_rate * self.total_days
-            # Add 10% tax (can be made configurable)
-            self.tax_amount = self.subtotal * Decimal('0.10')
-            self.total_amount = self.subtotal + self.tax_amount
+            total_days = (self.end_date - self.start_date).days + 1
+            if self._state.adding or total_days != self.total_days:
+                quote = quote_booking(self)
+                self.total_days = quote['total_days']
+                self.subtotal = quote['subtotal']
+                self.tax_amount = quote['tax_amount']
+                self.total_amount = quote['total_amount']
         
         super().save(*args, **kwargs)
     
@@ -93,7 +116,7 @@ class Booking(models.Model):
                 (self.status in ['confirmed', 'active'] and self.end_date < today))
 
 
-class BookingStatusHistory(models.Model):
+class BookingStatusHistory(AtomicSaveMixin, models.Model):
     """Track booking status changes."""
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='status_history')
     old_status = models.CharField(max_length=20, blank=True)
@@ -106,7 +129,7 @@ class BookingStatusHistory(models.Model):
         return f"{self.booking} - {self.old_status} to {self.new_status}"
 
 
-class Payment(models.Model):
+class Payment(AtomicSaveMixin, models.Model):
     """Payment information for bookings."""
     
     PAYMENT_METHOD_CHOICES = [
@@ -131,3 +154,114 @@ class Payment(models.Model):
     
     def __str__(self):
         return f"Payment for {self.booking} - {self.amount}"
+
+
+class VehicleStats(models.Model):
+    """
+    Per-vehicle booking totals, kept in step with the bookings table by
+    ``bookings.stats`` so leaderboards read indexed columns instead of
+    aggregating every booking.
+    """
+    vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    booking_count = models.PositiveIntegerField(default=0, db_index=True)
+    paid_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_index=True)
+    booked_days = models.PositiveIntegerField(default=0)
+    cancellation_count = models.PositiveIntegerField(default=0)
+    last_booked_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'vehicle stats'
+    
+    def __str__(self):
+        return f"Stats for vehicle {self.vehicle_id}"
+
+
+class CustomerStats(models.Model):
+    """
+    Per-customer booking totals, kept in step with the bookings table by
+    ``bookings.stats``.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='customer_stats')
+    booking_count = models.PositiveIntegerField(default=0, db_index=True)
+    pending_count = models.PositiveIntegerField(default=0)
+    confirmed_count = models.PositiveIntegerField(default=0)
+    active_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    paid_booking_count = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_index=True)
+    first_booking_at = models.DateTimeField(null=True, blank=True)
+    last_booking_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # RFM scores (1-5, 0 when unscored) and segment, written by bookings.segments
+    recency_score = models.PositiveSmallIntegerField(default=0)
+    frequency_score = models.PositiveSmallIntegerField(default=0)
+    monetary_score = models.PositiveSmallIntegerField(default=0)
+    segment = models.CharField(max_length=20, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'customer stats'
+    
+    def __str__(self):
+        return f"Stats for user {self.user_id}"
+    
+    @property
+    def average_value(self):
+        """Average paid booking value."""
+        if not self.paid_booking_count:
+            return Decimal('0')
+        return self.total_spent / self.paid_booking_count
+
+
+class ChangeEvent(models.Model):
+    """
+    Append-only log of Booking, Payment and BookingStatusHistory writes,
+    recorded by ``bookings.changes`` in the same transaction as the write.
+    """
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+    
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Field values after the write (attnames), or null for a delete
+    data = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['model', 'object_id', 'seq'])]
+    
+    def __str__(self):
+        return f"#{self.seq} {self.model} {self.object_id} {self.action}"
+
+
+class TaxRule(models.Model):
+    """
+    Tax rate on rentals. The most specific active rule for a vehicle's
+    category and location applies (``bookings.pricing``).
+    """
+    name = models.CharField(max_length=100)
+    rate = models.DecimalField(
+        max_digits=5, decimal_places=4,
+        validators=[MinValueValidator(0), MaxValueValidator(1)],
+        help_text="Fraction of the subtotal, e.g. 0.1800 for 18%"
+    )
+    category = models.ForeignKey(
+        VehicleCategory, on_delete=models.CASCADE, null=True, blank=True, related_name='tax_rules',
+        help_text="Leave empty to apply to every category"
+    )
+    location = models.CharField(max_length=200, blank=True, help_text="Vehicle location; leave empty for any")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['category', 'location']
+    
+    def __str__(self):
+        return f"{self.name} ({self.rate * 100:.2f}%)"
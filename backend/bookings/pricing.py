@@ -0,0 +1,189 @@
+"""
+Rental quotes.
+
+A rental of ``days`` days (start and end date included) costs the cheapest
+of the vehicle's rate tiers: ``monthly_rate`` per 30 days, ``weekly_rate``
+per 7 days of what is left, and ``daily_rate`` for the remaining days, where
+a partial week or month never costs more than the full one. Vehicles without
+a weekly or monthly rate are priced per day.
+
+Tax comes from ``TaxRule`` rows; the most specific active rule wins:
+
+    category and location  >  category  >  location  >  neither
+
+and ``DEFAULT_TAX_RATE`` applies when no rule matches. Amounts are rounded
+to the cent.
+
+The rates of every vehicle and the tax rules are read into two tables kept
+in the Django cache under a version number, so quoting hundreds of vehicles
+takes a few cache reads and no SQL. Vehicle and tax rule writes bump the
+version (``bookings.signals``); ``QUOTE_RATES_CACHE_TTL`` bounds staleness
+after writes that skip signals. Without a shared cache the bump only reaches
+the writing process, so the version and tables expire within
+``LOCAL_CACHE_MAX_TTL`` (``rental_backend.caching``), and a version that
+expires starts from a new number rather than one an old table used.
+
+Pricing a booking reads the tax rules from the database, so amounts that are
+stored never come from a stale table.
+"""
+import time
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from rental_backend import caching
+
+CACHE_PREFIX = 'quote-rates:'
+VERSION_KEY = CACHE_PREFIX + 'version'
+
+DAYS_PER_WEEK = 7
+DAYS_PER_MONTH = 30
+CENT = Decimal('0.01')
+
+
+def version():
+    """Current version of the rate tables; changes with every vehicle or tax rule write."""
+    return cache.get_or_set(VERSION_KEY, time.time_ns, caching.ttl(None))
+
+
+def invalidate():
+    """Drop the cached rate and tax tables."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), caching.ttl(None))
+
+
+def _cached_table(name, build):
+    key = f'{CACHE_PREFIX}v{version()}:{name}'
+    table = cache.get(key)
+    if table is None:
+        table = build()
+        cache.set(key, table, caching.ttl(getattr(settings, 'QUOTE_RATES_CACHE_TTL', 3600)))
+    return table
+
+
+def _build_rates():
+    from vehicles.models import Vehicle
+
+    return {
+        row[0]: row[1:]
+        for row in Vehicle.objects.values_list(
+            'id', 'daily_rate', 'weekly_rate', 'monthly_rate', 'category_id', 'location',
+        ).iterator()
+    }
+
+
+def _build_taxes(*filters):
+    from .models import TaxRule
+
+    # Ordered by last change, so the newest of two duplicate rules wins
+    return {
+        (category_id, location): rate
+        for category_id, location, rate in TaxRule.objects.filter(*filters, is_active=True)
+        .order_by('updated_at', 'id').values_list('category_id', 'location', 'rate')
+    }
+
+
+def vehicle_rates():
+    """``{vehicle_id: (daily, weekly, monthly, category_id, location)}``."""
+    return _cached_table('vehicles', _build_rates)
+
+
+def tax_rates():
+    """``{(category_id or None, location or ''): rate}`` of the active rules."""
+    return _cached_table('taxes', _build_taxes)
+
+
+def _tax_rate(taxes, category_id, location):
+    for key in ((category_id, location), (category_id, ''), (None, location), (None, '')):
+        if key in taxes:
+            return taxes[key]
+    return getattr(settings, 'DEFAULT_TAX_RATE', Decimal('0.10'))
+
+
+def tax_rate(category_id, location):
+    """Tax rate from the rules in the database, bypassing the cached table."""
+    taxes = _build_taxes(
+        Q(category_id=category_id) | Q(category__isnull=True), Q(location=location) | Q(location=''),
+    )
+    return _tax_rate(taxes, category_id, location)
+
+
+def parse_period(params):
+    """
+    ``(start_date, end_date)`` from ``start_date``/``end_date`` query
+    parameters, or None when neither is given. Raises ValueError.
+    """
+    start_date, end_date = params.get('start_date'), params.get('end_date')
+    if not start_date and not end_date:
+        return None
+    if not start_date or not end_date:
+        raise ValueError('start_date and end_date are required')
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    if start_date >= end_date:
+        raise ValueError('Start date must be before end date')
+    return start_date, end_date
+
+
+def rental_days(start_date, end_date):
+    return (end_date - start_date).days + 1
+
+
+def subtotal(days, daily_rate, weekly_rate=None, monthly_rate=None):
+    """Cheapest price for ``days`` days under the given rate tiers."""
+    price = days * daily_rate
+    if weekly_rate:
+        weeks, rest = divmod(days, DAYS_PER_WEEK)
+        price = min(price, weeks * weekly_rate + min(rest * daily_rate, weekly_rate))
+    if monthly_rate:
+        months, rest = divmod(days, DAYS_PER_MONTH)
+        price = min(price, months * monthly_rate + min(subtotal(rest, daily_rate, weekly_rate), monthly_rate))
+    return price
+
+
+def quote(days, daily_rate, weekly_rate=None, monthly_rate=None, rate=Decimal('0')):
+    amount = subtotal(days, daily_rate, weekly_rate, monthly_rate).quantize(CENT, ROUND_HALF_UP)
+    tax = (amount * rate).quantize(CENT, ROUND_HALF_UP)
+    return {
+        'total_days': days,
+        'subtotal': amount,
+        'tax_rate': rate,
+        'tax_amount': tax,
+        'total_amount': amount + tax,
+    }
+
+
+def quote_booking(booking):
+    """Quote for a booking's dates at its own daily rate and its vehicle's tiers."""
+    vehicle = booking.vehicle
+    return quote(
+        rental_days(booking.start_date, booking.end_date), booking.daily_rate,
+        vehicle.weekly_rate, vehicle.monthly_rate, tax_rate(vehicle.category_id, vehicle.location),
+    )
+
+
+def quote_vehicles(vehicle_ids, start_date, end_date):
+    """``{vehicle_id: quote}`` for the dates; unknown ids are left out."""
+    days = rental_days(start_date, end_date)
+    rates = vehicle_rates()
+    taxes = tax_rates()
+    quotes = {}
+    for vehicle_id in vehicle_ids:
+        if vehicle_id not in rates:
+            continue
+        daily, weekly, monthly, category_id, location = rates[vehicle_id]
+        quotes[vehicle_id] = quote(days, daily, weekly, monthly, _tax_rate(taxes, category_id, location))
+    return quotes
+
+
+def as_json(quote):
+    """Quote with amounts as strings, the way the serializers render decimals."""
+    return {name: str(value) if isinstance(value, Decimal) else value for name, value in quote.items()}
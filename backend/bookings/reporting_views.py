@@ -5,61 +5,120 @@ from rest_framework.permissions import IsAdminUser
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta
+from functools import partial
 from .models import Booking, Payment
+from .stats import leaderboard
 from vehicles.models import Vehicle, VehicleCategory, VehicleBrand
 from users.models import User
+from rental_backend.db_routers import use_replica
+from rental_backend.parallel import run_sections
 
 
 # ==================== COMPREHENSIVE REPORTING SYSTEM ====================
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def business_intelligence_dashboard(request):
     """Comprehensive business intelligence dashboard with all key metrics."""
     # Date range filters
     days = int(request.GET.get('days', 30))
     start_date = datetime.now() - timedelta(days=days)
     
-    # ========== BOOKING METRICS ==========
-    total_bookings = Booking.objects.count()
-    period_bookings = Booking.objects.filter(created_at__gte=start_date).count()
-    
-    booking_status_distribution = Booking.objects.values('status').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # ========== REVENUE METRICS ==========
-    total_revenue = Booking.objects.filter(payment_status='paid').aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
-    
-    period_revenue = Booking.objects.filter(
-        payment_status='paid',
-        created_at__gte=start_date
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # ========== CUSTOMER METRICS ==========
-    total_customers = User.objects.filter(role='customer').count()
-    active_customers = User.objects.filter(
-        role='customer',
-        bookings__created_at__gte=start_date
-    ).distinct().count()
+    # Independent sections, evaluated concurrently
+    sections, meta = run_sections({
+        'bookings': partial(_bi_booking_metrics, start_date),
+        'revenue': partial(_bi_revenue_metrics, start_date),
+        'customers': partial(_bi_customer_metrics, start_date),
+        'vehicles': _bi_vehicle_metrics,
+        'daily_trends': partial(_bi_daily_trends, days),
+        'top_vehicles_by_bookings': _bi_top_vehicles_by_bookings,
+        'top_vehicles_by_revenue': _bi_top_vehicles_by_revenue,
+        'top_customers': _bi_top_customers,
+        'category_performance': _bi_category_performance,
+        'brand_performance': _bi_brand_performance,
+    })
+    bookings = sections['bookings']
+    revenue = sections['revenue']
+    customers = sections['customers']
+    vehicles = sections['vehicles']
     
-    # ========== VEHICLE METRICS ==========
-    total_vehicles = Vehicle.objects.count()
-    available_vehicles = Vehicle.objects.filter(status='available').count()
+    total_vehicles = vehicles['total_vehicles']
+    available_vehicles = vehicles['available_vehicles']
     utilization_rate = ((total_vehicles - available_vehicles) / total_vehicles * 100) if total_vehicles > 0 else 0
     
-    # ========== PERFORMANCE METRICS ==========
-    avg_booking_value = Booking.objects.filter(
-        payment_status='paid'
-    ).aggregate(avg=Avg('total_amount'))['avg'] or 0
-    
-    avg_booking_duration = Booking.objects.aggregate(
-        avg=Avg('total_days')
-    )['avg'] or 0
-    
-    # ========== TRENDS ==========
+    return Response({
+        'overview': {
+            'total_bookings': bookings['total_bookings'],
+            'period_bookings': bookings['period_bookings'],
+            'total_revenue': float(revenue['total_revenue']),
+            'period_revenue': float(revenue['period_revenue']),
+            'total_customers': customers['total_customers'],
+            'active_customers': customers['active_customers'],
+            'total_vehicles': total_vehicles,
+            'available_vehicles': available_vehicles,
+            'utilization_rate': float(utilization_rate),
+            'avg_booking_value': float(revenue['avg_booking_value']),
+            'avg_booking_duration': float(bookings['avg_booking_duration'])
+        },
+        'booking_status_distribution': bookings['status_distribution'],
+        'daily_trends': sections['daily_trends'],
+        'top_vehicles_by_bookings': sections['top_vehicles_by_bookings'],
+        'top_vehicles_by_revenue': sections['top_vehicles_by_revenue'],
+        'top_customers': sections['top_customers'],
+        'category_performance': sections['category_performance'],
+        'brand_performance': sections['brand_performance'],
+        'meta': meta
+    })
+
+
+# ========== BOOKING METRICS ==========
+def _bi_booking_metrics(start_date):
+    return {
+        'total_bookings': Booking.objects.count(),
+        'period_bookings': Booking.objects.filter(created_at__gte=start_date).count(),
+        'status_distribution': list(Booking.objects.values('status').annotate(
+            count=Count('id')
+        ).order_by('-count')),
+        'avg_booking_duration': Booking.objects.aggregate(
+            avg=Avg('total_days')
+        )['avg'] or 0,
+    }
+
+
+# ========== REVENUE METRICS ==========
+def _bi_revenue_metrics(start_date):
+    paid = Booking.objects.filter(payment_status='paid')
+    return {
+        'total_revenue': paid.aggregate(total=Sum('total_amount'))['total'] or 0,
+        'period_revenue': paid.filter(
+            created_at__gte=start_date
+        ).aggregate(total=Sum('total_amount'))['total'] or 0,
+        'avg_booking_value': paid.aggregate(avg=Avg('total_amount'))['avg'] or 0,
+    }
+
+
+# ========== CUSTOMER METRICS ==========
+def _bi_customer_metrics(start_date):
+    return {
+        'total_customers': User.objects.filter(role='customer').count(),
+        'active_customers': User.objects.filter(
+            role='customer',
+            bookings__created_at__gte=start_date
+        ).distinct().count(),
+    }
+
+
+# ========== VEHICLE METRICS ==========
+def _bi_vehicle_metrics():
+    return {
+        'total_vehicles': Vehicle.objects.count(),
+        'available_vehicles': Vehicle.objects.filter(status='available').count(),
+    }
+
+
+# ========== TRENDS ==========
+def _bi_daily_trends(days):
     # Daily booking trends
     daily_trends = []
     for i in range(days):
@@ -76,105 +135,90 @@ def business_intelligence_dashboard(request):
             'revenue': float(revenue)
         })
     daily_trends.reverse()
-    
-    # ========== TOP PERFORMERS ==========
-    # Top vehicles by bookings
-    top_vehicles_by_bookings = Vehicle.objects.annotate(
-        booking_count=Count('bookings')
-    ).order_by('-booking_count')[:5]
-    
-    # Top vehicles by revenue
-    top_vehicles_by_revenue = Vehicle.objects.annotate(
-        total_revenue=Sum('bookings__total_amount')
-    ).filter(total_revenue__isnull=False).order_by('-total_revenue')[:5]
-    
-    # Top customers
+    return daily_trends
+
+
+# ========== TOP PERFORMERS ==========
+def _bi_top_vehicles_by_bookings():
+    return [
+        {
+            'id': stats.vehicle.id,
+            'name': stats.vehicle.name,
+            'brand': stats.vehicle.brand.name,
+            'booking_count': stats.booking_count
+        }
+        for stats in leaderboard('booking_count', 5)
+    ]
+
+
+def _bi_top_vehicles_by_revenue():
+    return [
+        {
+            'id': stats.vehicle.id,
+            'name': stats.vehicle.name,
+            'brand': stats.vehicle.brand.name,
+            'total_revenue': float(stats.paid_revenue)
+        }
+        for stats in leaderboard('paid_revenue', 5)
+    ]
+
+
+def _bi_top_customers():
     top_customers = User.objects.filter(role='customer').annotate(
         booking_count=Count('bookings'),
         total_spent=Sum('bookings__total_amount')
     ).filter(booking_count__gt=0).order_by('-total_spent')[:5]
-    
-    # ========== CATEGORY ANALYSIS ==========
+    return [
+        {
+            'id': customer.id,
+            'username': customer.username,
+            'email': customer.email,
+            'booking_count': customer.booking_count,
+            'total_spent': float(customer.total_spent or 0)
+        }
+        for customer in top_customers
+    ]
+
+
+# ========== CATEGORY ANALYSIS ==========
+def _bi_category_performance():
     category_performance = VehicleCategory.objects.annotate(
         vehicle_count=Count('vehicles'),
         booking_count=Count('vehicles__bookings'),
         total_revenue=Sum('vehicles__bookings__total_amount')
     ).filter(booking_count__gt=0).order_by('-total_revenue')
-    
-    # ========== BRAND ANALYSIS ==========
+    return [
+        {
+            'category': cat.name,
+            'vehicle_count': cat.vehicle_count,
+            'booking_count': cat.booking_count,
+            'total_revenue': float(cat.total_revenue or 0)
+        }
+        for cat in category_performance
+    ]
+
+
+# ========== BRAND ANALYSIS ==========
+def _bi_brand_performance():
     brand_performance = VehicleBrand.objects.annotate(
         vehicle_count=Count('vehicles'),
         booking_count=Count('vehicles__bookings'),
         total_revenue=Sum('vehicles__bookings__total_amount')
     ).filter(booking_count__gt=0).order_by('-total_revenue')
-    
-    return Response({
-        'overview': {
-            'total_bookings': total_bookings,
-            'period_bookings': period_bookings,
-            'total_revenue': float(total_revenue),
-            'period_revenue': float(period_revenue),
-            'total_customers': total_customers,
-            'active_customers': active_customers,
-            'total_vehicles': total_vehicles,
-            'available_vehicles': available_vehicles,
-            'utilization_rate': float(utilization_rate),
-            'avg_booking_value': float(avg_booking_value),
-            'avg_booking_duration': float(avg_booking_duration)
-        },
-        'booking_status_distribution': list(booking_status_distribution),
-        'daily_trends': daily_trends,
-        'top_vehicles_by_bookings': [
-            {
-                'id': vehicle.id,
-                'name': vehicle.name,
-                'brand': vehicle.brand.name,
-                'booking_count': vehicle.booking_count
-            }
-            for vehicle in top_vehicles_by_bookings
-        ],
-        'top_vehicles_by_revenue': [
-            {
-                'id': vehicle.id,
-                'name': vehicle.name,
-                'brand': vehicle.brand.name,
-                'total_revenue': float(vehicle.total_revenue or 0)
-            }
-            for vehicle in top_vehicles_by_revenue
-        ],
-        'top_customers': [
-            {
-                'id': customer.id,
-                'username': customer.username,
-                'email': customer.email,
-                'booking_count': customer.booking_count,
-                'total_spent': float(customer.total_spent or 0)
-            }
-            for customer in top_customers
-        ],
-        'category_performance': [
-            {
-                'category': cat.name,
-                'vehicle_count': cat.vehicle_count,
-                'booking_count': cat.booking_count,
-                'total_revenue': float(cat.total_revenue or 0)
-            }
-            for cat in category_performance
-        ],
-        'brand_performance': [
-            {
-                'brand': brand.name,
-                'vehicle_count': brand.vehicle_count,
-                'booking_count': brand.booking_count,
-                'total_revenue': float(brand.total_revenue or 0)
-            }
-            for brand in brand_performance
-        ]
-    })
+    return [
+        {
+            'brand': brand.name,
+            'vehicle_count': brand.vehicle_count,
+            'booking_count': brand.booking_count,
+            'total_revenue': float(brand.total_revenue or 0)
+        }
+        for brand in brand_performance
+    ]
 
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def operational_metrics(request):
     """Get operational metrics and KPIs."""
     # Date range filters
@@ -297,6 +341,7 @@ def operational_metrics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def predictive_analytics(request):
     """Get predictive analytics and forecasting."""
     # ========== BOOKING FORECASTING ==========
@@ -342,9 +387,7 @@ def predictive_analytics(request):
     
     # ========== VEHICLE DEMAND FORECASTING ==========
     # Most popular vehicles
-    popular_vehicles = Vehicle.objects.annotate(
-        booking_count=Count('bookings')
-    ).order_by('-booking_count')[:10]
+    popular_vehicles = leaderboard('booking_count', 10)
     
     # Category demand
     category_demand = VehicleCategory.objects.annotate(
@@ -399,12 +442,12 @@ def predictive_analytics(request):
         'demand_forecast': {
             'popular_vehicles': [
                 {
-                    'id': vehicle.id,
-                    'name': vehicle.name,
-                    'brand': vehicle.brand.name,
-                    'booking_count': vehicle.booking_count
+                    'id': stats.vehicle.id,
+                    'name': stats.vehicle.name,
+                    'brand': stats.vehicle.brand.name,
+                    'booking_count': stats.booking_count
                 }
-                for vehicle in popular_vehicles
+                for stats in popular_vehicles
             ],
             'category_demand': [
                 {
@@ -421,6 +464,7 @@ def predictive_analytics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def custom_report_builder(request):
     """Build custom reports based on parameters."""
     # Get report parameters
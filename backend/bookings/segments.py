@@ -0,0 +1,157 @@
+"""
+RFM customer segmentation.
+
+Every customer with at least one booking is scored 1-5 on three measures
+taken from their ``CustomerStats`` row:
+
+    recency    how long since their last booking (recent scores high)
+    frequency  paid_booking_count
+    monetary   total_spent
+
+A score is the customer's quintile among all scored customers. Tied values
+share the score of their midpoint rank, so the thousands of customers with a
+single booking land in one bucket instead of being split arbitrarily. The
+three scores map to one of ``SEGMENTS``. Customers with a stats row but no
+bookings left get ``no_bookings`` and zero scores; customers without a row
+have never booked and count as ``no_bookings`` too.
+
+The stats table is read with one query into NumPy arrays and scored without
+a Python loop. Only rows whose scores changed are written back, with one
+``UPDATE ... WHERE user_id IN (...)`` per score combination, so a nightly
+``segment_customers`` run mostly reads. Scores are relative to the run: they
+are not touched by booking saves in between.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+import numpy as np
+
+from .models import CustomerStats
+from .stats import refresh_in_parallel
+
+SCORE_BUCKETS = 5
+NO_BOOKINGS = 'no_bookings'
+
+# (segment, description), best first
+SEGMENTS = (
+    ('champions', 'Booked recently, book often and spend the most'),
+    ('loyal', 'Book often and not lapsed'),
+    ('potential_loyalists', 'Recent customers with a few bookings'),
+    ('new', 'Recent first-time customers'),
+    ('need_attention', 'Average recency, below-average frequency'),
+    ('cant_lose', 'Used to book often and spend the most, but lapsed'),
+    ('at_risk', 'Used to book often, but lapsed'),
+    ('hibernating', 'Low on all three for a while'),
+    ('lost', 'Lowest recency and frequency'),
+    (NO_BOOKINGS, 'Never booked'),
+)
+SEGMENT_NAMES = tuple(name for name, _ in SEGMENTS)
+SCORE_FIELDS = ('recency_score', 'frequency_score', 'monetary_score')
+
+
+def quantile_scores(values, buckets=SCORE_BUCKETS):
+    """
+    Score each value 1..``buckets`` by its quantile in ``values``, higher
+    values scoring higher. Equal values get the same score.
+    """
+    values = np.asarray(values)
+    if not values.size:
+        return np.zeros(0, dtype=np.int8)
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    # Midpoint of each distinct value's run of ranks, as a fraction in (0, 1)
+    midpoints = (np.cumsum(counts) - counts / 2) / values.size
+    scores = np.clip(np.ceil(midpoints * buckets), 1, buckets).astype(np.int8)
+    return scores[inverse.ravel()]
+
+
+def assign_segments(recency, frequency, monetary):
+    """Map score arrays to segment names, checking the rules in order."""
+    rules = [
+        ('champions', (recency >= 4) & (frequency >= 4) & (monetary >= 4)),
+        ('loyal', (recency >= 3) & (frequency >= 4)),
+        ('cant_lose', (recency <= 2) & (frequency >= 4) & (monetary >= 4)),
+        ('at_risk', (recency <= 2) & (frequency >= 3)),
+        ('potential_loyalists', (recency >= 4) & (frequency >= 2)),
+        ('new', recency >= 4),
+        ('need_attention', recency == 3),
+        ('hibernating', recency == 2),
+    ]
+    return np.select([mask for _, mask in rules], [name for name, _ in rules], default='lost')
+
+
+def _load(using):
+    rows = list(
+        CustomerStats.objects.using(using).filter(user__role='customer').order_by()
+        .values_list('user_id', 'last_booking_at', 'booking_count', 'paid_booking_count', 'segment', *SCORE_FIELDS)
+        .annotate(spent=Cast('total_spent', FloatField()))
+    )
+    if not rows:
+        return None
+    user_ids, last_booked, booked, paid, stored_segment, *stored_scores, spent = zip(*rows)
+    now = timezone.now()
+    return {
+        'user_ids': np.array(user_ids, dtype=np.int64),
+        'days_since': np.array(
+            [(now - at).total_seconds() / 86400 if at else np.nan for at in last_booked], dtype=np.float64,
+        ),
+        'booked': np.array(booked, dtype=np.int64),
+        'paid': np.array(paid, dtype=np.int64),
+        'spent': np.array(spent, dtype=np.float64),
+        'stored_segment': np.array(stored_segment, dtype=object),
+        'stored_scores': np.array(stored_scores, dtype=np.int8).T,
+    }
+
+
+def score_customers(data):
+    """Return ``(scores, segment)``: an n x 3 array of R, F, M scores and segment names."""
+    scores = np.zeros((data['user_ids'].size, 3), dtype=np.int8)
+    scored = (data['booked'] > 0) & ~np.isnan(data['days_since'])
+    scores[scored, 0] = quantile_scores(-data['days_since'][scored])
+    scores[scored, 1] = quantile_scores(data['paid'][scored])
+    scores[scored, 2] = quantile_scores(data['spent'][scored])
+
+    segment = np.full(data['user_ids'].size, NO_BOOKINGS, dtype=object)
+    segment[scored] = assign_segments(*scores[scored].T)
+    return scores, segment
+
+
+def segment_customers(workers=4, chunk_size=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Score every customer and write the scores and segments that changed.
+    Returns ``{'customers', 'written', 'segments': {name: count}}``, where
+    ``no_bookings`` includes customers without a stats row.
+    """
+    from users.models import User
+
+    customers = User.objects.using(using).filter(role='customer').count()
+    data = _load(using)
+    if data is None:
+        return {'customers': customers, 'written': 0,
+                'segments': {**dict.fromkeys(SEGMENT_NAMES, 0), NO_BOOKINGS: customers}}
+
+    scores, segment = score_customers(data)
+    changed = np.flatnonzero((scores != data['stored_scores']).any(axis=1) | (segment != data['stored_segment']))
+    # The segment follows from the scores, so each combination is one update
+    combination, first, group = np.unique(scores[changed], axis=0, return_index=True, return_inverse=True)
+    group = group.ravel()
+
+    # One task per score combination and chunk of its user ids
+    tasks = []
+    for index, values in enumerate(combination):
+        user_ids = data['user_ids'][changed[group == index]].tolist()
+        fields = {**dict(zip(SCORE_FIELDS, values.tolist())), 'segment': segment[changed[first[index]]]}
+        tasks.extend((fields, user_ids[i:i + chunk_size]) for i in range(0, len(user_ids), chunk_size))
+
+    def write(chunk, using):
+        return sum(
+            CustomerStats.objects.using(using).filter(user_id__in=user_ids).update(**fields)
+            for fields, user_ids in chunk
+        )
+
+    written = refresh_in_parallel(write, tasks, workers=workers, chunk_size=1, using=using)
+    names, counts = np.unique(segment.astype(str), return_counts=True)
+    segments = {**dict.fromkeys(SEGMENT_NAMES, 0), **dict(zip(names.tolist(), counts.tolist()))}
+    segments[NO_BOOKINGS] += customers - data['user_ids'].size
+    return {'customers': customers, 'written': written, 'segments': segments}
@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from users import cohorts, profiles
+from users.models import User
+from vehicles.models import Vehicle
+from .models import Booking, BookingStatusHistory, Payment, TaxRule
+from . import changes, live, pricing, stats, vehicle_status
+
+
+@receiver(pre_save, sender=Booking)
+def remember_stored_booking(sender, instance, raw=False, using=None, **kwargs):
+    """Keep the stored values so post_save can apply only the difference."""
+    if raw:
+        return
+    instance._stats_before = stats.stored_values(instance, using=using)
+
+
+@receiver(post_save, sender=Booking)
+def update_vehicle_stats(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    before = None if created else getattr(instance, '_stats_before', None)
+    stats.booking_saved(before, instance, using=using)
+
+
+@receiver(post_delete, sender=Booking)
+def remove_from_vehicle_stats(sender, instance, using=None, **kwargs):
+    stats.booking_deleted(instance, using=using)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def reconcile_vehicle_status(sender, instance, raw=False, using=None, **kwargs):
+    """A vehicle is rented while a booking holds it today; re-derive it in the same transaction."""
+    if raw:
+        return
+    vehicle_ids = {instance.vehicle_id}
+    before = getattr(instance, '_stats_before', None)
+    if before is not None:
+        vehicle_ids.add(before['vehicle_id'])
+    vehicle_status.reconcile(vehicle_ids, using=using)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def evict_customer_profiles(sender, instance, using=None, **kwargs):
+    """Cached profiles are built from the customer's bookings; drop them once the write commits."""
+    user_ids = {instance.user_id}
+    before = getattr(instance, '_stats_before', None)
+    if before is not None:
+        # A booking moved to another customer changes both profiles
+        user_ids.add(before['user_id'])
+    transaction.on_commit(lambda: profiles.evict(user_ids), using=using)
+
+
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=User)
+def invalidate_cohorts(sender, using=None, **kwargs):
+    """Closed cohort rows are cached forever; deletes (direct or cascaded) are the writes that change them."""
+    transaction.on_commit(cohorts.invalidate, using=using)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=BookingStatusHistory)
+def record_saved_change(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    changes.record(instance, 'created' if created else 'updated', using=using)
+
+
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=BookingStatusHistory)
+def record_deleted_change(sender, instance, using=None, **kwargs):
+    changes.record(instance, 'deleted', using=using)
+
+
+# ==================== PRICING ====================
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=TaxRule)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=TaxRule)
+def invalidate_quote_rates(sender, raw=False, using=None, **kwargs):
+    """Quotes read cached rate tables; rebuild them once the write commits."""
+    if raw:
+        return
+    transaction.on_commit(pricing.invalidate, using=using)
+
+
+# ==================== LIVE DASHBOARD ====================
+
+@receiver(post_save, sender=Booking)
+def publish_saved_booking(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if raw or not live.broadcaster.has_subscribers():
+        return
+    before = None if created else getattr(instance, '_stats_before', None)
+    live.publish_on_commit(live.booking_delta(before, stats.tracked_values(instance)), using=using)
+
+
+@receiver(post_delete, sender=Booking)
+def publish_deleted_booking(sender, instance, using=None, **kwargs):
+    if live.broadcaster.has_subscribers():
+        live.publish_on_commit(live.booking_delta(stats.tracked_values(instance), None), using=using)
+
+
+# Rows counted per status on the dashboard: (model, status field, KPI group)
+LIVE_STATUS_MODELS = {Payment: ('payment_status', 'payments'), Vehicle: ('status', 'vehicles')}
+
+
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=Vehicle)
+def remember_stored_status(sender, instance, raw=False, using=None, **kwargs):
+    # Never reuse the value from an earlier save
+    instance.__dict__.pop('_live_status_before', None)
+    if raw or instance.pk is None or not live.broadcaster.has_subscribers():
+        return
+    field, _ = LIVE_STATUS_MODELS[sender]
+    instance._live_status_before = (
+        sender.objects.using(using).filter(pk=instance.pk).values_list(field, flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=Vehicle)
+def publish_saved_status(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if raw or not live.broadcaster.has_subscribers():
+        return
+    field, group = LIVE_STATUS_MODELS[sender]
+    if created:
+        before = None
+    elif hasattr(instance, '_live_status_before'):
+        before = instance._live_status_before
+    else:
+        # Nobody was subscribed when the save started
+        return
+    live.publish_on_commit(live.status_delta(group, before, getattr(instance, field)), using=using)
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Vehicle)
+def publish_deleted_status(sender, instance, using=None, **kwargs):
+    if live.broadcaster.has_subscribers():
+        field, group = LIVE_STATUS_MODELS[sender]
+        live.publish_on_commit(live.status_delta(group, getattr(instance, field), None), using=using)
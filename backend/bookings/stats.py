@@ -0,0 +1,291 @@
+"""
+Denormalized booking totals.
+
+Every booking contributes to its vehicle's ``VehicleStats`` row:
+
+    booking_count       1
+    paid_revenue        total_amount while payment_status is 'paid'
+    booked_days         total_days unless the booking is cancelled
+    cancellation_count  1 while the booking is cancelled
+    last_booked_date    the day the booking was made
+
+and to its customer's ``CustomerStats`` row:
+
+    booking_count       1
+    <status>_count      1 for the booking's current status
+    paid_booking_count  1 while payment_status is 'paid'
+    total_spent         total_amount while payment_status is 'paid'
+    first/last_booking_at  when the booking was made
+
+The ``bookings.signals`` receivers apply the difference between a booking's
+contribution before and after each save, and remove it on delete, with
+``F()`` updates in the same transaction as the booking write. The booking
+dates only move outward; a delete leaves them until the next refresh. Writes
+that skip model signals (``bulk_create``, ``QuerySet.update``, raw SQL) must
+call ``refresh_vehicle_stats``/``refresh_customer_stats`` for the rows they
+touched; the ``backfill_vehicle_stats`` and ``backfill_customer_stats``
+commands rebuild every row.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .models import Booking, CustomerStats, VehicleStats
+
+TRACKED_FIELDS = ('vehicle_id', 'user_id', 'status', 'payment_status', 'total_amount', 'total_days')
+VEHICLE_COUNTERS = ('booking_count', 'paid_revenue', 'booked_days', 'cancellation_count')
+STATUS_COUNTERS = {status: f'{status}_count' for status, _ in Booking.STATUS_CHOICES}
+CUSTOMER_COUNTERS = ('booking_count', *STATUS_COUNTERS.values(), 'paid_booking_count', 'total_spent')
+
+
+def _paid_amount(values):
+    return Decimal(values['total_amount'] or 0) if values['payment_status'] == 'paid' else Decimal(0)
+
+
+def vehicle_contribution(values):
+    """What one booking, given as ``{field: value}``, adds to its vehicle's counters."""
+    cancelled = values['status'] == 'cancelled'
+    return {
+        'booking_count': 1,
+        'paid_revenue': _paid_amount(values),
+        'booked_days': 0 if cancelled else values['total_days'] or 0,
+        'cancellation_count': 1 if cancelled else 0,
+    }
+
+
+def customer_contribution(values):
+    """What one booking adds to its customer's counters."""
+    counters = dict.fromkeys(CUSTOMER_COUNTERS, 0)
+    counters['booking_count'] = 1
+    if values['status'] in STATUS_COUNTERS:
+        counters[STATUS_COUNTERS[values['status']]] = 1
+    counters['paid_booking_count'] = 1 if values['payment_status'] == 'paid' else 0
+    counters['total_spent'] = _paid_amount(values)
+    return counters
+
+
+def _vehicle_dates(created_at):
+    booked_date = timezone.localdate(created_at)
+    return {'last_booked_date': Greatest(Coalesce('last_booked_date', booked_date), booked_date)}
+
+
+def _customer_dates(created_at):
+    return {
+        'first_booking_at': Least(Coalesce('first_booking_at', created_at), created_at),
+        'last_booking_at': Greatest(Coalesce('last_booking_at', created_at), created_at),
+    }
+
+
+# (stats model, booking field holding its key, contribution, date updates for a new booking)
+TARGETS = (
+    (VehicleStats, 'vehicle_id', vehicle_contribution, _vehicle_dates),
+    (CustomerStats, 'user_id', customer_contribution, _customer_dates),
+)
+
+
+def tracked_values(booking):
+    return {field: getattr(booking, field) for field in TRACKED_FIELDS}
+
+
+def stored_values(booking, using=DEFAULT_DB_ALIAS):
+    """
+    The tracked fields as currently stored, or None for a new booking. The row
+    is locked so concurrent saves of one booking apply their differences in turn.
+    """
+    if booking.pk is None:
+        return None
+    return (Booking.objects.using(using).select_for_update()
+            .filter(pk=booking.pk).values(*TRACKED_FIELDS).first())
+
+
+def _apply(model, key_field, key, deltas, dates=None, create=True, using=DEFAULT_DB_ALIAS):
+    changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+    changes.update(dates or {})
+    if not changes:
+        return
+    changes['updated_at'] = timezone.now()
+    rows = model.objects.using(using).filter(**{key_field: key})
+    if rows.update(**changes) or not create:
+        return
+    # First booking for this key; ignore_conflicts covers a concurrent first booking
+    model.objects.using(using).bulk_create([model(**{key_field: key})], ignore_conflicts=True)
+    rows.update(**changes)
+
+
+def _negate(counters):
+    return {name: -value for name, value in counters.items()}
+
+
+def booking_saved(before, booking, using=DEFAULT_DB_ALIAS):
+    """Move the booking's contribution from ``before`` (None when created) to its saved values."""
+    after = tracked_values(booking)
+    for model, key_field, contribution, dates in TARGETS:
+        gained = contribution(after)
+        new_dates = None
+        if before is not None and before[key_field] == after[key_field]:
+            lost = contribution(before)
+            gained = {name: gained[name] - lost[name] for name in gained}
+        else:
+            # New booking, or one moved to another vehicle or customer
+            if before is not None:
+                _apply(model, key_field, before[key_field], _negate(contribution(before)),
+                       create=False, using=using)
+            new_dates = dates(booking.created_at) if booking.created_at else None
+        _apply(model, key_field, after[key_field], gained, new_dates, using=using)
+
+
+def booking_deleted(booking, using=DEFAULT_DB_ALIAS):
+    values = tracked_values(booking)
+    for model, key_field, contribution, _ in TARGETS:
+        # Never create: the vehicle or customer may itself be mid-delete
+        _apply(model, key_field, values[key_field], _negate(contribution(values)), create=False, using=using)
+
+
+# ==================== FULL REFRESH ====================
+
+def _upsert(model, rows, update_fields, using):
+    model.objects.using(using).bulk_create(
+        rows, update_conflicts=True, unique_fields=[model._meta.pk.name], update_fields=update_fields,
+    )
+    return len(rows)
+
+
+def refresh_vehicle_stats(vehicle_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Recompute the rows for ``vehicle_ids`` from the bookings table with one
+    grouped query and one upsert. Returns the number of rows written.
+    """
+    from vehicles.models import Vehicle
+
+    vehicle_ids = list(Vehicle.objects.using(using).filter(id__in=vehicle_ids).values_list('id', flat=True))
+    totals = {
+        row['vehicle_id']: row
+        for row in Booking.objects.using(using).filter(vehicle_id__in=vehicle_ids).order_by()
+        .values('vehicle_id').annotate(
+            booking_count=Count('id'),
+            paid_revenue=Sum('total_amount', filter=Q(payment_status='paid')),
+            booked_days=Sum('total_days', filter=~Q(status='cancelled')),
+            cancellation_count=Count('id', filter=Q(status='cancelled')),
+            last_booked_at=Max('created_at'),
+        )
+    }
+    now = timezone.now()
+    rows = []
+    for vehicle_id in vehicle_ids:
+        row = totals.get(vehicle_id, {})
+        rows.append(VehicleStats(
+            vehicle_id=vehicle_id,
+            booking_count=row.get('booking_count', 0),
+            paid_revenue=row.get('paid_revenue') or 0,
+            booked_days=row.get('booked_days') or 0,
+            cancellation_count=row.get('cancellation_count', 0),
+            last_booked_date=timezone.localdate(row['last_booked_at']) if row.get('last_booked_at') else None,
+            updated_at=now,
+        ))
+    return _upsert(VehicleStats, rows, [*VEHICLE_COUNTERS, 'last_booked_date', 'updated_at'], using)
+
+
+def refresh_customer_stats(user_ids, using=DEFAULT_DB_ALIAS):
+    """``refresh_vehicle_stats`` for ``CustomerStats``."""
+    from users.models import User
+
+    user_ids = list(User.objects.using(using).filter(id__in=user_ids).values_list('id', flat=True))
+    status_counts = {
+        name: Count('id', filter=Q(status=status)) for status, name in STATUS_COUNTERS.items()
+    }
+    totals = {
+        row['user_id']: row
+        for row in Booking.objects.using(using).filter(user_id__in=user_ids).order_by()
+        .values('user_id').annotate(
+            booking_count=Count('id'),
+            paid_booking_count=Count('id', filter=Q(payment_status='paid')),
+            total_spent=Sum('total_amount', filter=Q(payment_status='paid')),
+            first_booking_at=Min('created_at'),
+            last_booking_at=Max('created_at'),
+            **status_counts,
+        )
+    }
+    now = timezone.now()
+    rows = []
+    for user_id in user_ids:
+        row = totals.get(user_id, {})
+        rows.append(CustomerStats(
+            user_id=user_id,
+            **{name: row.get(name, 0) for name in ('booking_count', 'paid_booking_count', *status_counts)},
+            total_spent=row.get('total_spent') or 0,
+            first_booking_at=row.get('first_booking_at'),
+            last_booking_at=row.get('last_booking_at'),
+            updated_at=now,
+        ))
+    return _upsert(CustomerStats, rows, [*CUSTOMER_COUNTERS, 'first_booking_at', 'last_booking_at', 'updated_at'],
+                   using)
+
+
+def refresh_in_parallel(refresh, ids, workers=4, chunk_size=500, using=DEFAULT_DB_ALIAS):
+    """
+    Run ``refresh(chunk, using=using)`` over ``ids`` in chunks on ``workers``
+    threads, each with its own connection. Returns the total rows written.
+    Inside a transaction the chunks run in the calling thread, since other
+    connections cannot see its uncommitted rows; so they do on SQLite, which
+    allows one writer at a time and fails concurrent ones with "database is
+    locked".
+    """
+    ids = list(ids)
+    chunk_size = max(1, chunk_size)
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+    connection = connections[using]
+    if connection.in_atomic_block or connection.vendor == 'sqlite':
+        return sum(refresh(chunk, using=using) for chunk in chunks)
+    chunks = iter(chunks)
+    lock = threading.Lock()
+
+    def worker():
+        # Pull chunks until none are left, then close this thread's connection
+        written = 0
+        try:
+            while True:
+                with lock:
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return written
+                written += refresh(chunk, using=using)
+        finally:
+            connections.close_all()
+
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='booking-stats') as executor:
+        futures = [executor.submit(worker) for _ in range(workers)]
+        return sum(future.result() for future in futures)
+
+
+# ==================== READS ====================
+
+def leaderboard(field, limit):
+    """
+    The ``limit`` vehicles with the highest ``field``, as ``VehicleStats`` rows
+    with the vehicle and brand joined. Rows with a zero value are left out.
+    """
+    return (
+        VehicleStats.objects.select_related('vehicle__brand')
+        .filter(**{f'{field}__gt': 0})
+        .order_by(f'-{field}', 'vehicle_id')[:limit]
+    )
+
+
+def customer_leaderboard(field, limit):
+    """The ``limit`` customers with the highest ``field``, with the user joined."""
+    return (
+        CustomerStats.objects.select_related('user')
+        .filter(user__role='customer', **{f'{field}__gt': 0})
+        .order_by(f'-{field}', 'user_id')[:limit]
+    )
+
+
+def customer_stats_for(user):
+    """The user's stats row, or an unsaved all-zero one when they have never booked."""
+    return CustomerStats.objects.filter(user=user).first() or CustomerStats(user=user)
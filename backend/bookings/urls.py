@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views, financial_views, reporting_views
+from . import views, financial_views, live_views, reporting_views
 
 urlpatterns = [
     # Customer endpoints
@@ -10,12 +10,15 @@ urlpatterns = [
     path('<int:booking_id>/summary/', views.booking_summary, name='booking-summary'),
     path('<int:booking_id>/payment/', views.create_payment, name='create-payment'),
     path('statistics/', views.booking_statistics, name='booking-statistics'),
+    path('quotes/', views.booking_quotes, name='booking-quotes'),
     
     # Admin booking management
     path('admin/all/', views.AdminBookingListView.as_view(), name='admin-bookings'),
     path('admin/<int:pk>/', views.AdminBookingDetailView.as_view(), name='admin-booking-detail'),
     path('admin/analytics/', views.admin_booking_analytics, name='admin-booking-analytics'),
     path('admin/bulk-operations/', views.admin_bulk_booking_operations, name='admin-bulk-booking-operations'),
+    path('changes/', views.booking_changes, name='booking-changes'),
+    path('admin/live/', live_views.live_dashboard, name='admin-live-dashboard'),
     
     # Financial reporting
     path('admin/financial/overview/', financial_views.financial_overview, name='financial-overview'),
@@ -0,0 +1,62 @@
+"""
+Vehicle status derived from bookings.
+
+A vehicle is ``rented`` while a confirmed or active booking covers today and
+``available`` otherwise, so a booking confirmed weeks ahead no longer takes
+the vehicle off the list, and cancelling one booking does not free a vehicle
+another booking still holds. ``maintenance`` and ``unavailable`` are set by
+admins and left as they are; a vehicle switched back to ``available`` is
+reconciled again from the next booking write or full pass.
+
+``reconcile`` writes the derived status with one ``UPDATE`` that touches only
+the vehicles whose status is wrong:
+
+* booking signals reconcile the booking's vehicle (old and new, if it was
+  moved) in the same transaction as every booking write;
+* the lifecycle sweeper reconciles the vehicles whose bookings it moved;
+* ``reconcile_vehicle_status`` reconciles the whole fleet, for writes that
+  skipped both (bulk loads, raw SQL) and for days without a sweeper run.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from . import live
+from .models import Booking
+
+# Booking statuses that hold the vehicle between start and end date
+OCCUPYING_STATUSES = ('confirmed', 'active')
+# Vehicle statuses the reconciler owns; the others are set by admins
+DERIVED_STATUSES = ('available', 'rented')
+
+
+def in_use(today, using=DEFAULT_DB_ALIAS):
+    """Whether a booking holds the vehicle (``OuterRef('pk')``) on ``today``."""
+    return Exists(Booking.objects.using(using).filter(
+        vehicle=OuterRef('pk'), status__in=OCCUPYING_STATUSES, start_date__lte=today, end_date__gte=today,
+    ))
+
+
+def reconcile(vehicle_ids=None, today=None, using=DEFAULT_DB_ALIAS):
+    """
+    Set the derived status of the given vehicles, or of the whole fleet when
+    ``vehicle_ids`` is None. Returns the number of vehicles changed.
+    """
+    from vehicles import catalog
+    from vehicles.models import Vehicle
+
+    today = today or timezone.localdate()
+    held = in_use(today, using)
+    vehicles = Vehicle.objects.using(using).filter(status__in=DERIVED_STATUSES)
+    if vehicle_ids is not None:
+        vehicles = vehicles.filter(id__in=vehicle_ids)
+    changed = vehicles.filter(Q(held, status='available') | Q(~held, status='rented')).update(
+        status=Case(When(held, then=Value('rented')), default=Value('available')),
+        updated_at=timezone.now(),
+    )
+    if changed:
+        # QuerySet.update skips the catalog's and live dashboard's signals.
+        # Every booking write lands here, so the rebuild waits for the next read.
+        catalog.invalidate(defer=True)
+        live.request_resync(using=using)
+    return changed
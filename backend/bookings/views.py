@@ -4,8 +4,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q, Sum
-from .models import Booking, BookingStatusHistory, Payment
+from .models import Booking, BookingStatusHistory, CustomerStats, Payment
+from .fast_serializers import booking_list_values, serialize_booking_rows
+from .stats import customer_stats_for, leaderboard
+from . import changes, pricing
 from .serializers import (
     BookingCreateSerializer, 
     BookingListSerializer, 
@@ -15,6 +19,16 @@ from .serializers import (
     PaymentSerializer
 )
 from vehicles.models import Vehicle
+from rental_backend import conditional
+
+FINALIZED_STATUSES = ('completed', 'cancelled')
+
+# Change feed batch size: default and largest accepted ?limit=
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 5000
+
+# Most vehicles priced by one quotes request
+QUOTE_BATCH_MAX = 500
 
 
 class BookingCreateView(generics.CreateAPIView):
@@ -23,6 +37,12 @@ class BookingCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def perform_create(self, serializer):
+        # One transaction for check + insert + history: on SQLite production
+        # mode this takes the write lock up front (BEGIN IMMEDIATE).
+        with transaction.atomic():
+            self._create_booking(serializer)
+    
+    def _create_booking(self, serializer):
         vehicle = serializer.validated_data['vehicle']
         start_date = serializer.validated_data['start_date']
         end_date = serializer.validated_data['end_date']
@@ -38,7 +58,7 @@ class BookingCreateView(generics.CreateAPIView):
         if conflicting_bookings:
             raise serializers.ValidationError("Vehicle is not available for the selected dates")
         
-        if not vehicle.is_available:
+        if not vehicle.is_bookable:
             raise serializers.ValidationError("Vehicle is currently not available")
         
         # Set daily rate from vehicle
@@ -57,7 +77,23 @@ class BookingCreateView(generics.CreateAPIView):
         )
 
 
-class UserBookingListView(generics.ListAPIView):
+class BookingRowListMixin:
+    """
+    Serve ``BookingListSerializer`` output from ``.values()`` rows.
+
+    Filtering, ordering and pagination still run on the queryset; only the
+    serialization step is replaced (see ``bookings.fast_serializers``).
+    """
+
+    def list(self, request, *args, **kwargs):
+        rows = booking_list_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_booking_rows(page, request))
+        return Response(serialize_booking_rows(rows, request))
+
+
+class UserBookingListView(BookingRowListMixin, generics.ListAPIView):
     """List bookings for the authenticated user."""
     serializer_class = BookingListSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -118,18 +154,13 @@ class BookingUpdateView(generics.UpdateAPIView):
             reason=serializer.validated_data.get('notes', 'Status updated')
         )
         
-        # Update vehicle status if booking is confirmed or active
+        # The vehicle's status follows from its bookings (bookings.vehicle_status)
         if new_status == 'confirmed':
-            booking.vehicle.status = 'rented'
-            booking.vehicle.save()
             booking.confirmed_at = timezone.now()
             booking.save()
-        elif new_status == 'completed':
-            booking.vehicle.status = 'available'
-            booking.vehicle.save()
 
 
-class AdminBookingListView(generics.ListAPIView):
+class AdminBookingListView(BookingRowListMixin, generics.ListAPIView):
     """List all bookings for admin."""
     serializer_class = BookingListSerializer
     permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
@@ -195,10 +226,6 @@ def cancel_booking(request, booking_id):
         reason='Cancelled by user'
     )
     
-    # Make vehicle available again
-    booking.vehicle.status = 'available'
-    booking.vehicle.save()
-    
     return Response({'message': 'Booking cancelled successfully'})
 
 
@@ -206,13 +233,26 @@ def cancel_booking(request, booking_id):
 @permission_classes([permissions.IsAuthenticated])
 def booking_summary(request, booking_id):
     """Get booking summary for checkout."""
-    try:
-        booking = Booking.objects.get(id=booking_id, user=request.user)
-    except Booking.DoesNotExist:
+    stamp = Booking.objects.filter(id=booking_id, user=request.user).values(
+        'status', 'updated_at', 'vehicle__updated_at', 'user__updated_at',
+        'vehicle__brand__name', 'vehicle__category__name',
+    ).first()
+    if stamp is None:
         return Response({'error': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    serializer = BookingSummarySerializer(booking, context={'request': request})
-    return Response(serializer.data)
+    def build_response():
+        booking = Booking.objects.select_related('vehicle__brand', 'vehicle__category', 'user').get(id=booking_id)
+        serializer = BookingSummarySerializer(booking, context={'request': request})
+        return Response(serializer.data)
+    
+    # Finalized bookings no longer change, so clients polling the checkout
+    # summary can revalidate against the row timestamps instead of refetching.
+    if stamp['status'] not in FINALIZED_STATUSES:
+        return build_response()
+    
+    last_modified = max(stamp['updated_at'], stamp['vehicle__updated_at'], stamp['user__updated_at'])
+    etag = conditional.representation_etag(request, '|'.join(str(value) for value in stamp.values()))
+    return conditional.respond(request, etag, int(last_modified.timestamp()), build_response, private=True)
 
 
 @api_view(['GET'])
@@ -250,9 +290,7 @@ def booking_statistics(request):
         rented_vehicles = Vehicle.objects.filter(status='rented').count()
         
         # Popular vehicles
-        popular_vehicles = Vehicle.objects.annotate(
-            booking_count=Count('bookings')
-        ).order_by('-booking_count')[:5]
+        popular_vehicles = leaderboard('booking_count', 5)
         
         # Recent bookings (last 7 days)
         recent_bookings = Booking.objects.filter(
@@ -267,10 +305,10 @@ def booking_statistics(request):
         # Customer analytics
         from users.models import User
         total_customers = User.objects.filter(role='customer').count()
-        active_customers = User.objects.filter(
-            role='customer',
-            bookings__status__in=['active', 'confirmed']
-        ).distinct().count()
+        active_customers = CustomerStats.objects.filter(
+            Q(active_count__gt=0) | Q(confirmed_count__gt=0),
+            user__role='customer'
+        ).count()
         
         return Response({
             'overview': {
@@ -297,27 +335,23 @@ def booking_statistics(request):
             },
             'popular_vehicles': [
                 {
-                    'id': vehicle.id,
-                    'name': vehicle.name,
-                    'brand': vehicle.brand.name,
-                    'booking_count': vehicle.booking_count
+                    'id': stats.vehicle.id,
+                    'name': stats.vehicle.name,
+                    'brand': stats.vehicle.brand.name,
+                    'booking_count': stats.booking_count
                 }
-                for vehicle in popular_vehicles
+                for stats in popular_vehicles
             ]
         })
     else:
         # User statistics
-        user_bookings = Booking.objects.filter(user=user)
-        total_bookings = user_bookings.count()
-        active_bookings = user_bookings.filter(status='active').count()
-        upcoming_bookings = user_bookings.filter(status='confirmed').count()
-        completed_bookings = user_bookings.filter(status='completed').count()
+        stats = customer_stats_for(user)
         
         return Response({
-            'total_bookings': total_bookings,
-            'active_bookings': active_bookings,
-            'upcoming_bookings': upcoming_bookings,
-            'completed_bookings': completed_bookings,
+            'total_bookings': stats.booking_count,
+            'active_bookings': stats.active_count,
+            'upcoming_bookings': stats.confirmed_count,
+            'completed_bookings': stats.completed_count,
         })
 
 
@@ -358,7 +392,7 @@ def create_payment(request, booking_id):
 
 # ==================== ADMIN BOOKING MANAGEMENT ====================
 
-class AdminBookingListView(generics.ListAPIView):
+class AdminBookingListView(BookingRowListMixin, generics.ListAPIView):
     """Admin view to list all bookings with advanced filtering."""
     queryset = Booking.objects.all()
     serializer_class = BookingListSerializer
@@ -527,3 +561,70 @@ def admin_bulk_booking_operations(request):
         'message': f'{updated_count} bookings updated successfully',
         'updated_count': updated_count
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def booking_changes(request):
+    """
+    Booking, payment and status history changes after ``?since=<seq>``
+    (default 0), oldest first. Pass the returned ``next`` as ``since`` to
+    continue; ``has_more`` means another batch is ready now.
+    """
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = int(request.GET.get('limit', CHANGES_DEFAULT_LIMIT))
+    except ValueError:
+        return Response(
+            {'error': 'since and limit must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if since < 0 or limit <= 0:
+        return Response(
+            {'error': 'since must not be negative and limit must be positive'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    events, has_more = changes.read(since, min(limit, CHANGES_MAX_LIMIT))
+    return Response({
+        'events': events,
+        'next': events[-1]['seq'] if events else since,
+        'has_more': has_more,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def booking_quotes(request):
+    """
+    Rental quotes for ``?vehicles=1,2,3`` from ``start_date`` to ``end_date``,
+    in that order; unknown vehicle ids are listed under ``missing``.
+    """
+    try:
+        period = pricing.parse_period(request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if period is None:
+        return Response({'error': 'start_date and end_date are required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        vehicle_ids = [int(value) for value in request.GET.get('vehicles', '').split(',') if value.strip()]
+    except ValueError:
+        return Response(
+            {'error': 'vehicles must be a comma-separated list of vehicle ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 1 <= len(vehicle_ids) <= QUOTE_BATCH_MAX:
+        return Response(
+            {'error': f'Between 1 and {QUOTE_BATCH_MAX} vehicle ids are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    start_date, end_date = period
+    quotes = pricing.quote_vehicles(vehicle_ids, start_date, end_date)
+    return Response({
+        'start_date': start_date,
+        'end_date': end_date,
+        'quotes': [{'vehicle_id': vehicle_id, **pricing.as_json(quotes[vehicle_id])}
+                   for vehicle_id in vehicle_ids if vehicle_id in quotes],
+        'missing': [vehicle_id for vehicle_id in vehicle_ids if vehicle_id not in quotes],
+    })
@@ -2,6 +2,7 @@
 """
 Script to create sample data for the Vehicle Rental Application
 Run this script after setting up the database to populate it with sample data.
+For load-testing volumes use `python manage.py generate_fleet` instead.
 """
 
 import os
@@ -0,0 +1,26 @@
+"""
+Expiry for values kept in the Django cache.
+
+Cached tables and rows are dropped or re-versioned when the data behind them
+changes. With ``REDIS_URL`` every worker process sees that; without it the
+cache is a per-process ``LocMemCache`` and the deletes and version bumps only
+reach the process that made the write. ``ttl`` caps expiry at
+``LOCAL_CACHE_MAX_TTL`` in that case, which bounds how long another worker
+keeps serving the old value.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local():
+    """Whether the default cache is private to this process."""
+    return isinstance(caches['default'], LocMemCache)
+
+
+def ttl(seconds):
+    """Cache timeout for ``seconds`` (None: no expiry), capped for a per-process cache."""
+    if not is_process_local():
+        return seconds
+    cap = getattr(settings, 'LOCAL_CACHE_MAX_TTL', 60)
+    return cap if seconds is None else min(seconds, cap)
@@ -0,0 +1,68 @@
+"""
+Conditional GET helpers (ETag / Last-Modified) for API views.
+
+Views compute validators from a cheap version stamp, then call ``respond``:
+when the client's ``If-None-Match`` / ``If-Modified-Since`` still match, a 304
+is returned without building the response body at all.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def representation_etag(request, version):
+    """
+    Strong ETag for this URL's representation at a data ``version``.
+
+    The absolute URI (host, path and query) and the negotiated media type are
+    part of the tag, since they change the body for the same data.
+    """
+    variant = '|'.join((
+        str(version),
+        request.build_absolute_uri(),
+        getattr(request, 'accepted_media_type', '') or '',
+    ))
+    return '"%s"' % hashlib.md5(variant.encode(), usedforsecurity=False).hexdigest()
+
+
+def respond(request, etag, last_modified, build_response, private=False):
+    """
+    304 when the request's preconditions match ``etag`` / ``last_modified``
+    (a Unix timestamp), otherwise ``build_response()``; either way with the
+    validators attached.
+    """
+    response = _not_modified(request, etag, last_modified)
+    if response is None:
+        response = build_response()
+    return _add_validators(response, etag, last_modified, private)
+
+
+async def arespond(request, etag, last_modified, build_response, private=False):
+    """``respond`` for async views, where ``build_response`` is a coroutine function."""
+    response = _not_modified(request, etag, last_modified)
+    if response is None:
+        response = await build_response()
+    return _add_validators(response, etag, last_modified, private)
+
+
+def _not_modified(request, etag, last_modified):
+    if request.method in SAFE_METHODS:
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return None
+
+
+def _add_validators(response, etag, last_modified, private):
+    if response.status_code in (200, 304):
+        if etag:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Let caches store the body but revalidate it on every use.
+        if private:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+    return response
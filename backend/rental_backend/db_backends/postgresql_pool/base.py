@@ -0,0 +1,172 @@
+"""
+PostgreSQL backend with an in-process connection pool.
+
+Django's ``close()`` at the end of a request (``CONN_MAX_AGE = 0``) or on
+expiry hands the psycopg2 connection back to a per-process pool instead of
+closing it, and the next ``connect()`` on any thread takes an idle one, so
+requests skip the TCP, TLS and authentication handshake.
+
+Configured through ``OPTIONS['pool']``::
+
+    'OPTIONS': {'pool': {'max_size': 10, 'timeout': 30}}
+
+``max_size`` caps open connections per process; when all are checked out,
+``connect()`` waits up to ``timeout`` seconds and then raises
+``OperationalError``. With ``CONN_HEALTH_CHECKS`` enabled, connections that
+sat idle for longer than ``IDLE_CHECK_SECONDS`` are pinged before reuse.
+"""
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+from django.db.backends.postgresql import base, creation
+
+DEFAULT_MAX_SIZE = 10
+DEFAULT_TIMEOUT = 30
+IDLE_CHECK_SECONDS = 30
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of open psycopg2 connections."""
+
+    def __init__(self, dbname, max_size=DEFAULT_MAX_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.dbname = dbname
+        self.max_size = max_size
+        self.timeout = timeout
+        self.isolation_level = None
+        self._idle = []  # (connection, released_at)
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, health_checks=False):
+        """An idle connection, or None when the caller may open a new one."""
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                while self._idle:
+                    connection, released_at = self._idle.pop()
+                    stale = health_checks and time.monotonic() - released_at > IDLE_CHECK_SECONDS
+                    if not connection.closed and not (stale and not _ping(connection)):
+                        return connection
+                    self._discard(connection)
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise psycopg2.OperationalError(
+                        f'Connection pool for {self.dbname!r} exhausted '
+                        f'({self.max_size} connections in use)'
+                    )
+                self._condition.wait(remaining)
+
+    def cancel(self):
+        """Give back a slot reserved by ``acquire`` whose connect failed."""
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def release(self, connection):
+        reusable = not connection.closed
+        if reusable:
+            status = connection.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                reusable = False
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    reusable = False
+        with self._condition:
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+            self._condition.notify()
+
+    def close_idle(self):
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+    def _discard(self, connection):
+        # Caller holds the condition.
+        self._size -= 1
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+
+def _ping(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def get_pool(alias, conn_params, options):
+    # Keyed by process so forked workers never share sockets.
+    key = (os.getpid(), alias, tuple(sorted((name, repr(value)) for name, value in conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                conn_params.get('dbname'),
+                max_size=int(options.get('max_size', DEFAULT_MAX_SIZE)),
+                timeout=float(options.get('timeout', DEFAULT_TIMEOUT)),
+            )
+        return pool
+
+
+def close_pools(dbname=None):
+    """Close idle pooled connections (to ``dbname`` only, when given)."""
+    with _pools_lock:
+        pools = [pool for pool in _pools.values() if dbname is None or pool.dbname == dbname]
+    for pool in pools:
+        pool.close_idle()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would block DROP DATABASE.
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, conn_params, self.settings_dict['OPTIONS'].get('pool') or {})
+        connection = pool.acquire(health_checks=self.settings_dict['CONN_HEALTH_CHECKS'])
+        if connection is None:
+            try:
+                connection = super().get_new_connection(conn_params)
+            except BaseException:
+                pool.cancel()
+                raise
+            pool.isolation_level = self.isolation_level
+        else:
+            self.isolation_level = pool.isolation_level
+        self.connection_pool = pool
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.connection_pool.release(self.connection)
@@ -0,0 +1,48 @@
+"""
+SQLite backend for production use (``SQLITE_PRODUCTION_MODE``).
+
+* Every new connection gets the pragmas below (applied on
+  ``connection_created``): WAL so readers never block the writer,
+  ``synchronous=NORMAL`` (durable at checkpoints rather than every commit,
+  safe with WAL), a memory-mapped read path, a larger page cache and a busy
+  timeout so writers queue instead of failing. Override or extend them with
+  ``OPTIONS['pragmas']``.
+* Transactions start with ``BEGIN IMMEDIATE``. A deferred transaction that
+  reads and then writes has to upgrade its lock; if another connection wrote
+  in between, SQLite fails it with "database is locked" straight away instead
+  of waiting. Taking the write lock up front makes writers wait their turn.
+"""
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # KiB
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pragmas(self):
+        return {**DEFAULT_PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    for name, value in connection.pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+connection_created.connect(apply_pragmas, sender=DatabaseWrapper)
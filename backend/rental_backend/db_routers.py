@@ -0,0 +1,138 @@
+"""
+Read-replica routing for analytics views.
+
+Views marked with ``@use_replica`` read from the ``reporting`` database alias
+(a streaming replica, or a SQLite copy refreshed with
+``python manage.py refresh_reporting_db``); everything else, and every write,
+uses ``default``. Without a ``reporting`` alias the marker does nothing.
+
+Read-your-writes: ``ReplicaPinMiddleware`` records when an authenticated user
+last changed something. While the replica may predate that write (its copy
+time for SQLite, ``REPLICA_MAX_LAG`` seconds otherwise), that user's marked
+views keep reading from ``default``. Pins live in the Django cache, so workers
+only see each other's pins with a shared cache (``REDIS_URL``).
+"""
+import functools
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+REPLICA_ALIAS = 'reporting'
+PIN_KEY = 'db:replica-pin:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_synced_at():
+    """
+    Time up to which the replica is known to contain every committed write,
+    or None when it is unusable (e.g. the SQLite copy was never made).
+    """
+    if not replica_configured():
+        return None
+    settings_dict = connections.databases[REPLICA_ALIAS]
+    if settings_dict['ENGINE'] == 'django.db.backends.sqlite3':
+        try:
+            # refresh_reporting_db stamps the copy with the time it started
+            return os.path.getmtime(settings_dict['NAME'])
+        except OSError:
+            return None
+    return time.time() - getattr(settings, 'REPLICA_MAX_LAG', 5)
+
+
+def pin_to_primary(user):
+    """Record that ``user`` just wrote, so their replica reads wait for it."""
+    ttl = max(getattr(settings, 'REPLICA_PIN_TTL', 3600), getattr(settings, 'REPLICA_MAX_LAG', 5))
+    cache.set(PIN_KEY.format(user.pk), time.time(), ttl)
+
+
+def can_read_replica(user=None):
+    synced_at = replica_synced_at()
+    if synced_at is None:
+        return False
+    if user is not None and user.is_authenticated:
+        last_write = cache.get(PIN_KEY.format(user.pk))
+        if last_write is not None and last_write >= synced_at:
+            return False
+    return True
+
+
+def use_replica(view):
+    """
+    Send the view's ORM reads to the reporting replica. Apply it innermost,
+    below ``@api_view`` and ``@permission_classes``.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _use_replica.set(can_read_replica(getattr(request, 'user', None)))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Route reads inside ``@use_replica`` views to the reporting alias."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary.
+        return db != REPLICA_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """Pin users to the primary after requests that changed data."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._changed_data(request, response):
+            self._pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # Safe requests, the common case, never touch the user or the cache.
+        if self._changed_data(request, response):
+            await sync_to_async(self._pin)(request)
+        return response
+
+    def _changed_data(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400 and replica_configured()
+
+    def _pin(self, request):
+        # DRF copies the user it authenticated onto the Django request.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
@@ -0,0 +1,119 @@
+"""
+Concurrent evaluation of independent dashboard sections.
+
+A dashboard declares its sections as ``{name: callable}`` and passes them to
+``run_sections``. Each callable runs on a worker thread with its own database
+connection, because Django connections are per thread, so wall time
+approaches the slowest section rather than the sum of all of them. The
+caller's context variables, such as the ``use_replica`` routing flag, are
+copied into every section.
+
+Sections must return evaluated data (numbers, lists, dicts), not lazy
+querysets. Inside a transaction they run one after another in the calling
+thread, since other connections cannot see its uncommitted rows.
+``DASHBOARD_SECTION_WORKERS`` caps the threads per process; ``0`` disables
+concurrency.
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+_executor = None
+_executor_pid = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers):
+    global _executor, _executor_pid, _executor_workers
+    with _executor_lock:
+        # One pool per process; forked workers must not inherit the parent's threads.
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dashboard-section')
+            _executor_pid = os.getpid()
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown():
+    """
+    Stop the worker threads and close their database connections, e.g. before
+    dropping a test database they may still be connected to.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is None:
+        return
+    # One task per thread: each waits until all are running, so every worker
+    # thread closes its own connections.
+    barrier = threading.Barrier(_executor_workers)
+
+    def close_connections():
+        barrier.wait()
+        connections.close_all()
+
+    for future in [executor.submit(close_connections) for _ in range(_executor_workers)]:
+        future.result()
+    executor.shutdown()
+
+
+def _in_transaction():
+    return any(conn.in_atomic_block for conn in connections.all(initialized_only=True))
+
+
+def _timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _run_in_worker(func):
+    try:
+        return _timed(func)
+    finally:
+        # What the request cycle does for request threads: close connections
+        # that are broken or past CONN_MAX_AGE (every one, when it is 0).
+        close_old_connections()
+
+
+def run_sections(sections):
+    """
+    Evaluate ``{name: callable}`` and return ``(results, meta)``: the return
+    values by name, and per-section and total wall time in milliseconds. The
+    first exception raised by a section propagates once all have finished.
+    """
+    workers = getattr(settings, 'DASHBOARD_SECTION_WORKERS', 4)
+    concurrent = workers > 1 and len(sections) > 1 and not _in_transaction()
+
+    started = time.perf_counter()
+    if concurrent:
+        executor = _get_executor(workers)
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, _run_in_worker, func)
+            for name, func in sections.items()
+        }
+        outcomes = {}
+        error = None
+        for name, future in futures.items():
+            try:
+                outcomes[name] = future.result()
+            except Exception as exc:
+                error = error or exc
+        if error is not None:
+            raise error
+    else:
+        outcomes = {name: _timed(func) for name, func in sections.items()}
+
+    results = {name: result for name, (result, _) in outcomes.items()}
+    meta = {
+        'concurrent': concurrent,
+        'total_ms': round((time.perf_counter() - started) * 1000, 2),
+        'sections': {name: round(elapsed, 2) for name, (_, elapsed) in outcomes.items()},
+    }
+    return results, meta
@@ -0,0 +1,170 @@
+"""
+Per-request SQL instrumentation and N+1 detection.
+
+``SQLInstrumentationMiddleware`` is off unless ``SQL_INSTRUMENTATION_ENABLED``
+is set, and then records a ``SQL_INSTRUMENTATION_SAMPLE_RATE`` share of
+requests. For each recorded request it adds::
+
+    Server-Timing: db;dur=12.41;desc="17 queries"
+
+and logs one JSON line to the ``rental_backend.sql`` logger with the query
+count, total SQL time and the statements repeated at least
+``SQL_INSTRUMENTATION_REPEAT_THRESHOLD`` times. A repeated statement is
+usually an N+1: a loop touching ``booking.vehicle.name`` runs the same
+single-row ``SELECT ... WHERE id = %s`` once per booking. Those lines are
+logged at WARNING.
+
+Queries are matched on Django's SQL before parameters are substituted, so
+grouping them is a dict lookup. One execute wrapper is installed per database
+connection when it opens. The wrapper finds the current request's recorder
+through a context variable, so queries that run in ``sync_to_async`` threads
+and in ``run_sections`` workers are counted too. Unsampled requests only pay
+for a context variable lookup per query.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('rental_backend.sql')
+
+_recorder = ContextVar('sql_recorder', default=None)
+
+# "IN (%s, %s, %s)" and "IN (%s)" are the same statement for grouping
+_PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+TEMPLATE_LOG_LENGTH = 300
+
+
+class QueryRecorder:
+    """Query count, time and statement repeats for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.templates = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.count += 1
+                self.duration += elapsed
+                self.templates[sql] += 1
+
+    def repeated(self, threshold):
+        """``[(template, count)]`` for statements run at least ``threshold`` times."""
+        grouped = Counter()
+        for sql, count in self.templates.items():
+            grouped[_PLACEHOLDER_LIST.sub('(%s, ...)', sql)] += count
+        return [(sql, count) for sql, count in grouped.most_common() if count >= threshold]
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def install():
+    """Wrap every connection opened from now on, and those already open."""
+    connection_created.connect(_install_wrapper, dispatch_uid='sql_instrumentation')
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _install_wrapper(None, connection)
+
+
+@contextmanager
+def recording():
+    """Record the queries run inside the block, e.g. for benchmarks."""
+    install()
+    recorder = QueryRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+class SQLInstrumentationMiddleware:
+    """Record queries for sampled requests; see the module docstring."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'SQL_INSTRUMENTATION_SAMPLE_RATE', 1.0)
+        self.threshold = getattr(settings, 'SQL_INSTRUMENTATION_REPEAT_THRESHOLD', 5)
+        install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        token = _recorder.set(QueryRecorder())
+        try:
+            response = self.get_response(request)
+            self._report(request, response, _recorder.get())
+        finally:
+            _recorder.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        token = _recorder.set(QueryRecorder())
+        try:
+            response = await self.get_response(request)
+            self._report(request, response, _recorder.get())
+        finally:
+            _recorder.reset(token)
+        return response
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def _report(self, request, response, recorder):
+        sql_ms = round(recorder.duration * 1000, 2)
+        timing = f'db;dur={sql_ms};desc="{recorder.count} queries"'
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        repeated = recorder.repeated(self.threshold)
+        record = {
+            'event': 'sql',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': sql_ms,
+            'distinct_queries': len(recorder.templates),
+            'n_plus_one': [
+                {'count': count, 'sql': sql[:TEMPLATE_LOG_LENGTH]} for sql, count in repeated
+            ],
+        }
+        logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(record))
@@ -7,7 +7,12 @@ urlpatterns = [
     path('admin/customers/create/', admin_views.AdminCustomerCreateView.as_view(), name='admin-customer-create'),
     path('admin/customers/<int:pk>/', admin_views.AdminCustomerDetailView.as_view(), name='admin-customer-detail'),
     path('admin/customers/analytics/', admin_views.customer_analytics, name='admin-customer-analytics'),
+    path('admin/customers/cohorts/', admin_views.customer_cohorts, name='admin-customer-cohorts'),
     path('admin/customers/<int:customer_id>/analytics/', admin_views.customer_detail_analytics, name='admin-customer-detail-analytics'),
+    path('admin/customers/profiles/', admin_views.customer_profiles, name='admin-customer-profiles'),
     path('admin/customers/bulk-operations/', admin_views.admin_bulk_customer_operations, name='admin-bulk-customer-operations'),
     path('admin/customers/export/', admin_views.customer_export, name='admin-customer-export'),
+    
+    # Operations
+    path('admin/auth-cache/metrics/', admin_views.auth_cache_metrics, name='admin-auth-cache-metrics'),
 ]
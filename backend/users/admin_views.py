@@ -2,24 +2,55 @@ from rest_framework import generics, status, permissions, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from django.db.models import Q, Count, Sum, Avg
+from decimal import Decimal
+from django.db.models import Q, F, Count, Sum, Avg, DecimalField
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from .models import User
-from .serializers import UserProfileSerializer, UserUpdateSerializer, AdminCustomerCreateSerializer
-from bookings.models import Booking
+from .authentication import cache_stats, evict_user_tokens
+from .cohorts import retention as cohort_retention
+from .profiles import build_profile, build_profiles
+from .serializers import (
+    UserProfileSerializer, UserUpdateSerializer, AdminCustomerCreateSerializer, AdminCustomerListSerializer,
+)
+from bookings.models import CustomerStats
+from bookings.segments import NO_BOOKINGS, SEGMENTS
+from bookings.stats import customer_leaderboard
+from rental_backend.db_routers import use_replica
+
+
+# Longest cohort range and retention horizon, in months
+COHORT_MAX_MONTHS = 60
+
+# Most customers per customer_profiles request
+PROFILE_BATCH_MAX = 100
 
 
 # ==================== ADMIN CUSTOMER MANAGEMENT ====================
 
 class AdminCustomerListView(generics.ListAPIView):
     """Admin view to list all customers with filtering and search."""
-    queryset = User.objects.filter(role='customer')
-    serializer_class = UserProfileSerializer
+    serializer_class = AdminCustomerListSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['username', 'email', 'first_name', 'last_name', 'phone_number']
     ordering_fields = ['created_at', 'username', 'email']
     ordering = ['-created_at']
+    
+    def get_queryset(self):
+        queryset = User.objects.filter(role='customer').annotate(segment=F('customer_stats__segment'))
+        
+        # Filter by RFM segment, e.g. ?segment=at_risk,cant_lose
+        segment_filter = self.request.query_params.get('segment')
+        if segment_filter:
+            segments = segment_filter.split(',')
+            condition = Q(customer_stats__segment__in=segments)
+            if NO_BOOKINGS in segments:
+                # Customers who have never booked have no stats row
+                condition |= Q(customer_stats__isnull=True)
+            queryset = queryset.filter(condition)
+        
+        return queryset
 
 
 class AdminCustomerCreateView(generics.CreateAPIView):
@@ -47,6 +78,7 @@ class AdminCustomerDetailView(generics.RetrieveUpdateAPIView):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def customer_analytics(request):
     """Get comprehensive customer analytics for admin."""
     from datetime import datetime, timedelta
@@ -62,11 +94,14 @@ def customer_analytics(request):
         created_at__gte=start_date
     ).count()
     
-    # Active customers (with bookings in date range)
-    active_customers = User.objects.filter(
-        role='customer',
-        bookings__created_at__gte=start_date
-    ).distinct().count()
+    # Activity counts and averages in one pass over the stats table
+    totals = CustomerStats.objects.filter(user__role='customer').aggregate(
+        # Active customers (with bookings in date range)
+        active=Count('pk', filter=Q(last_booking_at__gte=start_date)),
+        bookings=Sum('booking_count'),
+        avg_spent=Avg('total_spent', filter=Q(booking_count__gt=0)),
+    )
+    active_customers = totals['active']
     
     # Customer registration trends
     registration_trends = []
@@ -81,51 +116,23 @@ def customer_analytics(request):
             'count': count
         })
     
-    # Top customers by bookings
-    top_customers_by_bookings = User.objects.filter(
-        role='customer'
-    ).annotate(
-        booking_count=Count('bookings'),
-        total_spent=Sum('bookings__total_amount')
-    ).filter(booking_count__gt=0).order_by('-booking_count')[:10]
+    # Top customers by bookings and by revenue
+    top_customers_by_bookings = customer_leaderboard('booking_count', 10)
+    top_customers_by_revenue = customer_leaderboard('total_spent', 10)
     
-    # Top customers by revenue
-    top_customers_by_revenue = User.objects.filter(
-        role='customer'
-    ).annotate(
-        total_spent=Sum('bookings__total_amount')
-    ).filter(total_spent__isnull=False).order_by('-total_spent')[:10]
-    
-    # Customer segments
-    customer_segments = {
-        'new_customers': User.objects.filter(
-            role='customer',
-            bookings__isnull=True
-        ).count(),
-        'repeat_customers': User.objects.filter(
-            role='customer'
-        ).annotate(
-            booking_count=Count('bookings')
-        ).filter(booking_count__gt=1).count(),
-        'vip_customers': User.objects.filter(
-            role='customer'
-        ).annotate(
-            total_spent=Sum('bookings__total_amount')
-        ).filter(total_spent__gte=1000).count(),
-    }
+    # RFM segments, as stored by the last segment_customers run
+    customer_segments = dict.fromkeys((name for name, _ in SEGMENTS), 0)
+    customer_segments['unscored'] = 0
+    for row in (CustomerStats.objects.filter(user__role='customer')
+                .order_by().values('segment').annotate(count=Count('pk'))):
+        # A blank segment is a first booking since the last run
+        customer_segments[row['segment'] or 'unscored'] = row['count']
+    # Customers without a stats row have never booked
+    customer_segments[NO_BOOKINGS] += total_customers - sum(customer_segments.values())
     
     # Average customer metrics
-    avg_bookings_per_customer = User.objects.filter(
-        role='customer'
-    ).annotate(
-        booking_count=Count('bookings')
-    ).aggregate(avg=Avg('booking_count'))['avg'] or 0
-    
-    avg_spent_per_customer = User.objects.filter(
-        role='customer'
-    ).annotate(
-        total_spent=Sum('bookings__total_amount')
-    ).filter(total_spent__isnull=False).aggregate(avg=Avg('total_spent'))['avg'] or 0
+    avg_bookings_per_customer = (totals['bookings'] or 0) / total_customers if total_customers else 0
+    avg_spent_per_customer = totals['avg_spent'] or 0
     
     return Response({
         'overview': {
@@ -139,26 +146,52 @@ def customer_analytics(request):
         'customer_segments': customer_segments,
         'top_customers_by_bookings': [
             {
-                'id': customer.id,
-                'username': customer.username,
-                'email': customer.email,
-                'booking_count': customer.booking_count,
-                'total_spent': float(customer.total_spent or 0)
+                'id': stats.user.id,
+                'username': stats.user.username,
+                'email': stats.user.email,
+                'booking_count': stats.booking_count,
+                'total_spent': float(stats.total_spent)
             }
-            for customer in top_customers_by_bookings
+            for stats in top_customers_by_bookings
         ],
         'top_customers_by_revenue': [
             {
-                'id': customer.id,
-                'username': customer.username,
-                'email': customer.email,
-                'total_spent': float(customer.total_spent or 0)
+                'id': stats.user.id,
+                'username': stats.user.username,
+                'email': stats.user.email,
+                'total_spent': float(stats.total_spent)
             }
-            for customer in top_customers_by_revenue
+            for stats in top_customers_by_revenue
         ]
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+@use_replica
+def customer_cohorts(request):
+    """
+    Registration cohort retention: for each of the last ``cohorts`` months,
+    how many customers who registered then booked in each of the following
+    ``months`` months.
+    """
+    try:
+        cohorts = int(request.GET.get('cohorts', 12))
+        months = int(request.GET.get('months', 12))
+    except ValueError:
+        return Response(
+            {'error': 'cohorts and months must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 1 <= cohorts <= COHORT_MAX_MONTHS or not 1 <= months <= COHORT_MAX_MONTHS:
+        return Response(
+            {'error': f'cohorts and months must be between 1 and {COHORT_MAX_MONTHS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response(cohort_retention(cohorts=cohorts, months=months))
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def customer_detail_analytics(request, customer_id):
@@ -171,65 +204,37 @@ def customer_detail_analytics(request, customer_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Customer booking statistics
-    bookings = Booking.objects.filter(user=customer)
-    total_bookings = bookings.count()
-    completed_bookings = bookings.filter(status='completed').count()
-    active_bookings = bookings.filter(status='active').count()
-    cancelled_bookings = bookings.filter(status='cancelled').count()
-    
-    # Revenue statistics
-    total_spent = bookings.filter(payment_status='paid').aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
-    
-    avg_booking_value = bookings.filter(payment_status='paid').aggregate(
-        avg=Avg('total_amount')
-    )['avg'] or 0
-    
-    # Recent bookings
-    recent_bookings = bookings.order_by('-created_at')[:5]
-    
-    # Favorite vehicle categories
-    favorite_categories = bookings.values(
-        'vehicle__category__name'
-    ).annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    # Booking patterns
-    booking_patterns = {
-        'most_common_duration': bookings.values('total_days').annotate(
-            count=Count('id')
-        ).order_by('-count').first(),
-        'most_common_pickup_location': bookings.values('pickup_location').annotate(
-            count=Count('id')
-        ).order_by('-count').first(),
-    }
-    
     return Response({
         'customer': UserProfileSerializer(customer).data,
-        'booking_stats': {
-            'total_bookings': total_bookings,
-            'completed_bookings': completed_bookings,
-            'active_bookings': active_bookings,
-            'cancelled_bookings': cancelled_bookings,
-            'total_spent': float(total_spent),
-            'avg_booking_value': float(avg_booking_value),
-        },
-        'recent_bookings': [
-            {
-                'id': booking.id,
-                'vehicle': booking.vehicle.name,
-                'start_date': booking.start_date,
-                'end_date': booking.end_date,
-                'status': booking.status,
-                'total_amount': float(booking.total_amount)
-            }
-            for booking in recent_bookings
-        ],
-        'favorite_categories': list(favorite_categories),
-        'booking_patterns': booking_patterns
+        **build_profile(customer.id),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def customer_profiles(request):
+    """Batch form of customer_detail_analytics: ``?ids=1,2,3``, in that order."""
+    try:
+        customer_ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return Response(
+            {'error': 'ids must be a comma-separated list of customer ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 1 <= len(customer_ids) <= PROFILE_BATCH_MAX:
+        return Response(
+            {'error': f'Between 1 and {PROFILE_BATCH_MAX} ids are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    customers = User.objects.in_bulk(customer_ids)
+    customers = [customers[pk] for pk in customer_ids if pk in customers and customers[pk].role == 'customer']
+    profiles = build_profiles([customer.id for customer in customers])
+    return Response({
+        'profiles': [
+            {'customer': UserProfileSerializer(customer).data, **profiles[customer.id]}
+            for customer in customers
+        ]
     })
 
 
@@ -253,9 +258,12 @@ def admin_bulk_customer_operations(request):
         message = f'{customers.count()} customers activated'
     elif operation == 'deactivate':
         customers.update(is_active=False)
+        # update() skips signals, so cached tokens are dropped explicitly
+        evict_user_tokens(customers.values_list('id', flat=True))
         message = f'{customers.count()} customers deactivated'
     elif operation == 'delete':
         count = customers.count()
+        evict_user_tokens(customers.values_list('id', flat=True))
         customers.delete()
         message = f'{count} customers deleted'
     else:
@@ -267,6 +275,13 @@ def admin_bulk_customer_operations(request):
     return Response({'message': message})
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def auth_cache_metrics(request):
+    """Token authentication cache hit/miss counters for the serving process."""
+    return Response(cache_stats())
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def customer_export(request):
@@ -279,10 +294,11 @@ def customer_export(request):
     end_date = request.GET.get('end_date')
     has_bookings = request.GET.get('has_bookings')
     
-    # Build queryset
+    # Build queryset; the totals come from the stats row, not from the bookings
     customers = User.objects.filter(role='customer').annotate(
-        booking_count=Count('bookings'),
-        total_spent=Sum('bookings__total_amount')
+        booking_count=Coalesce('customer_stats__booking_count', 0),
+        total_spent=Coalesce('customer_stats__total_spent', Decimal('0'),
+                             output_field=DecimalField(max_digits=14, decimal_places=2))
     )
     
     if start_date:
@@ -305,7 +321,7 @@ def customer_export(request):
         'Total Spent', 'Created At', 'Is Active'
     ])
     
-    for customer in customers:
+    for customer in customers.iterator(chunk_size=2000):
         writer.writerow([
             customer.id,
             customer.username,
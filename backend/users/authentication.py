@@ -0,0 +1,140 @@
+"""
+Token authentication backed by a two-level cache.
+
+DRF's ``TokenAuthentication`` runs a ``Token`` join ``User`` query on every
+request. ``CachedTokenAuthentication`` keeps the resolved user in a small
+in-process LRU (``TOKEN_AUTH_LOCAL_TTL``, a few seconds) in front of the Django
+cache (``TOKEN_AUTH_CACHE_TTL``), so repeated requests with the same token run
+no auth queries at all.
+
+Revocation: logout, user deactivation/deletion, token deletion and user saves
+evict the token from the shared cache and from this process's LRU. Other
+processes drop their LRU copy when its local TTL runs out, so the local TTL is
+the upper bound on how long a revoked token keeps working elsewhere. Without
+``REDIS_URL`` the Django cache is per-process too (``LocMemCache``), so its
+entries are kept no longer than the local TTL either.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+CACHE_PREFIX = 'auth:token:'
+
+_lock = threading.Lock()
+_local = OrderedDict()  # cache key -> (expires_at, user)
+_stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache_key(token_key):
+    # Raw tokens never leave the process as cache keys.
+    return CACHE_PREFIX + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def _local_get(cache_key):
+    with _lock:
+        entry = _local.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del _local[cache_key]
+            return None
+        _local.move_to_end(cache_key)
+        return user
+
+
+def _local_set(cache_key, user):
+    ttl = _setting('TOKEN_AUTH_LOCAL_TTL', 5)
+    size = _setting('TOKEN_AUTH_LRU_SIZE', 1024)
+    if ttl <= 0 or size <= 0:
+        return
+    with _lock:
+        _local[cache_key] = (time.monotonic() + ttl, user)
+        _local.move_to_end(cache_key)
+        while len(_local) > size:
+            _local.popitem(last=False)
+
+
+def _cache_ttl():
+    ttl = _setting('TOKEN_AUTH_CACHE_TTL', 300)
+    if isinstance(caches['default'], LocMemCache):
+        # Evictions never reach the other processes' copies
+        return min(ttl, _setting('TOKEN_AUTH_LOCAL_TTL', 5))
+    return ttl
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that resolves tokens from cache when it can."""
+
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+
+        user = _local_get(cache_key)
+        if user is not None:
+            _count('local_hits')
+        else:
+            user = cache.get(cache_key)
+            if user is not None:
+                _count('shared_hits')
+                _local_set(cache_key, user)
+            else:
+                _count('misses')
+                user = self._load_user(key)
+                cache.set(cache_key, user, _cache_ttl())
+                _local_set(cache_key, user)
+
+        # Views may modify request.user; never hand out the cached instance.
+        return copy.copy(user), key
+
+    def _load_user(self, key):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user
+
+
+def evict_token(token_key):
+    """Drop one token from the shared cache and this process's LRU."""
+    cache_key = _cache_key(token_key)
+    cache.delete(cache_key)
+    with _lock:
+        _local.pop(cache_key, None)
+
+
+def evict_user_tokens(user_ids):
+    """Drop the tokens of the given users (call before deleting them)."""
+    for token_key in Token.objects.filter(user_id__in=list(user_ids)).values_list('key', flat=True):
+        evict_token(token_key)
+
+
+def cache_stats():
+    """Hit/miss counters for this process since it started."""
+    with _lock:
+        stats = dict(_stats)
+        stats['local_entries'] = len(_local)
+    lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+    stats['lookups'] = lookups
+    stats['hit_ratio'] = round((stats['local_hits'] + stats['shared_hits']) / lookups, 4) if lookups else None
+    return stats
@@ -0,0 +1,151 @@
+"""
+Registration cohort retention.
+
+Customers are grouped by the month they registered (their cohort). For each
+cohort the matrix counts how many of its customers made at least one booking
+in each month since registering: month 0 is the registration month itself.
+Months follow the ``TIME_ZONE`` calendar.
+
+The counts come from one scan of ``(user_id, cohort month, booking month)``
+rows ordered by user and booking time. NumPy drops repeated
+``(user, months since)`` pairs from the ordered arrays and ``bincount`` sums
+the rest into the matrix.
+
+A cohort is closed once every month in the requested horizon has ended; its
+row can no longer change, so it is kept in the Django cache with no expiry
+and later requests only scan the bookings of open cohorts. Closed rows are
+always computed on the primary database, since a reporting copy taken before
+their horizon ended would be cached with bookings missing. User and booking
+deletes invalidate the cache (``bookings.signals``); loading backdated
+bookings or users (``generate_fleet``) must call ``invalidate()``. Without a
+shared cache the invalidation only reaches the process that made the write,
+so there rows and the version expire within ``LOCAL_CACHE_MAX_TTL``
+(``rental_backend.caching``).
+"""
+import time
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+import numpy as np
+
+from bookings.models import Booking
+from rental_backend import caching
+from .models import User
+
+CACHE_PREFIX = 'cohorts:'
+VERSION_KEY = CACHE_PREFIX + 'version'
+
+
+def _month_index(year, month):
+    return year * 12 + month - 1
+
+
+def _month_start(index):
+    return timezone.make_aware(datetime(index // 12, index % 12 + 1, 1))
+
+
+def _label(index):
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def _version():
+    # An expired version restarts from a new number, never an old row's
+    return cache.get_or_set(VERSION_KEY, time.time_ns, caching.ttl(None))
+
+
+def invalidate():
+    """Drop every cached cohort row."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), caching.ttl(None))
+
+
+def _cache_key(version, cohort, months):
+    return f'{CACHE_PREFIX}v{version}:{_label(cohort)}:{months}'
+
+
+def _compute(first, last, months, using=None):
+    """Return ``{cohort: {'size', 'active'}}`` for cohort month indexes first..last."""
+    registered = {'role': 'customer', 'created_at__gte': _month_start(first),
+                  'created_at__lt': _month_start(last + 1)}
+    users = User.objects.using(using).filter(**registered).order_by()
+    sizes = np.zeros(last - first + 1, dtype=np.int64)
+    for row in (users.annotate(year=ExtractYear('created_at'), month=ExtractMonth('created_at'))
+                .values('year', 'month').annotate(count=Count('id'))):
+        sizes[_month_index(row['year'], row['month']) - first] = row['count']
+
+    rows = list(
+        Booking.objects.using(using)
+        .filter(**{f'user__{name}': value for name, value in registered.items()})
+        .order_by('user_id', 'created_at')
+        .values_list(
+            'user_id', ExtractYear('user__created_at'), ExtractMonth('user__created_at'),
+            ExtractYear('created_at'), ExtractMonth('created_at'),
+        )
+    )
+    active = np.zeros((last - first + 1, months), dtype=np.int64)
+    if rows:
+        user_ids, cohort_years, cohort_months, years, booking_months = (
+            np.array(column, dtype=np.int64) for column in zip(*rows)
+        )
+        cohorts = _month_index(cohort_years, cohort_months)
+        since = _month_index(years, booking_months) - cohorts
+        # Rows are ordered by user and time, so since never decreases within a
+        # user and a repeat of the previous (user, since) pair is a repeat booking.
+        new = np.ones(user_ids.size, dtype=bool)
+        new[1:] = (user_ids[1:] != user_ids[:-1]) | (since[1:] != since[:-1])
+        keep = new & (since >= 0) & (since < months)
+        cells = (cohorts[keep] - first) * months + since[keep]
+        active = np.bincount(cells, minlength=active.size).reshape(active.shape)
+
+    return {
+        cohort: {'size': int(sizes[cohort - first]), 'active': active[cohort - first].tolist()}
+        for cohort in range(first, last + 1)
+    }
+
+
+def retention(cohorts=12, months=12, using=None):
+    """
+    The retention matrix for the ``cohorts`` most recent registration months,
+    ``months`` months deep, newest cohort first. Also returns how many rows
+    came from the cache.
+    """
+    now = timezone.localtime()
+    current = _month_index(now.year, now.month)
+    first = current - cohorts + 1
+    # Closed: the cohort's last month in the horizon has ended
+    closed = range(first, current - months + 1)
+
+    version = _version()
+    keys = {cohort: _cache_key(version, cohort, months) for cohort in closed}
+    cached = cache.get_many(keys.values())
+    table = {cohort: cached[key] for cohort, key in keys.items() if key in cached}
+
+    # Rows kept forever are read from the primary; a reporting copy may predate
+    # the end of their horizon. Open rows follow the router.
+    missing_closed = [cohort for cohort in closed if cohort not in table]
+    if missing_closed:
+        computed = _compute(missing_closed[0], missing_closed[-1], months, using=DEFAULT_DB_ALIAS)
+        table.update((cohort, computed[cohort]) for cohort in missing_closed)
+        cache.set_many({keys[cohort]: table[cohort] for cohort in missing_closed}, caching.ttl(None))
+    table.update(_compute(max(first, closed.stop), current, months, using=using))
+
+    rows = []
+    for cohort in range(current, first - 1, -1):
+        row = table[cohort]
+        # Months that have not started yet are left off open cohorts
+        active = row['active'][:current - cohort + 1]
+        rows.append({
+            'cohort': _label(cohort),
+            'size': row['size'],
+            'closed': cohort in keys,
+            'active': active,
+            'retention': [round(count / row['size'] * 100, 1) if row['size'] else 0.0 for count in active],
+        })
+    return {'months': months, 'cohorts': rows, 'cached_cohorts': len(cached)}
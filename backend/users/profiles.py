@@ -0,0 +1,120 @@
+"""
+Per-customer booking profiles for the admin customer analytics.
+
+``build_profiles`` loads the bookings of any number of customers with one
+query (vehicle and category joined) and computes every statistic in a single
+pass over them. Profiles are cached per customer until one of their bookings
+is saved or deleted: the booking signals call ``evict`` once the write
+commits. Writes that skip signals (``bulk_create``, ``QuerySet.update``) and
+vehicle renames show up when ``CUSTOMER_PROFILE_CACHE_TTL`` runs out.
+Without a shared cache ``evict`` only reaches the writing process, so
+profiles expire within ``LOCAL_CACHE_MAX_TTL`` (``rental_backend.caching``).
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bookings.models import Booking
+from rental_backend import caching
+
+CACHE_PREFIX = 'customer-profile:v1:'
+RECENT_BOOKINGS = 5
+FAVORITE_CATEGORIES = 5
+
+PROFILE_FIELDS = (
+    'id', 'user_id', 'status', 'payment_status', 'total_amount', 'total_days', 'pickup_location',
+    'start_date', 'end_date', 'created_at', 'vehicle__name', 'vehicle__category__name',
+)
+
+
+def _cache_key(user_id):
+    return f'{CACHE_PREFIX}{user_id}'
+
+
+def _most_common(counter, field):
+    if not counter:
+        return None
+    value, count = counter.most_common(1)[0]
+    return {field: value, 'count': count}
+
+
+def _profile(bookings):
+    """Every statistic for one customer's bookings, newest first."""
+    statuses = Counter()
+    paid_total = 0
+    paid_count = 0
+    categories = Counter()
+    durations = Counter()
+    locations = Counter()
+    for booking in bookings:
+        statuses[booking.status] += 1
+        if booking.payment_status == 'paid':
+            paid_total += booking.total_amount
+            paid_count += 1
+        categories[booking.vehicle.category.name] += 1
+        durations[booking.total_days] += 1
+        locations[booking.pickup_location] += 1
+
+    return {
+        'booking_stats': {
+            'total_bookings': len(bookings),
+            'completed_bookings': statuses['completed'],
+            'active_bookings': statuses['active'],
+            'cancelled_bookings': statuses['cancelled'],
+            'total_spent': float(paid_total),
+            'avg_booking_value': float(paid_total / paid_count) if paid_count else 0.0,
+        },
+        'recent_bookings': [
+            {
+                'id': booking.id,
+                'vehicle': booking.vehicle.name,
+                'start_date': booking.start_date,
+                'end_date': booking.end_date,
+                'status': booking.status,
+                'total_amount': float(booking.total_amount)
+            }
+            for booking in bookings[:RECENT_BOOKINGS]
+        ],
+        'favorite_categories': [
+            {'vehicle__category__name': name, 'count': count}
+            for name, count in categories.most_common(FAVORITE_CATEGORIES)
+        ],
+        'booking_patterns': {
+            'most_common_duration': _most_common(durations, 'total_days'),
+            'most_common_pickup_location': _most_common(locations, 'pickup_location'),
+        },
+    }
+
+
+def build_profiles(user_ids):
+    """
+    ``{user_id: profile}`` for ``user_ids``. Cached profiles are read in one
+    round trip; the rest come from one bookings query and are cached.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    keys = {user_id: _cache_key(user_id) for user_id in user_ids}
+    cached = cache.get_many(keys.values())
+    profiles = {user_id: cached[key] for user_id, key in keys.items() if key in cached}
+
+    missing = [user_id for user_id in user_ids if user_id not in profiles]
+    if missing:
+        bookings = {user_id: [] for user_id in missing}
+        for booking in (Booking.objects.filter(user_id__in=missing)
+                        .select_related('vehicle__category').only(*PROFILE_FIELDS)
+                        .order_by('user_id', '-created_at', '-id')):
+            bookings[booking.user_id].append(booking)
+        built = {user_id: _profile(rows) for user_id, rows in bookings.items()}
+        cache.set_many({keys[user_id]: profile for user_id, profile in built.items()},
+                       caching.ttl(getattr(settings, 'CUSTOMER_PROFILE_CACHE_TTL', 3600)))
+        profiles.update(built)
+    return profiles
+
+
+def build_profile(user_id):
+    return build_profiles([user_id])[user_id]
+
+
+def evict(user_ids):
+    """Drop the cached profiles of the given users."""
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
@@ -53,6 +53,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'email', 'role', 'created_at', 'updated_at')
 
 
+class AdminCustomerListSerializer(UserProfileSerializer):
+    segment = serializers.CharField(read_only=True, allow_null=True)
+    
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + ('segment',)
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
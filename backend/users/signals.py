@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .models import User
+from . import authentication
+
+
+@receiver(post_save, sender=User)
+def evict_saved_user_tokens(sender, instance, raw=False, **kwargs):
+    """Cached tokens carry a copy of the user; drop it when the user changes."""
+    if raw:
+        return
+    authentication.evict_user_tokens([instance.pk])
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    authentication.evict_token(instance.key)
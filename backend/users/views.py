@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import login, logout
 from .models import User
+from .authentication import evict_token
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
@@ -51,6 +52,8 @@ def login_view(request):
 @permission_classes([permissions.IsAuthenticated])
 def logout_view(request):
     """User logout endpoint."""
+    if request.auth:
+        evict_token(request.auth if isinstance(request.auth, str) else request.auth.key)
     try:
         request.user.auth_token.delete()
     except:
@@ -73,17 +76,15 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 def user_dashboard(request):
     """User dashboard with booking statistics."""
     user = request.user
-    from bookings.models import Booking
+    from bookings.stats import customer_stats_for
     
-    total_bookings = Booking.objects.filter(user=user).count()
-    active_bookings = Booking.objects.filter(user=user, status='confirmed').count()
-    completed_bookings = Booking.objects.filter(user=user, status='completed').count()
+    stats = customer_stats_for(user)
     
     return Response({
         'user': UserProfileSerializer(user).data,
         'stats': {
-            'total_bookings': total_bookings,
-            'active_bookings': active_bookings,
-            'completed_bookings': completed_bookings,
+            'total_bookings': stats.booking_count,
+            'active_bookings': stats.confirmed_count,
+            'completed_bookings': stats.completed_count,
         }
     })
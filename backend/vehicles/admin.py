@@ -38,7 +38,7 @@ class VehicleAdmin(admin.ModelAdmin):
             'fields': ('daily_rate', 'weekly_rate', 'monthly_rate')
         }),
         ('Location & Status', {
-            'fields': ('location', 'status')
+            'fields': ('location', 'latitude', 'longitude', 'status')
         }),
         ('Additional Information', {
             'fields': ('description', 'features', 'insurance_valid_until', 'main_image')
@@ -0,0 +1,240 @@
+"""
+Async versions of the public catalog endpoints, for serving under ASGI.
+
+DRF 3.14 has no async views, so these are plain Django async views that reuse
+the DRF views' filters, paginator and serializers and render with DRF's JSON
+renderer; the JSON bodies match the DRF views. Database reads use Django's
+async ORM, so a worker keeps accepting requests while queries are in flight.
+Code that only has a sync API (django-filter validation, full-text search,
+catalog snapshot rebuilds) runs through ``sync_to_async``.
+
+The URLs route here only with ``ASYNC_CATALOG_VIEWS=True``, which is meant
+for ASGI deployments; under a WSGI server these views would still work, one
+request per thread, so the default routes to the DRF views instead.
+"""
+import functools
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from bookings import pricing
+from bookings.models import Booking
+from rental_backend import conditional
+from .models import Vehicle
+from .search import search_vehicles
+from . import catalog
+from .geo import nearest_in_queryset
+from .serializers import VehicleListSerializer, VehicleDetailSerializer
+from .views import (
+    VehicleListView, VehicleDetailView, _apply_vehicle_filters, _geo_params, _with_distances, _embed_quotes,
+    _catalog_validators,
+)
+
+ALLOWED_METHODS = ('GET', 'HEAD')
+
+_renderer = JSONRenderer()
+
+
+def _json(data, status=status.HTTP_200_OK):
+    return HttpResponse(_renderer.render(data), status=status, content_type='application/json')
+
+
+def async_api_view(view):
+    """
+    Read-only async view: wraps the Django request in a DRF ``Request`` and
+    turns DRF exceptions into the same JSON errors DRF's handler would send.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ALLOWED_METHODS:
+            response = _json({'detail': f'Method "{request.method}" not allowed.'},
+                             status=status.HTTP_405_METHOD_NOT_ALLOWED)
+            response['Allow'] = ', '.join(ALLOWED_METHODS)
+            return response
+        try:
+            return await view(Request(request), *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return _json(detail, status=exc.status_code)
+
+    return wrapper
+
+
+async def _get_snapshot():
+    # Skip the thread hop when the snapshot is off; a rebuild may query the database.
+    if not catalog.is_enabled():
+        return None
+    return await sync_to_async(catalog.get_snapshot)()
+
+
+async def _catalog_response(request, snapshot, build_response, quote_version=None):
+    """Async counterpart of ``views._catalog_response``."""
+    if snapshot is None:
+        return await build_response()
+    etag, last_modified = _catalog_validators(request, snapshot, quote_version)
+    return await conditional.arespond(request, etag, last_modified, build_response)
+
+
+async def _paginate(queryset, request):
+    """
+    ``PageNumberPagination.paginate_queryset`` with the count and the page
+    fetched through the async ORM. Returns the paginator (None when paging is
+    off) and the objects on the page.
+    """
+    pagination = VehicleListView.pagination_class()
+    page_size = pagination.get_page_size(request)
+    if not page_size:
+        return None, [obj async for obj in queryset]
+
+    paginator = pagination.django_paginator_class(queryset, page_size)
+    # Paginator.count is a cached_property; fill it so paging never counts synchronously
+    paginator.count = await queryset.acount()
+    page_number = pagination.get_page_number(request, paginator)
+    try:
+        page = paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(pagination.invalid_page_message.format(page_number=page_number, message=str(exc)))
+    page.object_list = [obj async for obj in page.object_list]
+
+    pagination.page = page
+    pagination.request = request
+    return pagination, page.object_list
+
+
+@async_api_view
+async def vehicle_list(request):
+    """List all available vehicles with filtering and search."""
+    try:
+        period = pricing.parse_period(request.query_params)
+    except ValueError as e:
+        return _json({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    snapshot = await _get_snapshot()
+
+    async def quoted(rows):
+        # A cold rate table is read through the sync ORM
+        if period is not None:
+            await sync_to_async(_embed_quotes)(rows, period)
+        return rows
+
+    async def build_response():
+        rows = snapshot.filter_vehicles(request.query_params) if snapshot else None
+        if rows is not None:
+            # Served from the in-memory catalog: no SQL for filtering or paging.
+            prefix = catalog.site_prefix(request)
+            pagination = VehicleListView.pagination_class()
+            page = pagination.paginate_queryset(rows, request)
+            if page is not None:
+                data = await quoted([catalog.absolute_vehicle_row(row, prefix) for row in page])
+                return _json(pagination.get_paginated_response(data).data)
+            return _json(await quoted([catalog.absolute_vehicle_row(row, prefix) for row in rows]))
+
+        view = VehicleListView(request=request, args=(), kwargs={}, format_kwarg=None)
+        queryset = view.get_queryset().prefetch_related(None)
+        queryset = await sync_to_async(view.filter_queryset)(queryset)
+        pagination, vehicles = await _paginate(queryset, request)
+        data = await quoted(VehicleListSerializer(vehicles, many=True, context={'request': request}).data)
+        return _json(pagination.get_paginated_response(data).data if pagination else data)
+
+    quote_version = pricing.version() if period else None
+    return await _catalog_response(request, snapshot, build_response, quote_version)
+
+
+@async_api_view
+async def vehicle_detail(request, pk):
+    """Get detailed information about a specific vehicle."""
+    snapshot = await _get_snapshot()
+
+    async def build_response():
+        row = snapshot.get_detail(int(pk)) if snapshot else None
+        if row is not None:
+            return _json(catalog.absolute_vehicle_row(row, catalog.site_prefix(request)))
+        try:
+            vehicle = await VehicleDetailView.queryset.aget(pk=pk)
+        except Vehicle.DoesNotExist:
+            raise NotFound()
+        return _json(VehicleDetailSerializer(vehicle, context={'request': request}).data)
+
+    return await _catalog_response(request, snapshot, build_response)
+
+
+@async_api_view
+async def vehicle_search(request):
+    """Advanced vehicle search with multiple criteria."""
+    query = request.GET.get('q', '')
+    location = request.GET.get('location', '')
+
+    try:
+        point = _geo_params(request.GET)
+    except ValueError as e:
+        return _json({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = Vehicle.objects.select_related('brand', 'category').filter(status='available')
+
+    # Full-text search, best match first
+    if query:
+        queryset = await sync_to_async(search_vehicles)(queryset, query)
+        queryset = queryset.order_by('-search_rank', '-created_at')
+
+    # Location filter
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+
+    queryset = _apply_vehicle_filters(queryset, request.GET)
+
+    # Nearest first when the caller gives a position
+    if point is not None:
+        lat, lng, radius_km, limit = point
+        results = await sync_to_async(nearest_in_queryset)(queryset, lat, lng, radius_km=radius_km, limit=limit)
+        return _json(_with_distances(results, request))
+
+    vehicles = [vehicle async for vehicle in queryset]
+    return _json(VehicleListSerializer(vehicles, many=True, context={'request': request}).data)
+
+
+@async_api_view
+async def vehicle_availability(request, vehicle_id):
+    """Check vehicle availability for specific dates."""
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+
+    if not start_date or not end_date:
+        return _json({'error': 'start_date and end_date are required'},
+                     status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return _json({'error': 'Invalid date format. Use YYYY-MM-DD'},
+                     status=status.HTTP_400_BAD_REQUEST)
+
+    if start_date >= end_date:
+        return _json({'error': 'Start date must be before end date'},
+                     status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        vehicle = await Vehicle.objects.aget(id=vehicle_id)
+    except Vehicle.DoesNotExist:
+        return _json({'error': 'Vehicle not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Check for conflicting bookings
+    conflicting_bookings = await Booking.objects.filter(
+        vehicle=vehicle,
+        status__in=['confirmed', 'active'],
+        start_date__lte=end_date,
+        end_date__gte=start_date
+    ).aexists()
+
+    return _json({
+        'vehicle_id': vehicle_id,
+        'start_date': start_date,
+        'end_date': end_date,
+        'is_available': not conflicting_bookings and vehicle.is_bookable,
+        'vehicle_status': vehicle.status
+    })
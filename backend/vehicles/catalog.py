@@ -0,0 +1,560 @@
+"""
+In-process snapshot of the public vehicle catalog.
+
+The catalog is small and changes rarely, so public reads (vehicle list and
+detail, categories, brands) are served from an immutable snapshot holding
+pre-serialized rows, per-attribute indexes and pre-sorted orderings. Filtering,
+ordering and paging then run without SQL.
+
+Any save or delete of a Vehicle, VehicleImage, VehicleBrand or VehicleCategory
+marks the snapshot stale; it is rebuilt once the write commits. Each commit
+bumps a generation counter and each snapshot records the generation it was
+built at, so a rebuild is skipped only when one started after the commit.
+Until then the writing thread reads from the database inside its transaction
+and other threads keep the committed snapshot. When ``CATALOG_SNAPSHOT_PATH``
+is set, the rebuilt snapshot is written to that file and other worker
+processes (e.g. Gunicorn workers) pick it up by memory-mapping the file when
+its stat signature changes, so one rebuild serves every worker.
+
+Frequent writers (vehicle status changes from booking writes) invalidate with
+``defer=True`` instead: the commit only bumps the generation and creates a
+marker file next to the snapshot, and the first read in any process that
+finds either rebuilds. The rebuild takes the marker away before reading the
+catalog, so a write committed during it leaves a new marker behind. Reads
+arriving meanwhile in other processes wait for that rebuild and load it, so a
+burst of writes costs one rebuild rather than one per write.
+
+Image URLs are stored relative to the site and made absolute per request.
+"""
+import mmap
+import os
+import pickle
+import tempfile
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection, transaction
+from rental_backend import conditional
+from . import geo
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+FORMAT_VERSION = 2
+
+# Filters VehicleListView applies with exact matches (its filterset_fields).
+EXACT_FILTERS = ('brand', 'category', 'fuel_type', 'transmission', 'status', 'location')
+ORDERING_FIELDS = ('daily_rate', 'model_year', 'created_at')
+DEFAULT_ORDERING = ('-created_at',)
+
+# Parameters the snapshot understands; anything else falls back to SQL.
+# start_date and end_date only choose the dates of the embedded quotes.
+SUPPORTED_PARAMS = set(EXACT_FILTERS) | {
+    'available_only', 'min_price', 'max_price', 'min_seating', 'ordering', 'page', 'start_date', 'end_date',
+}
+
+_lock = threading.Lock()
+_state = {
+    'snapshot': None,
+    'signature': None,
+    # Catalog commits seen by this process, and how many the snapshot includes
+    'generation': 0,
+    'built': 0,
+}
+# Whether this thread's open transaction has written to the catalog
+_writes = threading.local()
+
+
+class _RelativeURLRequest:
+    """Stand-in request so serializers emit site-relative image URLs."""
+
+    def build_absolute_uri(self, location=None):
+        return location
+
+
+class CatalogSnapshot:
+    """Immutable, pre-serialized view of the public catalog."""
+
+    def __init__(self, version, built_at, database, vehicles, details, keys, indexes, orderings,
+                 categories, brands):
+        self.version = version
+        self.built_at = built_at
+        self.database = database
+        self.vehicles = vehicles      # tuple of list-serializer rows
+        self.details = details        # {vehicle_id: detail-serializer row}
+        self.keys = keys              # tuple of per-row raw values used for filtering
+        self.indexes = indexes        # {field: {value: frozenset(row positions)}}
+        self.orderings = orderings    # {field: tuple(row positions, ascending)}
+        self.categories = categories
+        self.brands = brands
+
+    @property
+    def etag(self):
+        return f'catalog-{self.version}-{int(self.built_at * 1000)}'
+
+    def validators(self, request):
+        """(ETag, Last-Modified) for a response built from this snapshot."""
+        return conditional.representation_etag(request, self.etag), int(self.built_at)
+
+    # ---------- Reads ----------
+
+    def filter_vehicles(self, params):
+        """
+        Return the list rows matching VehicleListView's query parameters, or
+        None when the request needs the SQL path (search, unknown or invalid
+        parameters), which also produces the usual validation errors.
+        """
+        if any(name not in SUPPORTED_PARAMS for name in params):
+            return None
+
+        candidates = None
+        for name in EXACT_FILTERS:
+            value = params.get(name)
+            if value in (None, ''):
+                continue
+            if name in ('brand', 'category'):
+                try:
+                    value = int(value)
+                except ValueError:
+                    return None
+            index = self.indexes[name]
+            if name in ('brand', 'category', 'fuel_type', 'transmission', 'status') and value not in index:
+                # Unknown choice or foreign key: let the filterset report it.
+                if not self._valid_choice(name, value):
+                    return None
+            matches = index.get(value, frozenset())
+            candidates = matches if candidates is None else candidates & matches
+
+        if params.get('available_only', 'true').lower() == 'true':
+            matches = self.indexes['status'].get('available', frozenset())
+            candidates = matches if candidates is None else candidates & matches
+
+        try:
+            min_price = _decimal(params.get('min_price'))
+            max_price = _decimal(params.get('max_price'))
+            min_seating = int(params['min_seating']) if params.get('min_seating') else None
+        except (ValueError, InvalidOperation):
+            return None
+
+        positions = range(len(self.vehicles)) if candidates is None else candidates
+        if min_price is not None or max_price is not None or min_seating is not None:
+            keys = self.keys
+            positions = {
+                position for position in positions
+                if (min_price is None or keys[position]['daily_rate'] >= min_price)
+                and (max_price is None or keys[position]['daily_rate'] <= max_price)
+                and (min_seating is None or keys[position]['seating_capacity'] >= min_seating)
+            }
+        elif candidates is None:
+            positions = set(positions)
+
+        return [self.vehicles[position] for position in self._order(positions, params.get('ordering'))]
+
+    def get_detail(self, vehicle_id):
+        return self.details.get(vehicle_id)
+
+    @property
+    def geo_index(self):
+        """KD-tree over vehicles with coordinates, built on first use."""
+        tree = self.__dict__.get('_geo_index')
+        if tree is None:
+            tree = geo.KDTree(
+                (position, key['latitude'], key['longitude'])
+                for position, key in enumerate(self.keys)
+                if key['latitude'] is not None and key['longitude'] is not None
+            )
+            self.__dict__['_geo_index'] = tree
+        return tree
+
+    def nearby(self, lat, lng, radius_km=None, limit=None, filters=None):
+        """
+        ``[(row, distance_km), ...]`` nearest first, restricted by the
+        ``filters`` dict (see ``nearby_filters``).
+        """
+        filters = filters or {}
+        keys = self.keys
+
+        def matches(position):
+            key = keys[position]
+            return all(test(key) for test in filters.values())
+
+        found = self.geo_index.query(lat, lng, k=limit, radius_km=radius_km, predicate=matches)
+        return [(self.vehicles[position], distance) for distance, position in found]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_geo_index', None)
+        return state
+
+    def _valid_choice(self, name, value):
+        from .models import Vehicle
+
+        choices = {
+            'fuel_type': Vehicle.FUEL_TYPE_CHOICES,
+            'transmission': Vehicle.TRANSMISSION_CHOICES,
+            'status': Vehicle.STATUS_CHOICES,
+        }.get(name)
+        if choices is None:
+            ids = {row['id'] for row in (self.brands if name == 'brand' else self.categories)}
+            return value in ids
+        return value in dict(choices)
+
+    def _order(self, positions, ordering_param):
+        ordering = _parse_ordering(ordering_param)
+        if len(ordering) == 1:
+            field = ordering[0].lstrip('-')
+            order = self.orderings[field]
+            if ordering[0].startswith('-'):
+                order = reversed(order)
+            return [position for position in order if position in positions]
+
+        ordered = sorted(positions)
+        for term in reversed(ordering):
+            field = term.lstrip('-')
+            ordered.sort(key=lambda position: self.keys[position][field], reverse=term.startswith('-'))
+        return ordered
+
+
+def nearby_filters(params):
+    """
+    Predicates over snapshot keys for the filters ``vehicle_search`` accepts
+    alongside a position. Raises ValueError on malformed values.
+    """
+    filters = {'status': lambda key: key['status'] == 'available'}
+    min_price = _decimal(params.get('min_price'))
+    max_price = _decimal(params.get('max_price'))
+    if min_price is not None:
+        filters['min_price'] = lambda key: key['daily_rate'] >= min_price
+    if max_price is not None:
+        filters['max_price'] = lambda key: key['daily_rate'] <= max_price
+    if params.get('fuel_type'):
+        fuel_type = params['fuel_type']
+        filters['fuel_type'] = lambda key: key['fuel_type'] == fuel_type
+    if params.get('transmission'):
+        transmission = params['transmission']
+        filters['transmission'] = lambda key: key['transmission'] == transmission
+    if params.get('min_seating'):
+        min_seating = int(params['min_seating'])
+        filters['min_seating'] = lambda key: key['seating_capacity'] >= min_seating
+    return filters
+
+
+def _decimal(value):
+    if value in (None, ''):
+        return None
+    return Decimal(value)
+
+
+def _parse_ordering(param):
+    """Mirror OrderingFilter: keep valid terms, else the view default."""
+    if param:
+        terms = [term.strip() for term in param.split(',')]
+        terms = [term for term in terms if term.lstrip('-') in ORDERING_FIELDS]
+        if terms:
+            return terms
+    return DEFAULT_ORDERING
+
+
+# ==================== URL HANDLING ====================
+
+def site_prefix(request):
+    """Scheme and host for turning site-relative URLs into absolute ones."""
+    return request.build_absolute_uri('/')[:-1]
+
+
+def _absolute(url, prefix):
+    if url and url.startswith('/'):
+        return prefix + url
+    return url
+
+
+def absolute_vehicle_row(row, prefix):
+    """Copy of a list or detail row with image URLs made absolute."""
+    row = dict(row)
+    row['main_image_url'] = _absolute(row.get('main_image_url'), prefix)
+    if row.get('brand') and row['brand'].get('logo'):
+        row['brand'] = dict(row['brand'], logo=_absolute(row['brand']['logo'], prefix))
+    if 'images' in row:
+        row['images'] = [dict(image, image=_absolute(image['image'], prefix)) for image in row['images']]
+    return row
+
+
+def absolute_brand_row(row, prefix):
+    if not row.get('logo'):
+        return row
+    return dict(row, logo=_absolute(row['logo'], prefix))
+
+
+# ==================== BUILD / LOAD ====================
+
+def build_snapshot(version):
+    """Read the catalog from the database and serialize it."""
+    from .models import Vehicle, VehicleCategory, VehicleBrand
+    from .serializers import (
+        VehicleListSerializer, VehicleDetailSerializer, VehicleCategorySerializer, VehicleBrandSerializer
+    )
+
+    context = {'request': _RelativeURLRequest()}
+    vehicles = list(
+        Vehicle.objects.select_related('brand', 'category').prefetch_related('images').order_by('-created_at', '-id')
+    )
+    rows = tuple(_plain(row) for row in VehicleListSerializer(vehicles, many=True, context=context).data)
+    details = {
+        row['id']: row
+        for row in (_plain(row) for row in VehicleDetailSerializer(vehicles, many=True, context=context).data)
+    }
+
+    keys = tuple(
+        {
+            'brand': vehicle.brand_id,
+            'category': vehicle.category_id,
+            'fuel_type': vehicle.fuel_type,
+            'transmission': vehicle.transmission,
+            'status': vehicle.status,
+            'location': vehicle.location,
+            'daily_rate': vehicle.daily_rate,
+            'seating_capacity': vehicle.seating_capacity,
+            'model_year': vehicle.model_year,
+            'created_at': vehicle.created_at,
+            'latitude': float(vehicle.latitude) if vehicle.latitude is not None else None,
+            'longitude': float(vehicle.longitude) if vehicle.longitude is not None else None,
+        }
+        for vehicle in vehicles
+    )
+
+    indexes = {}
+    for field in EXACT_FILTERS:
+        buckets = {}
+        for position, key in enumerate(keys):
+            buckets.setdefault(key[field], set()).add(position)
+        indexes[field] = {value: frozenset(members) for value, members in buckets.items()}
+
+    orderings = {
+        # Rows are already newest first, so a stable sort keeps that as the tie-break.
+        field: tuple(sorted(range(len(keys)), key=lambda position: keys[position][field]))
+        for field in ORDERING_FIELDS
+    }
+
+    categories = tuple(_plain(row) for row in VehicleCategorySerializer(
+        VehicleCategory.objects.order_by('id'), many=True, context=context
+    ).data)
+    brands = tuple(_plain(row) for row in VehicleBrandSerializer(
+        VehicleBrand.objects.order_by('id'), many=True, context=context
+    ).data)
+
+    return CatalogSnapshot(
+        version=version,
+        built_at=time.time(),
+        database=_database_identity(),
+        vehicles=rows,
+        details=details,
+        keys=keys,
+        indexes=indexes,
+        orderings=orderings,
+        categories=categories,
+        brands=brands,
+    )
+
+
+def _plain(value):
+    """Strip serializer wrappers (ReturnDict, OrderedDict) so rows pickle cleanly."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _database_identity():
+    return str(connection.settings_dict.get('NAME'))
+
+
+def _snapshot_path():
+    return getattr(settings, 'CATALOG_SNAPSHOT_PATH', None) or None
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _stale_path(path):
+    return path + '.stale'
+
+
+def _load(path):
+    with open(path, 'rb') as handle:
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            payload = pickle.loads(mapped)
+    if payload.get('format') != FORMAT_VERSION:
+        return None
+    return payload['snapshot']
+
+
+def _write(path, snapshot):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.catalog-')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            pickle.dump({'format': FORMAT_VERSION, 'snapshot': snapshot}, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class _FileLock:
+    """Serialize rebuilds across processes sharing a snapshot file."""
+
+    def __init__(self, path):
+        self.path = path + '.lock' if path else None
+        self.handle = None
+
+    def __enter__(self):
+        if self.path and fcntl is not None:
+            self.handle = open(self.path, 'a')
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+
+
+def publish(if_stale=False, generation=None):
+    """
+    Rebuild the snapshot from committed data and share it. With ``if_stale``,
+    a snapshot another process wrote after the stale marker was cleared is
+    loaded instead; with ``generation``, nothing is done when a rebuild
+    started after that commit.
+    """
+    path = _snapshot_path()
+    with _lock, _FileLock(path):
+        if generation is not None and _state['built'] >= generation:
+            return _state['snapshot']
+        current = _state['snapshot']
+        built = _state['generation']
+        stale = claimed = None
+        if path:
+            try:
+                on_disk = _load(path)
+            except (FileNotFoundError, pickle.UnpicklingError, EOFError, ValueError):
+                on_disk = None
+            stale = _stale_path(path)
+            if (if_stale and not os.path.exists(stale) and on_disk is not None
+                    and on_disk.database == _database_identity()):
+                _state['snapshot'] = on_disk
+                _state['signature'] = _file_signature(path)
+                return on_disk
+            if on_disk is not None and (current is None or on_disk.version > current.version):
+                current = on_disk
+            # Writes committed before this point are in the build; later ones
+            # create a new marker
+            claimed = stale + '.rebuilding'
+            try:
+                os.replace(stale, claimed)
+            except FileNotFoundError:
+                claimed = None
+
+        try:
+            snapshot = build_snapshot(version=(current.version + 1) if current else 1)
+            if path:
+                _write(path, snapshot)
+                _state['signature'] = _file_signature(path)
+        except BaseException:
+            if claimed:
+                os.replace(claimed, stale)
+            raise
+        if claimed:
+            os.unlink(claimed)
+        _state['snapshot'] = snapshot
+        _state['built'] = built
+        return snapshot
+
+
+def invalidate(defer=False):
+    """
+    Mark the snapshot stale and rebuild it once the current transaction
+    commits, or with ``defer``, on the first read after the commit.
+    """
+    if connection.in_atomic_block:
+        _writes.pending = True
+    transaction.on_commit(_mark_stale if defer else _publish_committed)
+
+
+def _committed():
+    with _lock:
+        _state['generation'] += 1
+        return _state['generation']
+
+
+def _publish_committed():
+    generation = _committed()
+    if is_enabled():
+        publish(generation=generation)
+
+
+def _mark_stale():
+    _committed()
+    path = _snapshot_path()
+    if path and is_enabled():
+        # Other processes rebuild on their next read while the marker exists
+        with open(_stale_path(path), 'a'):
+            pass
+
+
+def is_enabled():
+    return getattr(settings, 'CATALOG_SNAPSHOT_ENABLED', True)
+
+
+def get_snapshot():
+    """
+    Return the current snapshot, or None when reads should go to the database
+    (snapshot disabled, or an uncommitted catalog write in this thread).
+    """
+    if not is_enabled():
+        return None
+
+    if getattr(_writes, 'pending', False):
+        if connection.in_atomic_block:
+            return None
+        # Committed (and rebuilt by the commit) or rolled back
+        _writes.pending = False
+
+    generation = _state['generation']
+    if generation > _state['built']:
+        # A deferred commit in this process
+        return publish(generation=generation)
+
+    path = _snapshot_path()
+    snapshot = _state['snapshot']
+    if path:
+        signature = _file_signature(path)
+        if signature is None:
+            return publish()
+        if signature != _state['signature']:
+            with _lock:
+                try:
+                    loaded = _load(path)
+                except (pickle.UnpicklingError, EOFError, ValueError):
+                    loaded = None
+            if loaded is None or loaded.database != _database_identity():
+                return publish()
+            _state['snapshot'] = loaded
+            _state['signature'] = signature
+            snapshot = loaded
+        if os.path.exists(_stale_path(path)):
+            return publish(if_stale=True)
+
+    if snapshot is None or snapshot.database != _database_identity():
+        return publish()
+    return snapshot
@@ -0,0 +1,162 @@
+"""
+Facet counts for the vehicle catalog.
+
+Counts are computed from one ``values_list`` query over the vehicles matching
+every non-facet filter (search, status, location, availability). The facet
+filters themselves are applied in Python in the same pass so that each facet
+is counted against all *other* selected filters: choosing a brand still shows
+how many vehicles every other brand would give.
+"""
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import ValidationError
+from .models import Vehicle
+
+# Query parameters handled by the facet pass rather than the queryset.
+FACET_PARAMS = ('brand', 'category', 'fuel_type', 'transmission', 'min_seating', 'min_price', 'max_price')
+
+ROW_FIELDS = (
+    'brand_id', 'brand__name', 'category_id', 'category__name',
+    'fuel_type', 'transmission', 'seating_capacity', 'daily_rate',
+)
+
+DEFAULT_PRICE_INTERVAL = Decimal('25')
+# Most histogram buckets one response may hold; smaller intervals are rejected.
+MAX_PRICE_BUCKETS = 1000
+
+
+def _parse(params, name, cast):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValidationError({name: f'Invalid value: {value}'})
+
+
+def parse_facet_filters(params):
+    """Read the facet filters from request query parameters."""
+    return {
+        'brand': _parse(params, 'brand', int),
+        'category': _parse(params, 'category', int),
+        'fuel_type': params.get('fuel_type') or None,
+        'transmission': params.get('transmission') or None,
+        'min_seating': _parse(params, 'min_seating', int),
+        'min_price': _parse(params, 'min_price', Decimal),
+        'max_price': _parse(params, 'max_price', Decimal),
+    }
+
+
+def compute_facets(rows, selected, price_interval=DEFAULT_PRICE_INTERVAL):
+    """
+    Single pass over ``rows`` (tuples of ``ROW_FIELDS``).
+
+    ``selected`` is the output of ``parse_facet_filters``.
+    """
+    brands = Counter()
+    brand_names = {}
+    categories = Counter()
+    category_names = {}
+    fuel_types = Counter()
+    transmissions = Counter()
+    seating = Counter()
+    prices = Counter()
+    total = 0
+
+    brand = selected['brand']
+    category = selected['category']
+    fuel_type = selected['fuel_type']
+    transmission = selected['transmission']
+    min_seating = selected['min_seating']
+    min_price = selected['min_price']
+    max_price = selected['max_price']
+
+    for brand_id, brand_name, category_id, category_name, fuel, gearbox, seats, rate in rows:
+        failed = []
+        if brand is not None and brand_id != brand:
+            failed.append('brand')
+        if category is not None and category_id != category:
+            failed.append('category')
+        if fuel_type is not None and fuel != fuel_type:
+            failed.append('fuel_type')
+        if transmission is not None and gearbox != transmission:
+            failed.append('transmission')
+        if min_seating is not None and seats < min_seating:
+            failed.append('seating')
+        if (min_price is not None and rate < min_price) or (max_price is not None and rate > max_price):
+            failed.append('price')
+
+        # A row counts towards a facet when it passes every other facet.
+        if len(failed) > 1:
+            continue
+        miss = failed[0] if failed else None
+
+        if miss is None:
+            total += 1
+        if miss in (None, 'brand'):
+            brands[brand_id] += 1
+            brand_names[brand_id] = brand_name
+        if miss in (None, 'category'):
+            categories[category_id] += 1
+            category_names[category_id] = category_name
+        if miss in (None, 'fuel_type'):
+            fuel_types[fuel] += 1
+        if miss in (None, 'transmission'):
+            transmissions[gearbox] += 1
+        if miss in (None, 'seating'):
+            seating[seats] += 1
+        if miss in (None, 'price'):
+            prices[int(rate // price_interval)] += 1
+
+    return {
+        'total': total,
+        'brands': [
+            {'id': brand_id, 'name': brand_names[brand_id], 'count': count}
+            for brand_id, count in sorted(brands.items(), key=lambda item: (-item[1], brand_names[item[0]]))
+        ],
+        'categories': [
+            {'id': category_id, 'name': category_names[category_id], 'count': count}
+            for category_id, count in sorted(categories.items(), key=lambda item: (-item[1], category_names[item[0]]))
+        ],
+        'fuel_types': _choice_counts(Vehicle.FUEL_TYPE_CHOICES, fuel_types),
+        'transmissions': _choice_counts(Vehicle.TRANSMISSION_CHOICES, transmissions),
+        'seating': _seating_buckets(seating),
+        'price_histogram': _price_histogram(prices, price_interval),
+    }
+
+
+def _choice_counts(choices, counts):
+    return [
+        {'value': value, 'label': label, 'count': counts.get(value, 0)}
+        for value, label in choices
+    ]
+
+
+def _seating_buckets(counts):
+    """Per-capacity counts plus the cumulative count for a ``min_seating`` filter."""
+    buckets = []
+    at_least = 0
+    for seats in sorted(counts, reverse=True):
+        at_least += counts[seats]
+        buckets.append({'seats': seats, 'count': counts[seats], 'at_least': at_least})
+    buckets.reverse()
+    return buckets
+
+
+def _price_histogram(counts, interval):
+    if not counts:
+        return []
+    if max(counts) - min(counts) >= MAX_PRICE_BUCKETS:
+        raise ValidationError({
+            'price_interval': f'Too small for this price range: at most {MAX_PRICE_BUCKETS} buckets are returned'
+        })
+    return [
+        {
+            'min': float(bucket * interval),
+            'max': float((bucket + 1) * interval),
+            'count': counts.get(bucket, 0),
+        }
+        for bucket in range(min(counts), max(counts) + 1)
+    ]
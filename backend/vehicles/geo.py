@@ -0,0 +1,238 @@
+"""
+Geospatial helpers for nearest-vehicle search.
+
+Two indexes are used:
+
+* ``Vehicle.geohash`` (precision 9, indexed) lets the database narrow a radius
+  query to the 3x3 block of geohash cells around the search point using
+  plain B-tree range scans.
+* ``KDTree`` is an in-memory 3-D tree over unit-sphere coordinates, built from
+  the catalog snapshot, for exact nearest-neighbour and radius queries without
+  SQL.
+
+Distances are great-circle (haversine) kilometres.
+"""
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def validate_point(lat, lng):
+    """Parse and range-check a latitude/longitude pair. Raises ValueError."""
+    lat, lng = float(lat), float(lng)
+    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        raise ValueError('Coordinates out of range')
+    return lat, lng
+
+
+# ==================== GEOHASH ====================
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        interval, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            interval[0] = mid
+        else:
+            bits <<= 1
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    """(height, width) of a geohash cell in degrees."""
+    lng_bits = math.ceil(5 * precision / 2)
+    lat_bits = math.floor(5 * precision / 2)
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def covering_cells(lat, lng, radius_km):
+    """
+    Geohash prefixes whose union covers the circle, or None when the circle
+    is too large for cells to help (the caller should scan instead).
+    """
+    lat_delta = radius_km / 111.32
+    lng_delta = radius_km / (111.32 * max(math.cos(math.radians(lat)), 1e-6))
+
+    precision = None
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(candidate)
+        if height >= lat_delta and width >= lng_delta:
+            precision = candidate
+            break
+    if precision is None:
+        return None
+
+    height, width = _cell_size(precision)
+    cells = set()
+    for dlat in (-height, 0, height):
+        neighbour_lat = lat + dlat
+        if not -90 <= neighbour_lat <= 90:
+            continue
+        for dlng in (-width, 0, width):
+            neighbour_lng = (lng + dlng + 180) % 360 - 180
+            cells.add(encode_geohash(neighbour_lat, neighbour_lng, precision))
+    return sorted(cells)
+
+
+def geohash_range_q(cells):
+    """Q matching vehicles in any of the cells, as index-friendly range scans."""
+    from django.db.models import Q
+
+    q = Q()
+    for cell in cells:
+        q |= Q(geohash__gte=cell, geohash__lte=cell + 'z' * (GEOHASH_PRECISION - len(cell)))
+    return q
+
+
+# ==================== KD-TREE ====================
+
+def _to_xyz(lat, lng):
+    lat, lng = math.radians(lat), math.radians(lng)
+    return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+
+def _chord(distance_km):
+    """Straight-line distance on the unit sphere for a great-circle distance."""
+    return 2 * math.sin(min(distance_km, MAX_DISTANCE_KM) / (2 * EARTH_RADIUS_KM))
+
+
+def _arc_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class KDTree:
+    """
+    Static 3-D tree over points on the unit sphere.
+
+    ``items`` is a sequence of ``(key, lat, lng)``; queries return
+    ``[(distance_km, key), ...]`` nearest first.
+    """
+
+    def __init__(self, items):
+        self._keys = []
+        self._points = []
+        for key, lat, lng in items:
+            self._keys.append(key)
+            self._points.append(_to_xyz(lat, lng))
+        # Flattened tree: node -> (point index, axis, left node, right node)
+        self._nodes = []
+        self._root = self._build(list(range(len(self._points))), 0)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return -1
+        axis = depth % 3
+        indices.sort(key=lambda index: self._points[index][axis])
+        median = len(indices) // 2
+        node = len(self._nodes)
+        self._nodes.append(None)
+        left = self._build(indices[:median], depth + 1)
+        right = self._build(indices[median + 1:], depth + 1)
+        self._nodes[node] = (indices[median], axis, left, right)
+        return node
+
+    def query(self, lat, lng, k=None, radius_km=None, predicate=None):
+        """
+        Nearest ``k`` points (all when None) within ``radius_km`` (unbounded
+        when None) whose key satisfies ``predicate``.
+        """
+        if self._root == -1 or k == 0:
+            return []
+        target = _to_xyz(lat, lng)
+        limit = _chord(radius_km) if radius_km is not None else float('inf')
+        # Max-heap of the best candidates so far, as (-chord, key).
+        best = []
+
+        def bound():
+            if k is not None and len(best) >= k:
+                return min(limit, -best[0][0])
+            return limit
+
+        # Entries are (node, lower bound on the chord to anything below it).
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, floor = stack.pop()
+            if node == -1 or floor > bound():
+                continue
+            index, axis, left, right = self._nodes[node]
+            point = self._points[index]
+            chord = math.dist(point, target)
+            if chord <= bound():
+                key = self._keys[index]
+                if predicate is None or predicate(key):
+                    heapq.heappush(best, (-chord, key))
+                    if k is not None and len(best) > k:
+                        heapq.heappop(best)
+
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Push the far side first so the near side is explored first.
+            stack.append((far, max(floor, abs(diff))))
+            stack.append((near, floor))
+
+        return sorted((_arc_km(-negative_chord), key) for negative_chord, key in best)
+
+
+# ==================== DATABASE PATH ====================
+
+def nearest_in_queryset(queryset, lat, lng, radius_km=None, limit=None):
+    """
+    ``[(vehicle, distance_km), ...]`` nearest first from ``queryset``, using
+    the geohash index to narrow the scan.
+
+    Without a radius the search ring grows until ``limit`` vehicles are found.
+    """
+    queryset = queryset.filter(latitude__isnull=False, longitude__isnull=False)
+
+    def within(radius):
+        cells = covering_cells(lat, lng, radius) if radius is not None else None
+        candidates = queryset.filter(geohash_range_q(cells)) if cells else queryset
+        results = []
+        for vehicle in candidates:
+            distance = haversine_km(lat, lng, float(vehicle.latitude), float(vehicle.longitude))
+            if radius is None or distance <= radius:
+                results.append((distance, vehicle.pk, vehicle))
+        results.sort(key=lambda item: (item[0], item[1]))
+        return [(vehicle, distance) for distance, _, vehicle in results]
+
+    if radius_km is not None:
+        results = within(radius_km)
+        return results[:limit] if limit is not None else results
+
+    radius = 5.0
+    while radius < MAX_DISTANCE_KM:
+        results = within(radius)
+        if limit is not None and len(results) >= limit:
+            return results[:limit]
+        radius *= 4
+    results = within(None)
+    return results[:limit] if limit is not None else results
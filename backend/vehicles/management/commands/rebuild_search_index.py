@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from vehicles import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the vehicle full-text search index from the vehicle table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if search.search_backend(using) is None:
+            self.stderr.write('No full-text index on this database; search uses icontains.')
+            return
+        count = search.rebuild_index(using=using)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} vehicles'))
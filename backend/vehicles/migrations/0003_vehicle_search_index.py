@@ -0,0 +1,84 @@
+from django.db import migrations
+
+SQLITE_TABLE = 'vehicles_vehicle_fts'
+POSTGRES_TABLE = 'vehicles_vehicle_search'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Vehicle = apps.get_model('vehicles', 'Vehicle')
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5("
+                    "name, brand, category, description, features, "
+                    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')".format(SQLITE_TABLE)
+                )
+            except Exception:
+                # SQLite built without FTS5: search falls back to icontains.
+                return
+            for vehicle in Vehicle.objects.select_related('brand', 'category').iterator():
+                cursor.execute(
+                    'INSERT INTO {} (rowid, name, brand, category, description, features) '
+                    'VALUES (%s, %s, %s, %s, %s, %s)'.format(SQLITE_TABLE),
+                    [vehicle.pk, *_document(vehicle)],
+                )
+
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE IF NOT EXISTS {table} ('
+                'vehicle_id bigint PRIMARY KEY REFERENCES vehicles_vehicle(id) ON DELETE CASCADE, '
+                'document tsvector NOT NULL)'.format(table=POSTGRES_TABLE)
+            )
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS {table}_document_gin ON {table} USING GIN (document)'.format(
+                    table=POSTGRES_TABLE
+                )
+            )
+            for vehicle in Vehicle.objects.select_related('brand', 'category').iterator():
+                cursor.execute(
+                    'INSERT INTO {table} (vehicle_id, document) VALUES (%s, '
+                    "setweight(to_tsvector('simple', %s), 'A') || "
+                    "setweight(to_tsvector('simple', %s), 'A') || "
+                    "setweight(to_tsvector('simple', %s), 'B') || "
+                    "setweight(to_tsvector('simple', %s), 'D') || "
+                    "setweight(to_tsvector('simple', %s), 'C')) "
+                    'ON CONFLICT (vehicle_id) DO NOTHING'.format(table=POSTGRES_TABLE),
+                    [vehicle.pk, *_document(vehicle)],
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('DROP TABLE IF EXISTS {}'.format(SQLITE_TABLE))
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP TABLE IF EXISTS {}'.format(POSTGRES_TABLE))
+
+
+def _document(vehicle):
+    features = vehicle.features or []
+    if isinstance(features, (list, tuple)):
+        features = ' '.join(str(feature) for feature in features)
+    return (
+        vehicle.name or '',
+        vehicle.brand.name,
+        vehicle.category.name,
+        vehicle.description or '',
+        str(features),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0002_alter_vehicle_seating_capacity'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
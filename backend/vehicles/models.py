@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .geo import encode_geohash
 
 
 class VehicleCategory(models.Model):
@@ -68,6 +69,15 @@ class Vehicle(models.Model):
     
     # Location and Status
     location = models.CharField(max_length=200)
+    latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     
     # Additional Information
@@ -89,9 +99,27 @@ class Vehicle(models.Model):
     def __str__(self):
         return f"{self.brand.name} {self.name} ({self.registration_number})"
     
+    def save(self, *args, **kwargs):
+        # Keep the spatial bucket in step with the coordinates
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(float(self.latitude), float(self.longitude))
+        else:
+            self.geohash = ''
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        
+        super().save(*args, **kwargs)
+    
     @property
     def is_available(self):
         return self.status == 'available'
+    
+    @property
+    def is_bookable(self):
+        # ``rented`` only describes today; booking intervals decide other dates
+        return self.status in ('available', 'rented')
 
 
 class VehicleImage(models.Model):
@@ -0,0 +1,231 @@
+"""
+Full-text search over the vehicle catalog.
+
+The index lives outside the ``Vehicle`` table so that brand and category names
+can be folded into one document per vehicle:
+
+* SQLite uses an FTS5 virtual table ranked with ``bm25()``.
+* PostgreSQL uses a ``tsvector`` column with a GIN index ranked with
+  ``ts_rank()``.
+
+Other backends (or a SQLite build without FTS5) fall back to the original
+``icontains`` lookups, unranked.
+
+``search_vehicles`` keeps the match and the rank in SQL: the queryset is
+restricted with a subquery on the index and ranked with a correlated one, so
+the statement is the same size however many vehicles match, and filtering,
+ordering and paging run in the database.
+"""
+import re
+
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+SQLITE_TABLE = 'vehicles_vehicle_fts'
+POSTGRES_TABLE = 'vehicles_vehicle_search'
+
+# Relevance weights for name, brand, category, description and features.
+# FTS5 takes them as bm25() arguments; PostgreSQL maps them onto A-D labels.
+COLUMN_WEIGHTS = (10.0, 8.0, 4.0, 1.0, 2.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_document(vehicle):
+    """Return the indexed columns for a vehicle instance."""
+    features = vehicle.features or []
+    if isinstance(features, (list, tuple)):
+        features = ' '.join(str(feature) for feature in features)
+    return (
+        vehicle.name or '',
+        vehicle.brand.name if vehicle.brand_id else '',
+        vehicle.category.name if vehicle.category_id else '',
+        vehicle.description or '',
+        str(features),
+    )
+
+
+_available = {}
+
+
+def search_backend(using=DEFAULT_DB_ALIAS):
+    """Return 'sqlite', 'postgresql' or None when no index is available."""
+    if using in _available:
+        return _available[using]
+
+    connection = connections[using]
+    backend = None
+    if connection.vendor == 'postgresql':
+        backend = 'postgresql' if POSTGRES_TABLE in connection.introspection.table_names() else None
+    elif connection.vendor == 'sqlite':
+        backend = 'sqlite' if SQLITE_TABLE in connection.introspection.table_names() else None
+
+    # Only remember a positive answer: the index may be created by a later
+    # migration in the same process (e.g. the test runner).
+    if backend is not None:
+        _available[using] = backend
+    return backend
+
+
+def _tokens(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _fts5_query(tokens):
+    # Every token is quoted so user input can never be parsed as FTS5 syntax,
+    # and the trailing * gives prefix matches for search-as-you-type.
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def _tsquery(tokens):
+    return ' & '.join('%s:*' % token for token in tokens)
+
+
+def _match_sql(backend):
+    """SQL selecting the ids of the vehicles matching one query parameter."""
+    if backend == 'sqlite':
+        return 'SELECT rowid FROM {table} WHERE {table} MATCH %s'.format(table=SQLITE_TABLE)
+    return "SELECT vehicle_id FROM {table} WHERE document @@ to_tsquery('simple', %s)".format(table=POSTGRES_TABLE)
+
+
+def _match_query(backend, tokens):
+    return _fts5_query(tokens) if backend == 'sqlite' else _tsquery(tokens)
+
+
+class _SearchRank(Func):
+    """Relevance of the outer vehicle row for a full-text query, higher is better."""
+
+    output_field = FloatField()
+
+    def __init__(self, backend, query):
+        self.backend = backend
+        super().__init__(Value(query), F('pk'))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        query_sql, query_params = compiler.compile(self.source_expressions[0])
+        pk_sql, pk_params = compiler.compile(self.source_expressions[1])
+        if self.backend == 'sqlite':
+            # bm25() is lower-is-better, so negate it into a score.
+            sql = '(SELECT -bm25({table}, {weights}) FROM {table} WHERE {table} MATCH {query} AND rowid = {pk})'.format(
+                table=SQLITE_TABLE, weights=', '.join(str(w) for w in COLUMN_WEIGHTS), query=query_sql, pk=pk_sql,
+            )
+            return sql, (*query_params, *pk_params)
+        sql = "(SELECT ts_rank(document, to_tsquery('simple', {query})) FROM {table} WHERE vehicle_id = {pk})".format(
+            table=POSTGRES_TABLE, query=query_sql, pk=pk_sql,
+        )
+        return sql, (*query_params, *pk_params)
+
+
+def search_vehicles(queryset, query):
+    """
+    Restrict ``queryset`` to vehicles matching ``query``, annotated with
+    ``search_rank`` (higher is better).
+    """
+    backend = search_backend(queryset.db)
+    if backend is None:
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(brand__name__icontains=query) |
+            Q(category__name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(features__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    tokens = _tokens(query)
+    if not tokens:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    match = _match_query(backend, tokens)
+    return queryset.filter(id__in=RawSQL(_match_sql(backend), [match])).annotate(
+        search_rank=_SearchRank(backend, match)
+    )
+
+
+# ==================== INDEX MAINTENANCE ====================
+
+def index_vehicle(vehicle, using=DEFAULT_DB_ALIAS):
+    """Insert or refresh the index row for a single vehicle."""
+    backend = search_backend(using)
+    if backend is None:
+        return
+
+    document = build_document(vehicle)
+    with connections[using].cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.execute('DELETE FROM {} WHERE rowid = %s'.format(SQLITE_TABLE), [vehicle.pk])
+            cursor.execute(
+                'INSERT INTO {} (rowid, name, brand, category, description, features) '
+                'VALUES (%s, %s, %s, %s, %s, %s)'.format(SQLITE_TABLE),
+                [vehicle.pk, *document],
+            )
+        else:
+            cursor.execute(
+                'INSERT INTO {table} (vehicle_id, document) VALUES (%s, '
+                "setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'D') || "
+                "setweight(to_tsvector('simple', %s), 'C')) "
+                'ON CONFLICT (vehicle_id) DO UPDATE SET document = EXCLUDED.document'.format(
+                    table=POSTGRES_TABLE
+                ),
+                [vehicle.pk, *document],
+            )
+
+
+def unindex_vehicle(vehicle_id, using=DEFAULT_DB_ALIAS):
+    """Remove a vehicle from the index."""
+    backend = search_backend(using)
+    if backend is None:
+        return
+
+    with connections[using].cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.execute('DELETE FROM {} WHERE rowid = %s'.format(SQLITE_TABLE), [vehicle_id])
+        else:
+            cursor.execute('DELETE FROM {} WHERE vehicle_id = %s'.format(POSTGRES_TABLE), [vehicle_id])
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Rebuild the whole index from the vehicle table. Returns the row count."""
+    from .models import Vehicle
+
+    backend = search_backend(using)
+    if backend is None:
+        return 0
+
+    # One transaction: one commit instead of one per vehicle, and searches
+    # never see a half-built index
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute('DELETE FROM {}'.format(SQLITE_TABLE if backend == 'sqlite' else POSTGRES_TABLE))
+
+        count = 0
+        for vehicle in Vehicle.objects.using(using).select_related('brand', 'category').iterator():
+            index_vehicle(vehicle, using=using)
+            count += 1
+    return count
+
+
+# ==================== DRF INTEGRATION ====================
+
+class VehicleSearchFilter(filters.SearchFilter):
+    """``?search=`` backed by the full-text index instead of icontains."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_vehicles(queryset, query)
+
+
+class VehicleOrderingFilter(filters.OrderingFilter):
+    """Order search results by relevance unless ``?ordering=`` is given."""
+
+    def get_default_ordering(self, view):
+        ordering = super().get_default_ordering(view)
+        if view.request.query_params.get(VehicleSearchFilter.search_param, '').strip():
+            return ('-search_rank',) + tuple(ordering or ())
+        return ordering
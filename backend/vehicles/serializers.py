@@ -32,7 +32,7 @@ class VehicleListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'brand', 'category', 'model_year', 'fuel_type',
             'transmission', 'seating_capacity', 'daily_rate', 'location',
-            'status', 'main_image_url', 'features'
+            'latitude', 'longitude', 'status', 'main_image_url', 'features'
         ]
     
     def get_main_image_url(self, obj):
@@ -55,7 +55,8 @@ class VehicleDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'brand', 'category', 'model_year', 'fuel_type',
             'transmission', 'engine_capacity', 'seating_capacity', 'mileage',
-            'daily_rate', 'weekly_rate', 'monthly_rate', 'location', 'status',
+            'daily_rate', 'weekly_rate', 'monthly_rate', 'location', 'latitude',
+            'longitude', 'status',
             'description', 'features', 'insurance_valid_until', 'registration_number',
             'main_image_url', 'images', 'created_at', 'updated_at'
         ]
@@ -81,7 +82,8 @@ class VehicleCreateUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'brand', 'category', 'model_year', 'fuel_type',
             'transmission', 'engine_capacity', 'seating_capacity', 'mileage',
-            'daily_rate', 'weekly_rate', 'monthly_rate', 'location', 'status',
+            'daily_rate', 'weekly_rate', 'monthly_rate', 'location', 'latitude',
+            'longitude', 'status',
             'description', 'features', 'insurance_valid_until', 'registration_number',
             'main_image', 'images'
         ]
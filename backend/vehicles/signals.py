@@ -0,0 +1,42 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Vehicle, VehicleBrand, VehicleCategory, VehicleImage
+from . import catalog, search
+
+
+@receiver(post_save, sender=Vehicle)
+def index_saved_vehicle(sender, instance, raw=False, using=None, **kwargs):
+    """Keep the full-text index in sync with the vehicle row."""
+    if raw:
+        return
+    search.index_vehicle(instance, using=using)
+
+
+@receiver(post_delete, sender=Vehicle)
+def unindex_deleted_vehicle(sender, instance, using=None, **kwargs):
+    search.unindex_vehicle(instance.pk, using=using)
+
+
+@receiver(post_save, sender=VehicleBrand)
+@receiver(post_save, sender=VehicleCategory)
+def reindex_related_vehicles(sender, instance, created=False, raw=False, using=None, **kwargs):
+    """Brand and category names are part of every vehicle document."""
+    if raw or created:
+        return
+    for vehicle in instance.vehicles.using(using).select_related('brand', 'category'):
+        search.index_vehicle(vehicle, using=using)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_save, sender=VehicleBrand)
+@receiver(post_save, sender=VehicleCategory)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=VehicleImage)
+@receiver(post_delete, sender=VehicleBrand)
+@receiver(post_delete, sender=VehicleCategory)
+def invalidate_catalog(sender, raw=False, **kwargs):
+    """Any catalog write bumps the in-memory snapshot version."""
+    if raw:
+        return
+    catalog.invalidate()
@@ -1,12 +1,27 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_CATALOG_VIEWS:
+    from . import async_views
+    vehicle_list = async_views.vehicle_list
+    vehicle_detail = async_views.vehicle_detail
+    vehicle_search = async_views.vehicle_search
+    vehicle_availability = async_views.vehicle_availability
+else:
+    vehicle_list = views.VehicleListView.as_view()
+    vehicle_detail = views.VehicleDetailView.as_view()
+    vehicle_search = views.vehicle_search
+    vehicle_availability = views.vehicle_availability
+
 urlpatterns = [
     # Public endpoints
-    path('', views.VehicleListView.as_view(), name='vehicle-list'),
-    path('search/', views.vehicle_search, name='vehicle-search'),
-    path('<int:pk>/', views.VehicleDetailView.as_view(), name='vehicle-detail'),
-    path('<int:vehicle_id>/availability/', views.vehicle_availability, name='vehicle-availability'),
+    path('', vehicle_list, name='vehicle-list'),
+    path('search/', vehicle_search, name='vehicle-search'),
+    path('facets/', views.VehicleFacetView.as_view(), name='vehicle-facets'),
+    path('nearby/', views.vehicle_nearby, name='vehicle-nearby'),
+    path('<int:pk>/', vehicle_detail, name='vehicle-detail'),
+    path('<int:vehicle_id>/availability/', vehicle_availability, name='vehicle-availability'),
     path('categories/', views.VehicleCategoryListView.as_view(), name='vehicle-categories'),
     path('brands/', views.VehicleBrandListView.as_view(), name='vehicle-brands'),
     
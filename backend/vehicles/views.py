@@ -1,11 +1,22 @@
+import copy
+from decimal import Decimal, InvalidOperation
 from rest_framework import generics, filters, status, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count
+from rental_backend import conditional
+from rental_backend.db_routers import use_replica
+from bookings import pricing
+from bookings.stats import leaderboard
 from .models import Vehicle, VehicleCategory, VehicleBrand
+from .search import VehicleSearchFilter, VehicleOrderingFilter, search_vehicles
+from . import catalog
+from .geo import validate_point, nearest_in_queryset
+from .facets import FACET_PARAMS, ROW_FIELDS, DEFAULT_PRICE_INTERVAL, parse_facet_filters, compute_facets
 from .serializers import (
     VehicleListSerializer, 
     VehicleDetailSerializer, 
@@ -14,14 +25,16 @@ from .serializers import (
     VehicleBrandSerializer
 )
 
+NEARBY_DEFAULT_LIMIT = 20
+NEARBY_MAX_LIMIT = 100
+
 
 class VehicleListView(generics.ListAPIView):
     """List all available vehicles with filtering and search."""
     serializer_class = VehicleListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, VehicleSearchFilter, VehicleOrderingFilter]
     filterset_fields = ['brand', 'category', 'fuel_type', 'transmission', 'status', 'location']
-    search_fields = ['name', 'brand__name', 'description', 'features']
     ordering_fields = ['daily_rate', 'model_year', 'created_at']
     ordering = ['-created_at']
     
@@ -48,6 +61,87 @@ class VehicleListView(generics.ListAPIView):
             queryset = queryset.filter(seating_capacity__gte=min_seating)
         
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # ?start_date=&end_date= embeds each vehicle's rental quote for those dates
+        try:
+            period = pricing.parse_period(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        snapshot = catalog.get_snapshot()
+        return _catalog_response(
+            request, snapshot, lambda: _with_quotes(self._list(snapshot, request, *args, **kwargs), period),
+            quote_version=pricing.version() if period else None,
+        )
+    
+    def _list(self, snapshot, request, *args, **kwargs):
+        rows = snapshot.filter_vehicles(request.query_params) if snapshot else None
+        if rows is None:
+            return super().list(request, *args, **kwargs)
+        
+        # Served from the in-memory catalog: no SQL for filtering or paging.
+        prefix = catalog.site_prefix(request)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([catalog.absolute_vehicle_row(row, prefix) for row in page])
+        return Response([catalog.absolute_vehicle_row(row, prefix) for row in rows])
+
+
+class VehicleFacetView(VehicleListView):
+    """Facet counts for the vehicle list; accepts the same filters as the list."""
+    pagination_class = None
+    
+    def list(self, request, *args, **kwargs):
+        selected = parse_facet_filters(request.query_params)
+        price_interval = request.query_params.get('price_interval') or DEFAULT_PRICE_INTERVAL
+        try:
+            price_interval = Decimal(price_interval)
+        except InvalidOperation:
+            price_interval = None
+        if price_interval is None or not price_interval.is_finite() or price_interval <= 0:
+            return Response({'error': 'price_interval must be a positive number'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        # The list filters run in SQL without the facet parameters; those are
+        # applied per facet while counting.
+        self.request = _without_query_params(request, FACET_PARAMS)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by()
+        rows = queryset.values_list(*ROW_FIELDS)
+        
+        return Response(compute_facets(rows, selected, price_interval))
+
+
+def _embed_quotes(rows, period):
+    """Add a ``quote`` for ``period`` (start and end date) to each vehicle row."""
+    quotes = pricing.quote_vehicles([row['id'] for row in rows], *period)
+    for row in rows:
+        quote = quotes.get(row['id'])
+        row['quote'] = pricing.as_json(quote) if quote else None
+    return rows
+
+
+def _with_quotes(response, period):
+    if period is not None and response.status_code == status.HTTP_200_OK:
+        _embed_quotes(response.data['results'] if isinstance(response.data, dict) else response.data, period)
+    return response
+
+
+def _without_query_params(request, names):
+    """Shallow copy of a DRF request with some query parameters removed."""
+    django_request = copy.copy(request._request)
+    query_params = django_request.GET.copy()
+    for name in names:
+        query_params.pop(name, None)
+    django_request.GET = query_params
+    clone = Request(
+        django_request,
+        parsers=request.parsers,
+        authenticators=request.authenticators,
+        negotiator=request.negotiator,
+        parser_context=request.parser_context,
+    )
+    clone.user = request.user
+    return clone
 
 
 class VehicleDetailView(generics.RetrieveAPIView):
@@ -55,6 +149,16 @@ class VehicleDetailView(generics.RetrieveAPIView):
     queryset = Vehicle.objects.select_related('brand', 'category').prefetch_related('images')
     serializer_class = VehicleDetailSerializer
     permission_classes = [permissions.AllowAny]
+    
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = catalog.get_snapshot()
+        return _catalog_response(request, snapshot, lambda: self._retrieve(snapshot, request, *args, **kwargs))
+    
+    def _retrieve(self, snapshot, request, *args, **kwargs):
+        row = snapshot.get_detail(int(kwargs['pk'])) if snapshot else None
+        if row is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(catalog.absolute_vehicle_row(row, catalog.site_prefix(request)))
 
 
 class VehicleCreateView(generics.CreateAPIView):
@@ -82,6 +186,19 @@ class VehicleCategoryListView(generics.ListAPIView):
     queryset = VehicleCategory.objects.all()
     serializer_class = VehicleCategorySerializer
     permission_classes = [permissions.AllowAny]
+    
+    def list(self, request, *args, **kwargs):
+        snapshot = catalog.get_snapshot()
+        return _catalog_response(request, snapshot, lambda: self._list(snapshot, request, *args, **kwargs))
+    
+    def _list(self, snapshot, request, *args, **kwargs):
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        rows = list(snapshot.categories)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
 
 
 class VehicleBrandListView(generics.ListAPIView):
@@ -89,6 +206,43 @@ class VehicleBrandListView(generics.ListAPIView):
     queryset = VehicleBrand.objects.all()
     serializer_class = VehicleBrandSerializer
     permission_classes = [permissions.AllowAny]
+    
+    def list(self, request, *args, **kwargs):
+        snapshot = catalog.get_snapshot()
+        return _catalog_response(request, snapshot, lambda: self._list(snapshot, request, *args, **kwargs))
+    
+    def _list(self, snapshot, request, *args, **kwargs):
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        prefix = catalog.site_prefix(request)
+        rows = [catalog.absolute_brand_row(row, prefix) for row in snapshot.brands]
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
+
+def _catalog_validators(request, snapshot, quote_version=None):
+    """
+    (ETag, Last-Modified) for a catalog response. Responses with embedded
+    quotes also depend on tax rules, which leave the snapshot alone, so their
+    ETag includes the rate tables' version and they have no Last-Modified.
+    """
+    if quote_version is None:
+        return snapshot.validators(request)
+    return conditional.representation_etag(request, f'{snapshot.etag}:quotes-{quote_version}'), None
+
+
+def _catalog_response(request, snapshot, build_response, quote_version=None):
+    """
+    Conditional GET for public catalog reads. The snapshot version changes on
+    every committed catalog write, so a matching ETag means the client's copy
+    is current and neither the queryset nor the serializer needs to run.
+    """
+    if snapshot is None:
+        return build_response()
+    etag, last_modified = _catalog_validators(request, snapshot, quote_version)
+    return conditional.respond(request, etag, last_modified, build_response)
 
 
 @api_view(['GET'])
@@ -97,27 +251,70 @@ def vehicle_search(request):
     """Advanced vehicle search with multiple criteria."""
     query = request.GET.get('q', '')
     location = request.GET.get('location', '')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    fuel_type = request.GET.get('fuel_type')
-    transmission = request.GET.get('transmission')
-    min_seating = request.GET.get('min_seating')
+    
+    try:
+        point = _geo_params(request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     queryset = Vehicle.objects.select_related('brand', 'category').filter(status='available')
     
-    # Text search
+    # Full-text search, best match first
     if query:
-        queryset = queryset.filter(
-            Q(name__icontains=query) |
-            Q(brand__name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(features__icontains=query)
-        )
+        queryset = search_vehicles(queryset, query).order_by('-search_rank', '-created_at')
     
     # Location filter
     if location:
         queryset = queryset.filter(location__icontains=location)
     
+    queryset = _apply_vehicle_filters(queryset, request.GET)
+    
+    # Nearest first when the caller gives a position
+    if point is not None:
+        lat, lng, radius_km, limit = point
+        results = nearest_in_queryset(queryset, lat, lng, radius_km=radius_km, limit=limit)
+        return Response(_with_distances(results, request))
+    
+    serializer = VehicleListSerializer(queryset, many=True, context={'request': request})
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def vehicle_nearby(request):
+    """Available vehicles nearest to a point, optionally within a radius."""
+    try:
+        point = _geo_params(request.GET)
+        if point is None:
+            raise ValueError('lat and lng are required')
+        lat, lng, radius_km, limit = point
+        filters = catalog.nearby_filters(request.GET)
+    except (ValueError, InvalidOperation) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # In-memory KD-tree over the catalog snapshot when available
+    snapshot = catalog.get_snapshot()
+    if snapshot is not None:
+        prefix = catalog.site_prefix(request)
+        return Response([
+            dict(catalog.absolute_vehicle_row(row, prefix), distance_km=round(distance, 3))
+            for row, distance in snapshot.nearby(lat, lng, radius_km=radius_km, limit=limit, filters=filters)
+        ])
+    
+    queryset = Vehicle.objects.select_related('brand', 'category').filter(status='available')
+    queryset = _apply_vehicle_filters(queryset, request.GET)
+    results = nearest_in_queryset(queryset, lat, lng, radius_km=radius_km, limit=limit)
+    return Response(_with_distances(results, request))
+
+
+def _apply_vehicle_filters(queryset, params):
+    """Price, fuel, transmission and seating filters shared by the search views."""
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    fuel_type = params.get('fuel_type')
+    transmission = params.get('transmission')
+    min_seating = params.get('min_seating')
+    
     # Price range
     if min_price:
         queryset = queryset.filter(daily_rate__gte=min_price)
@@ -132,8 +329,39 @@ def vehicle_search(request):
     if min_seating:
         queryset = queryset.filter(seating_capacity__gte=min_seating)
     
-    serializer = VehicleListSerializer(queryset, many=True, context={'request': request})
-    return Response(serializer.data)
+    return queryset
+
+
+def _geo_params(params):
+    """
+    ``(lat, lng, radius_km, limit)`` from ``lat``, ``lng``, ``radius_km`` and
+    ``limit`` query parameters, or None when no position is given.
+    """
+    lat = params.get('lat')
+    lng = params.get('lng')
+    if not lat and not lng:
+        return None
+    if not lat or not lng:
+        raise ValueError('lat and lng must be given together')
+    
+    lat, lng = validate_point(lat, lng)
+    radius_km = params.get('radius_km')
+    radius_km = float(radius_km) if radius_km else None
+    if radius_km is not None and radius_km <= 0:
+        raise ValueError('radius_km must be positive')
+    
+    limit = int(params.get('limit') or NEARBY_DEFAULT_LIMIT)
+    if limit <= 0:
+        raise ValueError('limit must be positive')
+    return lat, lng, radius_km, min(limit, NEARBY_MAX_LIMIT)
+
+
+def _with_distances(results, request):
+    vehicles = [vehicle for vehicle, _ in results]
+    data = VehicleListSerializer(vehicles, many=True, context={'request': request}).data
+    for row, (_, distance) in zip(data, results):
+        row['distance_km'] = round(distance, 3)
+    return data
 
 
 @api_view(['GET'])
@@ -174,7 +402,7 @@ def vehicle_availability(request, vehicle_id):
         end_date__gte=start_date
     ).exists()
     
-    is_available = not conflicting_bookings and vehicle.is_available
+    is_available = not conflicting_bookings and vehicle.is_bookable
     
     return Response({
         'vehicle_id': vehicle_id,
@@ -246,6 +474,7 @@ class AdminVehicleBrandDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@use_replica
 def vehicle_analytics(request):
     """Get comprehensive vehicle analytics for admin dashboard."""
     # Vehicle statistics
@@ -263,15 +492,9 @@ def vehicle_analytics(request):
         vehicle_count=Count('vehicles')
     ).values('name', 'vehicle_count')
     
-    # Popular vehicles (most booked)
-    popular_vehicles = Vehicle.objects.annotate(
-        booking_count=Count('bookings')
-    ).order_by('-booking_count')[:10]
-    
-    # Revenue by vehicle
-    revenue_by_vehicle = Vehicle.objects.annotate(
-        total_revenue=Avg('bookings__total_amount')
-    ).filter(total_revenue__isnull=False).order_by('-total_revenue')[:10]
+    # Popular vehicles (most booked) and revenue by vehicle, from the stats table
+    popular_vehicles = leaderboard('booking_count', 10)
+    revenue_by_vehicle = leaderboard('paid_revenue', 10)
     
     # Fuel type distribution
     fuel_stats = Vehicle.objects.values('fuel_type').annotate(
@@ -295,21 +518,22 @@ def vehicle_analytics(request):
         'transmission_distribution': list(transmission_stats),
         'popular_vehicles': [
             {
-                'id': vehicle.id,
-                'name': vehicle.name,
-                'brand': vehicle.brand.name,
-                'booking_count': vehicle.booking_count
+                'id': stats.vehicle.id,
+                'name': stats.vehicle.name,
+                'brand': stats.vehicle.brand.name,
+                'booking_count': stats.booking_count
             }
-            for vehicle in popular_vehicles
+            for stats in popular_vehicles
         ],
         'top_revenue_vehicles': [
             {
-                'id': vehicle.id,
-                'name': vehicle.name,
-                'brand': vehicle.brand.name,
-                'avg_revenue': float(vehicle.total_revenue or 0)
+                'id': stats.vehicle.id,
+                'name': stats.vehicle.name,
+                'brand': stats.vehicle.brand.name,
+                'total_revenue': float(stats.paid_revenue),
+                'booking_count': stats.booking_count
             }
-            for vehicle in revenue_by_vehicle
+            for stats in revenue_by_vehicle
         ]
     })
 
@@ -345,4 +569,7 @@ def bulk_vehicle_operations(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    # Queryset updates bypass the save signals that refresh the catalog.
+    catalog.invalidate()
+    
     return Response({'message': message})
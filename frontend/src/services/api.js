@@ -51,6 +51,7 @@ export const vehicleAPI = {
   getVehicles: (params) => api.get('/vehicles/', { params }).then(res => res.data),
   getVehicle: (id) => api.get(`/vehicles/${id}/`).then(res => res.data),
   searchVehicles: (params) => api.get('/vehicles/search/', { params }).then(res => res.data),
+  getFacets: (params) => api.get('/vehicles/facets/', { params }).then(res => res.data),
   checkAvailability: (id, startDate, endDate) => 
     api.get(`/vehicles/${id}/availability/`, { 
       params: { start_date: startDate, end_date: endDate } 